@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+import re
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
+
+from .metrics import incr
+
+
+# ZIP download of many documents, streamed while it is being built. Files are
+# fetched by a few workers (ARCHIVE_DOWNLOAD_CONCURRENCY) and written as whole
+# entries in the order they finish; every finished entry is flushed to the
+# client right away. zipfile writes to a non-seekable sink, so sizes/CRCs go in
+# data descriptors and nothing but the files in flight is held in memory.
+#
+# Entries are stored, not deflated: documents are PDFs, Office files and images
+# that are already compressed. Files that can't be fetched are skipped and
+# listed in _errors.txt at the end of the archive.
+
+_UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f\\/:*?"<>|]+')
+_MAX_NAME_LENGTH = 120
+ERRORS_ENTRY = "_errors.txt"
+
+
+class _Sink:
+    # Write-only, non-seekable file object; the ZIP bytes are taken out after each entry.
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe_part(value: object, fallback: str) -> str:
+    text = _UNSAFE_NAME_RE.sub("_", str(value or "")).strip(" .")
+    return text[:_MAX_NAME_LENGTH].rstrip(" .") or fallback
+
+
+def entry_name(doc: dict, used: set[str]) -> str:
+    # <category>/<title><ext>, unique case-insensitively (Windows extractors).
+    folder = _safe_part(doc.get("category"), "uncategorized")
+    stem = _safe_part(doc.get("title"), f"document-{doc['id']}")
+    ext = mimetypes.guess_extension(str(doc.get("file_type") or "").split(";")[0].strip()) or ""
+    if ext and stem.lower().endswith(ext):
+        stem = stem[: -len(ext)]
+    name = f"{folder}/{stem}{ext}"
+    if name.lower() in used:
+        name = f"{folder}/{stem} ({doc['id']}){ext}"
+    used.add(name.lower())
+    return name
+
+
+def _date_time(value: object) -> tuple[int, int, int, int, int, int]:
+    # ZIP timestamps are local wall-clock time and can't go before 1980.
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone()
+        if value.year >= 1980:
+            return value.timetuple()[:6]
+    return datetime.now().timetuple()[:6]
+
+
+async def stream_archive(
+    docs: list[dict],
+    fetch: Callable[[dict], Awaitable[bytes]],
+    *,
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    pending = iter(docs)
+    # Bounded: workers stop fetching ahead while the client is slow to read.
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker() -> None:
+        for doc in pending:
+            try:
+                await results.put((doc, await fetch(doc), None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await results.put((doc, None, str(e) or type(e).__name__))
+        await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(docs)) or 1)]
+    sink = _Sink()
+    used: set[str] = {ERRORS_ENTRY.lower()}
+    failures: list[str] = []
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            finished = 0
+            while finished < len(workers):
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                doc, content, error = item
+                if error is not None:
+                    incr("archive.failures")
+                    failures.append(f"{doc['id']}\t{doc.get('title') or ''}\t{error}")
+                    continue
+                info = zipfile.ZipInfo(entry_name(doc, used), date_time=_date_time(doc.get("created_at")))
+                info.external_attr = 0o644 << 16
+                zf.writestr(info, content)
+                incr("archive.files")
+                yield sink.take()
+            if failures:
+                zf.writestr(ERRORS_ENTRY, "id\ttitle\terror\n" + "\n".join(failures) + "\n")
+        yield sink.take()
+    finally:
+        # Client went away (or we're done): stop any downloads still in flight.
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -1,4 +1,6 @@
+import hashlib
 import time
+from collections import OrderedDict
 
 import bcrypt
 import jwt
@@ -33,8 +35,43 @@ def create_access_token(user_id: int, email: str, role: str) -> str:
     return jwt.encode(payload, get_jwt_secret(), algorithm="HS256")
 
 
-def decode_token(token: str) -> dict:
-    return jwt.decode(token, get_jwt_secret(), algorithms=["HS256"])
+def decode_token(token: str, secret: str | None = None) -> dict:
+    return jwt.decode(token, secret or get_jwt_secret(), algorithms=["HS256"])
+
+
+# Verified tokens, keyed by SHA-256 of secret + token: digest -> (exp, user).
+# Bounded LRU so repeat requests skip the HS256 verify; entries are dropped once
+# `exp` passes, and rotating JWT_SECRET misses every old entry. Only touched from
+# the event loop thread (AuthMiddleware).
+_TOKEN_CACHE_SIZE = 1024
+_verified_tokens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+
+def user_from_token(token: str) -> dict | None:
+    secret = get_jwt_secret()
+    digest = hashlib.sha256(f"{secret}\0{token}".encode("utf-8")).digest()
+    entry = _verified_tokens.get(digest)
+    if entry is not None:
+        if entry[0] > time.time():
+            _verified_tokens.move_to_end(digest)
+            return entry[1]
+        del _verified_tokens[digest]
+
+    try:
+        payload = decode_token(token, secret)
+        user = {
+            "id": int(payload.get("sub")),
+            "email": payload.get("email"),
+            "role": payload.get("role"),
+        }
+    except Exception:
+        # Invalid token -> treat as unauthenticated
+        return None
+
+    _verified_tokens[digest] = (float(payload.get("exp") or 0), user)
+    if len(_verified_tokens) > _TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return user
 
 
 def get_bearer_token(request: Request) -> str | None:
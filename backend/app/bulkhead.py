@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, TypeVar
+
+import anyio.to_thread
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .config import get_bulkhead_limits
+from .metrics import incr, set_gauge
+
+
+T = TypeVar("T")
+
+# Separate worker pools per route class, so slow external work (AI summaries,
+# Drive OAuth exchanges) can't take every thread from catalog reads. Drive file
+# transfers themselves are async (drive_async) and don't use threads. Each pool
+# has a worker limit plus a bounded queue; beyond that callers get
+# BulkheadFullError (-> 503) instead of waiting forever.
+#
+#   catalog: document list/detail reads
+#   writes:  document create/update/replace/delete DB work, archive/unarchive
+#   drive:   sync Google OAuth/Drive handlers
+#   ai:      Gemini summary generation
+
+CATALOG = "catalog"
+WRITES = "writes"
+DRIVE = "drive"
+AI = "ai"
+
+
+class BulkheadFullError(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"Server is busy ({name} pool saturated). Try again shortly.")
+        self.name = name
+
+
+class Bulkhead:
+    def __init__(self, name: str, *, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.pending = 0
+        self._limiter: anyio.CapacityLimiter | None = None
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        # Created lazily: anyio needs a running event loop.
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.max_workers)
+        return self._limiter
+
+    def _publish(self) -> None:
+        set_gauge(f"bulkhead.{self.name}.pending", self.pending)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # `pending` is only touched from the event loop thread, so no lock is needed.
+        if self.pending >= self.max_workers + self.max_queue:
+            incr(f"bulkhead.{self.name}.rejected")
+            raise BulkheadFullError(self.name)
+        self.pending += 1
+        self._publish()
+        try:
+            return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=self.limiter)
+        finally:
+            self.pending -= 1
+            self._publish()
+
+
+_bulkheads: dict[str, Bulkhead] = {}
+
+
+def get_bulkhead(name: str) -> Bulkhead:
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        max_workers, max_queue = get_bulkhead_limits(name)
+        bulkhead = Bulkhead(name, max_workers=max_workers, max_queue=max_queue)
+        _bulkheads[name] = bulkhead
+    return bulkhead
+
+
+async def run_in_bulkhead(name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await get_bulkhead(name).run(func, *args, **kwargs)
+
+
+def bulkhead_endpoint(name: str, endpoint: Callable[[Request], Response]) -> Callable[[Request], Any]:
+    # Wraps a sync Starlette endpoint so it runs in the named pool instead of the
+    # shared default threadpool.
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request) -> Response:
+        return await run_in_bulkhead(name, endpoint, request)
+
+    return wrapper
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from .index_refresh import Refresher, micros, poll_since
+from .metrics import incr, set_gauge
+
+
+# Optional in-process catalog (CATALOG_ENGINE=memory). Holds the filterable
+# document metadata as compact columns so list filtering/sorting never touches
+# Postgres; only the final page is hydrated by id.
+#
+#   - rows ordered by (created_at, id) ascending; lists read it backwards
+#   - ids and created_at (epoch microseconds) in typed arrays
+#   - category / status / file_type dictionary-encoded, one bitmap (Python int)
+#     per value, so filters are whole-word AND/OR done in C
+#   - lowercased titles in one packed string buffer (+ offsets) searched with
+#     str.find; titles changed after the last build live in a small overlay
+#
+# The snapshot is refreshed by polling updated_at (with an overlap window), and
+# reloaded when the live row count disagrees with Postgres (deletes) or a row
+# would have to be inserted out of created_at order. Only the background
+# refresher reloads; a request that finds the snapshot stale marks it and lists
+# from SQL until then. Queries the snapshot can't answer exactly (LIKE wildcards
+# in the search text) return None and fall back to SQL too.
+
+_CODED = ("category", "status", "file_type")
+_SEP = "\x00"
+_COMPACT_AFTER = 4096
+_CHUNK_BYTES = 512
+
+
+class CatalogSnapshot:
+    def __init__(self, rows: list[tuple], *, tz: ZoneInfo | None = None):
+        # rows: (id, created_at, updated_at, category, status, file_type, title)
+        self.tz = tz or ZoneInfo("UTC")
+        self.lock = threading.Lock()
+        rows = sorted(rows, key=lambda r: (micros(r[1]), r[0]))
+        n = len(rows)
+
+        self.ids = array("q", (r[0] for r in rows))
+        self.created = array("q", (micros(r[1]) for r in rows))
+        self.pos = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.max_updated = max((micros(r[2]) for r in rows), default=0)
+
+        self.codes: dict[str, dict[str, int]] = {}
+        self.columns: dict[str, array] = {}
+        self.bitmaps: dict[str, dict[int, int]] = {}
+        for c, name in enumerate(_CODED, start=3):
+            codes: dict[str, int] = {}
+            column = array("I", (codes.setdefault(str(r[c]), len(codes)) for r in rows))
+            buffers = [bytearray((n + 7) // 8) for _ in codes]
+            for i, code in enumerate(column):
+                buffers[code][i >> 3] |= 1 << (i & 7)
+            self.codes[name] = codes
+            self.columns[name] = column
+            self.bitmaps[name] = {code: int.from_bytes(buf, "little") for code, buf in enumerate(buffers)}
+
+        self.live = (1 << n) - 1
+        self.live_count = n
+        self._pack_titles([str(r[6] or "").lower() for r in rows])
+
+    # -- titles ---------------------------------------------------------------
+
+    def _pack_titles(self, titles: list[str]) -> None:
+        offsets = array("q")
+        total = 0
+        for title in titles:
+            offsets.append(total)
+            total += len(title) + 1
+        self.title_buf = _SEP.join(titles) + _SEP
+        self.title_offsets = offsets
+        self.title_overlay: dict[int, str] = {}
+
+    def _title(self, i: int) -> str:
+        if i in self.title_overlay:
+            return self.title_overlay[i]
+        start = self.title_offsets[i]
+        return self.title_buf[start : self.title_buf.index(_SEP, start)]
+
+    def _title_mask(self, needle: str) -> int:
+        n = len(self.ids)
+        hits = bytearray((n + 7) // 8)
+        buf, offsets = self.title_buf, self.title_offsets
+        last_row = -1
+        at = buf.find(needle)
+        while at != -1:
+            row = bisect_right(offsets, at) - 1
+            if row != last_row:
+                hits[row >> 3] |= 1 << (row & 7)
+                last_row = row
+            # Continue from the start of the next title.
+            next_start = offsets[row + 1] if row + 1 < len(offsets) else len(buf)
+            at = buf.find(needle, next_start)
+        mask = int.from_bytes(hits, "little")
+        for row, title in self.title_overlay.items():
+            bit = 1 << row
+            mask = (mask | bit) if needle in title else (mask & ~bit)
+        return mask
+
+    def _compact_titles(self) -> None:
+        self._pack_titles([self._title(i) for i in range(len(self.ids))])
+
+    # -- updates --------------------------------------------------------------
+
+    def _code(self, name: str, value: str) -> int:
+        codes = self.codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            codes[value] = code
+            self.bitmaps[name][code] = 0
+        return code
+
+    def apply(self, row: tuple) -> bool:
+        # Upsert one row; False when the snapshot must be rebuilt instead.
+        doc_id, created_at, updated_at = row[0], micros(row[1]), micros(row[2])
+        i = self.pos.get(doc_id)
+        if i is None:
+            if self.created and (created_at, doc_id) < (self.created[-1], self.ids[-1]):
+                return False
+            i = len(self.ids)
+            self.ids.append(doc_id)
+            self.created.append(created_at)
+            self.pos[doc_id] = i
+            for name in _CODED:
+                self.columns[name].append(0)
+            self.title_offsets.append(len(self.title_buf))
+            self.live |= 1 << i
+            self.live_count += 1
+            old_codes = None
+        elif self.created[i] != created_at or not (self.live >> i) & 1:
+            return False
+        else:
+            old_codes = {name: self.columns[name][i] for name in _CODED}
+
+        bit = 1 << i
+        for c, name in enumerate(_CODED, start=3):
+            code = self._code(name, str(row[c]))
+            if old_codes is not None:
+                if old_codes[name] == code:
+                    continue
+                self.bitmaps[name][old_codes[name]] &= ~bit
+            self.columns[name][i] = code
+            self.bitmaps[name][code] |= bit
+
+        self.title_overlay[i] = str(row[6] or "").lower()
+        if len(self.title_overlay) > _COMPACT_AFTER:
+            self._compact_titles()
+        self.max_updated = max(self.max_updated, updated_at)
+        return True
+
+    # -- queries --------------------------------------------------------------
+
+    def _timestamp(self, value: datetime) -> int:
+        # Naive datetimes are interpreted like Postgres does: in the session TimeZone.
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=self.tz)
+        return micros(value)
+
+    def search(
+        self,
+        *,
+        query: str | None,
+        category: str | None,
+        status: str | None,
+        from_dt: datetime | None,
+        to_dt: datetime | None,
+        page: int,
+        page_size: int,
+        tags: tuple[str, ...] | None = None,
+        tags_match: str | None = None,
+    ) -> tuple[list[int], tuple] | None:
+        # None: not answerable here (LIKE wildcards, tag filters); the caller falls back to SQL.
+        if tags or (query and ("%" in query or "_" in query or _SEP in query)):
+            return None
+        with self.lock:
+            mask = self.live
+            for name, value in (("category", category), ("status", status)):
+                if value:
+                    code = self.codes[name].get(value)
+                    mask = mask & self.bitmaps[name][code] if code is not None else 0
+            if from_dt is not None or to_dt is not None:
+                lo = bisect_left(self.created, self._timestamp(from_dt)) if from_dt is not None else 0
+                hi = bisect_right(self.created, self._timestamp(to_dt)) if to_dt is not None else len(self.created)
+                mask &= ((1 << hi) - 1) & ~((1 << lo) - 1) if hi > lo else 0
+            if query and mask:
+                mask &= self._title_mask(query.lower())
+
+            total = mask.bit_count()
+            ids = [self.ids[i] for i in _bits_descending(mask, skip=(page - 1) * page_size, take=page_size)]
+            version = (total, self.max_updated, self.live_count)
+        return ids, version
+
+
+def _bits_descending(mask: int, *, skip: int, take: int) -> list[int]:
+    # Positions of set bits from the highest down (= created_at DESC), paging
+    # through fixed-size chunks so skipped chunks only cost a popcount.
+    out: list[int] = []
+    if not mask or take <= 0:
+        return out
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    end = len(raw)
+    while end > 0 and len(out) < take:
+        start = max(0, end - _CHUNK_BYTES)
+        chunk = int.from_bytes(raw[start:end], "little")
+        end = start
+        count = chunk.bit_count()
+        if skip >= count:
+            skip -= count
+            continue
+        base = start * 8
+        while chunk and len(out) < take:
+            high = chunk.bit_length() - 1
+            chunk ^= 1 << high
+            if skip:
+                skip -= 1
+            else:
+                out.append(base + high)
+    return out
+
+
+_snapshot: CatalogSnapshot | None = None
+_stale = threading.Event()
+
+
+def get_catalog() -> CatalogSnapshot | None:
+    return _snapshot
+
+
+def is_stale() -> bool:
+    return _stale.is_set()
+
+
+def _publish(snapshot: CatalogSnapshot) -> None:
+    set_gauge("catalog.rows", snapshot.live_count)
+
+
+def reload() -> CatalogSnapshot:
+    global _snapshot
+    from .db import get_db_timezone, list_catalog_rows
+
+    try:
+        tz = ZoneInfo(get_db_timezone())
+    except Exception:
+        tz = ZoneInfo("UTC")
+    snapshot = CatalogSnapshot(list_catalog_rows(), tz=tz)
+    _snapshot = snapshot
+    _stale.clear()
+    incr("catalog.reloads")
+    _publish(snapshot)
+    return snapshot
+
+
+def _refresh(*, allow_reload: bool = False) -> None:
+    from .db import count_documents, list_catalog_rows
+
+    snapshot = _snapshot
+    if snapshot is None or _stale.is_set():
+        if allow_reload:
+            reload()
+        return
+
+    changed = list_catalog_rows(updated_since=poll_since(snapshot.max_updated))
+    with snapshot.lock:
+        ok = all(snapshot.apply(row) for row in changed)
+        live_count = snapshot.live_count
+    # A count mismatch means deletes the poll can't see: rebuild rather than diff.
+    if not ok or live_count != count_documents():
+        if allow_reload:
+            reload()
+        else:
+            _stale.set()
+            incr("catalog.stale")
+        return
+    incr("catalog.refreshes")
+    _publish(snapshot)
+
+
+_refresher = Refresher("catalog", _refresh)
+mark_dirty = _refresher.mark_dirty
+refresh = _refresher.refresh
+refresh_if_dirty = _refresher.refresh_if_dirty
+
+
+async def run_refresh_forever(*, interval_seconds: float) -> None:
+    await _refresher.run_forever(interval_seconds=interval_seconds, allow_reload=True)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from .config import get_circuit_failure_threshold, get_circuit_reset_seconds
+from .metrics import incr
+
+
+# Per-dependency circuit breakers (Drive, Gemini). After N consecutive failures
+# (timeouts, connection errors, 5xx) the breaker opens and calls fail fast with
+# CircuitOpenError; after the reset timeout one probe call is let through
+# (half-open) and its outcome closes or re-opens the breaker.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, *, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            # A probe that never reported back (e.g. cancelled) must not wedge the breaker.
+            probe_stale = now - self.probe_started_at >= self.reset_seconds
+            if self.state == HALF_OPEN and (not self.probe_in_flight or probe_stale):
+                self.probe_in_flight = True
+                self.probe_started_at = now
+                return
+            retry_after = max(1.0, self.reset_seconds - (now - self.opened_at))
+        incr(f"circuit.{self.name}.rejected")
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                incr(f"circuit.{self.name}.closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    incr(f"circuit.{self.name}.opened")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=get_circuit_failure_threshold(),
+                reset_seconds=get_circuit_reset_seconds(),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states() -> dict:
+    with _lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
@@ -1,4 +1,6 @@
+import json
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -59,3 +61,339 @@ def get_frontend_base_url() -> str | None:
 
 def get_gemini_api_key() -> str | None:
     return os.getenv("GEMINI_API_KEY")
+
+
+def get_drive_credential_negative_ttl_seconds() -> float:
+    value = os.getenv("DRIVE_CREDENTIAL_NEGATIVE_TTL_SECONDS", "60")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_CREDENTIAL_NEGATIVE_TTL_SECONDS must be a number") from exc
+
+
+def get_drive_http_max_connections() -> int:
+    value = os.getenv("DRIVE_HTTP_MAX_CONNECTIONS", "100")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_HTTP_MAX_CONNECTIONS must be an integer") from exc
+
+
+def get_drive_http_timeout_seconds() -> float:
+    value = os.getenv("DRIVE_HTTP_TIMEOUT_SECONDS", "60")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_HTTP_TIMEOUT_SECONDS must be a number") from exc
+
+
+def get_drive_sync_interval_seconds() -> float:
+    # 0 disables the background Drive changes poller.
+    value = os.getenv("DRIVE_SYNC_INTERVAL_SECONDS", "0")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_SYNC_INTERVAL_SECONDS must be a number") from exc
+
+
+def get_drive_sync_user_id() -> int:
+    # Whose Drive changes feed to follow; -1 = service account.
+    value = os.getenv("DRIVE_SYNC_USER_ID", "-1")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_SYNC_USER_ID must be an integer") from exc
+
+
+def get_storage_backend() -> str:
+    # Where new uploads are stored: "drive" (default) or "local".
+    return os.getenv("STORAGE_BACKEND") or "drive"
+
+
+def get_storage_local_path() -> str:
+    return os.getenv("STORAGE_LOCAL_PATH") or "storage"
+
+
+def get_storage_local_link_ttl_seconds() -> int:
+    # Lifetime of signed links to locally stored files (opened by the browser without a Bearer token).
+    value = os.getenv("STORAGE_LOCAL_LINK_TTL_SECONDS", "300")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("STORAGE_LOCAL_LINK_TTL_SECONDS must be an integer") from exc
+
+
+def get_drive_upload_targets() -> list[dict]:
+    # JSON list of upload targets, e.g.
+    # [{"folder_id": "abc", "user_id": 3, "categories": ["Rregullore"]}, {"folder_id": "def"}]
+    # user_id: connected account to upload with (-1 = service account); omit to use the uploader's own.
+    # Defaults to a single target: DRIVE_FOLDER_ID with the uploader's credential.
+    raw = os.getenv("DRIVE_UPLOAD_TARGETS")
+    if not raw:
+        return [{"folder_id": get_drive_folder_id(), "user_id": None, "categories": []}]
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise RuntimeError(f"Invalid DRIVE_UPLOAD_TARGETS: {exc}") from exc
+    if not isinstance(value, list) or not value:
+        raise RuntimeError("DRIVE_UPLOAD_TARGETS must be a non-empty JSON list")
+
+    targets = []
+    for item in value:
+        if not isinstance(item, dict) or not item.get("folder_id"):
+            raise RuntimeError("Each DRIVE_UPLOAD_TARGETS entry needs a folder_id")
+        user_id = item.get("user_id")
+        targets.append(
+            {
+                "folder_id": str(item["folder_id"]),
+                "user_id": int(user_id) if user_id is not None else None,
+                "categories": [str(c) for c in (item.get("categories") or [])],
+            }
+        )
+    return targets
+
+
+def get_drive_upload_policy() -> str:
+    # round_robin (default), category or least_throttled
+    return (os.getenv("DRIVE_UPLOAD_POLICY") or "round_robin").strip().lower()
+
+
+def get_drive_throttle_cooldown_seconds() -> float:
+    value = os.getenv("DRIVE_THROTTLE_COOLDOWN_SECONDS", "60")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_THROTTLE_COOLDOWN_SECONDS must be a number") from exc
+
+
+def get_drive_quota_rate_per_second() -> float:
+    value = os.getenv("DRIVE_QUOTA_RATE_PER_SECOND", "10")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_QUOTA_RATE_PER_SECOND must be a number") from exc
+
+
+def get_drive_quota_burst() -> float:
+    value = os.getenv("DRIVE_QUOTA_BURST", "20")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_QUOTA_BURST must be a number") from exc
+
+
+def get_drive_max_retries() -> int:
+    value = os.getenv("DRIVE_MAX_RETRIES", "4")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_MAX_RETRIES must be an integer") from exc
+
+
+def get_drive_backoff_base_seconds() -> float:
+    value = os.getenv("DRIVE_BACKOFF_BASE_SECONDS", "0.5")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_BACKOFF_BASE_SECONDS must be a number") from exc
+
+
+def get_drive_backoff_max_seconds() -> float:
+    value = os.getenv("DRIVE_BACKOFF_MAX_SECONDS", "32")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("DRIVE_BACKOFF_MAX_SECONDS must be a number") from exc
+
+
+def get_gemini_timeout_seconds() -> float:
+    value = os.getenv("GEMINI_TIMEOUT_SECONDS", "90")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("GEMINI_TIMEOUT_SECONDS must be a number") from exc
+
+
+def get_circuit_failure_threshold() -> int:
+    value = os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("CIRCUIT_FAILURE_THRESHOLD must be an integer") from exc
+
+
+def get_circuit_reset_seconds() -> float:
+    value = os.getenv("CIRCUIT_RESET_SECONDS", "30")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("CIRCUIT_RESET_SECONDS must be a number") from exc
+
+
+_BULKHEAD_DEFAULTS = {
+    "catalog": (20, 200),
+    "writes": (10, 50),
+    "drive": (5, 20),
+    "ai": (4, 8),
+}
+
+
+def get_bulkhead_limits(name: str) -> tuple[int, int]:
+    # BULKHEAD_<NAME>_WORKERS / BULKHEAD_<NAME>_QUEUE, e.g. BULKHEAD_AI_WORKERS=4
+    default_workers, default_queue = _BULKHEAD_DEFAULTS.get(name, (10, 50))
+    prefix = f"BULKHEAD_{name.upper()}"
+    try:
+        workers = int(os.getenv(f"{prefix}_WORKERS", str(default_workers)))
+        queue = int(os.getenv(f"{prefix}_QUEUE", str(default_queue)))
+    except ValueError as exc:
+        raise RuntimeError(f"{prefix}_WORKERS and {prefix}_QUEUE must be integers") from exc
+    return workers, queue
+
+
+_RATE_LIMIT_DEFAULTS = {
+    "login": {"per_user": {"rate_per_minute": 10, "burst": 10}, "global": {"rate_per_minute": 600, "burst": 100}},
+    "upload": {
+        "per_user": {"rate_per_minute": 30, "burst": 10, "concurrency": 3},
+        "roles": {"admin": {"rate_per_minute": 120, "burst": 30, "concurrency": 6}},
+        "global": {"concurrency": 20},
+    },
+    "replace": {
+        "per_user": {"rate_per_minute": 30, "burst": 10, "concurrency": 3},
+        "roles": {"admin": {"rate_per_minute": 120, "burst": 30, "concurrency": 6}},
+        "global": {"concurrency": 20},
+    },
+    "ai_summary": {
+        "per_user": {"rate_per_minute": 6, "burst": 3, "concurrency": 1},
+        "roles": {"admin": {"rate_per_minute": 20, "burst": 5, "concurrency": 2}},
+        "global": {"rate_per_minute": 60, "burst": 10, "concurrency": 8},
+    },
+    # Slots are held until the whole ZIP has been streamed.
+    "archive": {
+        "per_user": {"rate_per_minute": 6, "burst": 3, "concurrency": 1},
+        "roles": {"admin": {"rate_per_minute": 12, "burst": 4, "concurrency": 2}},
+        "global": {"concurrency": 6},
+    },
+}
+
+
+def get_rate_limit_policies() -> dict:
+    # RATE_LIMITS is a JSON object merged per action over the defaults, e.g.
+    # {"ai_summary": {"per_user": {"rate_per_minute": 3, "burst": 1, "concurrency": 1}}}
+    raw = os.getenv("RATE_LIMITS")
+    policies = {action: dict(policy) for action, policy in _RATE_LIMIT_DEFAULTS.items()}
+    if not raw:
+        return policies
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise RuntimeError("RATE_LIMITS must be a JSON object") from exc
+    if not isinstance(overrides, dict):
+        raise RuntimeError("RATE_LIMITS must be a JSON object")
+    for action, policy in overrides.items():
+        if not isinstance(policy, dict):
+            raise RuntimeError(f"RATE_LIMITS.{action} must be an object")
+        policies.setdefault(action, {}).update(policy)
+    return policies
+
+
+def get_rate_limit_state_path() -> str:
+    # Shared by every worker on the host; put it on local disk (or tmpfs), not NFS.
+    return os.getenv("RATE_LIMIT_STATE_PATH") or os.path.join(tempfile.gettempdir(), "menaxhim-ratelimit.sqlite3")
+
+
+def get_identity_cache_ttl_seconds() -> float:
+    # 0 disables the user / allowed-email cache.
+    value = os.getenv("IDENTITY_CACHE_TTL_SECONDS", "300")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("IDENTITY_CACHE_TTL_SECONDS must be a number") from exc
+
+
+def get_compression_min_size() -> int:
+    # Responses smaller than this many bytes are sent uncompressed; 0 disables compression.
+    value = os.getenv("COMPRESSION_MIN_SIZE", "1024")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("COMPRESSION_MIN_SIZE must be an integer") from exc
+
+
+def get_list_cache_ttl_seconds() -> float:
+    # 0 disables the document list page cache.
+    value = os.getenv("LIST_CACHE_TTL_SECONDS", "10")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("LIST_CACHE_TTL_SECONDS must be a number") from exc
+
+
+def get_list_cache_max_entries() -> int:
+    value = os.getenv("LIST_CACHE_MAX_ENTRIES", "256")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("LIST_CACHE_MAX_ENTRIES must be an integer") from exc
+
+
+def get_catalog_engine() -> str:
+    # "postgres" (default) or "memory" for the in-process catalog (backend/app/catalog.py).
+    engine = (os.getenv("CATALOG_ENGINE") or "postgres").strip().lower()
+    if engine not in {"postgres", "memory"}:
+        raise RuntimeError("CATALOG_ENGINE must be postgres or memory")
+    return engine
+
+
+def get_catalog_refresh_seconds() -> float:
+    value = os.getenv("CATALOG_REFRESH_SECONDS", "2")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("CATALOG_REFRESH_SECONDS must be a number") from exc
+
+
+def get_archive_max_documents() -> int:
+    value = os.getenv("ARCHIVE_MAX_DOCUMENTS", "500")
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("ARCHIVE_MAX_DOCUMENTS must be an integer") from exc
+
+
+def get_archive_download_concurrency() -> int:
+    # Files fetched in parallel per ZIP download (each is held in memory until written).
+    value = os.getenv("ARCHIVE_DOWNLOAD_CONCURRENCY", "4")
+    try:
+        return max(1, int(value))
+    except ValueError as exc:
+        raise RuntimeError("ARCHIVE_DOWNLOAD_CONCURRENCY must be an integer") from exc
+
+
+def get_similarity_refresh_seconds() -> float:
+    # In-process TF-IDF index for /api/documents/{id}/similar; 0 disables it.
+    value = os.getenv("SIMILARITY_REFRESH_SECONDS", "5")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("SIMILARITY_REFRESH_SECONDS must be a number") from exc
+
+
+def get_dedup_threshold() -> float:
+    # Estimated Jaccard similarity (title + description + tags) at which documents count as near-duplicates.
+    value = os.getenv("DEDUP_THRESHOLD", "0.8")
+    try:
+        threshold = float(value)
+    except ValueError as exc:
+        raise RuntimeError("DEDUP_THRESHOLD must be a number") from exc
+    if not 0 < threshold <= 1:
+        raise RuntimeError("DEDUP_THRESHOLD must be between 0 and 1")
+    return threshold
+
+
+def get_suggest_refresh_seconds() -> float:
+    # In-process prefix index for /api/documents/suggest; 0 disables it.
+    value = os.getenv("SUGGEST_REFRESH_SECONDS", "5")
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError("SUGGEST_REFRESH_SECONDS must be a number") from exc
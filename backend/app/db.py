@@ -1,6 +1,14 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Iterable, Iterator
+
 from .config import get_database_url
+from .list_cache import clear as clear_list_cache, invalidate_document
+
+
+# NOTIFY channel for user / allowed-email changes; payload is "user:<email>" or "allowed:<email>".
+IDENTITY_CHANNEL = "identity_changed"
 
 
 def _normalize_database_url(database_url: str) -> str:
@@ -22,6 +30,10 @@ def _connect():
     return psycopg.connect(get_conninfo(), connect_timeout=5)
 
 
+_INIT_LOCK_ID = 7305_2026
+_TAGS_BACKFILL_LOCK_ID = 7305_2027
+
+
 def init_db() -> None:
     ddl = """
     CREATE TABLE IF NOT EXISTS users (
@@ -49,6 +61,12 @@ def init_db() -> None:
         uploaded_by_user_id BIGINT NULL,
         status VARCHAR(20) NOT NULL DEFAULT 'active',
         ai_summary TEXT NULL,
+        drive_md5 TEXT NULL,
+        drive_modified_at TIMESTAMPTZ NULL,
+        drive_state VARCHAR(20) NOT NULL DEFAULT 'ok',
+        storage_backend VARCHAR(20) NOT NULL DEFAULT 'drive',
+        drive_folder_id TEXT NULL,
+        drive_owner_user_id BIGINT NULL,
         created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
         updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
     );
@@ -85,6 +103,12 @@ def init_db() -> None:
         token TEXT NULL,
         created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
     );
+
+    CREATE TABLE IF NOT EXISTS drive_sync_state (
+        user_id BIGINT PRIMARY KEY,
+        page_token TEXT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
     """
 
     # Add migration for existing drive_oauth_states table
@@ -111,13 +135,181 @@ def init_db() -> None:
             END IF;
         END IF;
     END $$;
+
+    -- Drive reconciliation (changes feed): last known checksum/mtime and flag.
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS drive_md5 TEXT NULL;
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS drive_modified_at TIMESTAMPTZ NULL;
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS drive_state VARCHAR(20) NOT NULL DEFAULT 'ok';
+
+    -- Pluggable storage: which engine holds the file referenced by drive_file_id.
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS storage_backend VARCHAR(20) NOT NULL DEFAULT 'drive';
+
+    -- Multi-target uploads: which folder/credential the file was uploaded to.
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS drive_folder_id TEXT NULL;
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS drive_owner_user_id BIGINT NULL;
+    """
+
+    # Facet counts (per status x category / file_type / month), kept current by a
+    # row trigger so GET /api/documents/facets reads O(facets) rows. Backfilled
+    # from academic_documents the first time the table is empty.
+    migration_facets = """
+    CREATE TABLE IF NOT EXISTS document_facet_counts (
+        status VARCHAR(20) NOT NULL,
+        facet VARCHAR(20) NOT NULL,
+        value TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, facet, value)
+    );
+
+    CREATE OR REPLACE FUNCTION document_facets_apply(
+        p_status TEXT, p_category TEXT, p_file_type TEXT, p_created_at TIMESTAMPTZ, p_delta INT
+    ) RETURNS void AS $$
+    BEGIN
+        INSERT INTO document_facet_counts (status, facet, value, count)
+        VALUES (p_status, 'category', p_category, p_delta),
+               (p_status, 'file_type', p_file_type, p_delta),
+               (p_status, 'month', to_char(p_created_at AT TIME ZONE 'UTC', 'YYYY-MM'), p_delta)
+        ON CONFLICT (status, facet, value) DO UPDATE SET count = document_facet_counts.count + EXCLUDED.count;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION document_facets_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM document_facets_apply(OLD.status, OLD.category, OLD.file_type, OLD.created_at, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM document_facets_apply(NEW.status, NEW.category, NEW.file_type, NEW.created_at, 1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    LOCK TABLE academic_documents IN SHARE ROW EXCLUSIVE MODE;
+
+    DROP TRIGGER IF EXISTS trg_document_facets ON academic_documents;
+    CREATE TRIGGER trg_document_facets
+        AFTER INSERT OR DELETE OR UPDATE OF status, category, file_type, created_at ON academic_documents
+        FOR EACH ROW EXECUTE FUNCTION document_facets_trigger();
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM document_facet_counts) THEN
+            INSERT INTO document_facet_counts (status, facet, value, count)
+            SELECT status, 'category', category, COUNT(*) FROM academic_documents GROUP BY status, category
+            UNION ALL
+            SELECT status, 'file_type', file_type, COUNT(*) FROM academic_documents GROUP BY status, file_type
+            UNION ALL
+            SELECT status, 'month', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM'), COUNT(*)
+            FROM academic_documents
+            GROUP BY status, to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM');
+        END IF;
+    END $$;
+    """
+
+    # MinHash signatures + LSH band buckets for near-duplicate detection
+    # (backend/app/dedup.py). source_updated_at is the document's updated_at the
+    # signature was computed from; older means stale.
+    migration_minhash = """
+    CREATE TABLE IF NOT EXISTS document_minhash (
+        doc_id BIGINT PRIMARY KEY REFERENCES academic_documents(id) ON DELETE CASCADE,
+        signature BYTEA NOT NULL,
+        bands BIGINT[] NOT NULL,
+        source_updated_at TIMESTAMPTZ NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_document_minhash_bands ON document_minhash USING GIN (bands);
+    """
+
+    # Normalized tags (backend/app/tags.py): tag_list is derived from the tags
+    # text by a BEFORE trigger, GIN-indexed for tag filters, and counted per
+    # status in document_tag_counts for the tag cloud. Rows that predate the
+    # column start with an empty list and are backfilled in batches (tags.backfill),
+    # which keeps the counts right through the same trigger.
+    migration_tags = r"""
+    ALTER TABLE academic_documents ADD COLUMN IF NOT EXISTS tag_list TEXT[] NOT NULL DEFAULT '{}';
+    CREATE INDEX IF NOT EXISTS idx_academic_documents_tag_list ON academic_documents USING GIN (tag_list);
+
+    CREATE TABLE IF NOT EXISTS document_tag_counts (
+        status VARCHAR(20) NOT NULL,
+        tag TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, tag)
+    );
+
+    -- Must match tags.parse_tags: split on commas, collapse whitespace, trim, lowercase, sorted, unique.
+    -- Whitespace is spelled out (\s follows the server locale) and sorting is by code point, like
+    -- Python; lower() needs a UTF-8 LC_CTYPE to fold Ë/Ç.
+    CREATE OR REPLACE FUNCTION document_tag_array(p_tags TEXT) RETURNS TEXT[] AS $$
+        SELECT COALESCE(array_agg(DISTINCT t ORDER BY t), '{}')
+        FROM (
+            SELECT lower(btrim(regexp_replace(
+                part, '[\t\n\v\f\r \u0085\u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+', ' ', 'g'
+            ))) COLLATE "C" AS t
+            FROM unnest(string_to_array(COALESCE(p_tags, ''), ',')) AS part
+        ) parts
+        WHERE t <> ''
+    $$ LANGUAGE sql IMMUTABLE;
+
+    CREATE OR REPLACE FUNCTION document_tag_list_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.tag_list := document_tag_array(NEW.tags);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION document_tag_counts_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.tag_list = NEW.tag_list THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO document_tag_counts (status, tag, count)
+            SELECT OLD.status, t, -1 FROM unnest(OLD.tag_list) AS t
+            ON CONFLICT (status, tag) DO UPDATE SET count = document_tag_counts.count + EXCLUDED.count;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO document_tag_counts (status, tag, count)
+            SELECT NEW.status, t, 1 FROM unnest(NEW.tag_list) AS t
+            ON CONFLICT (status, tag) DO UPDATE SET count = document_tag_counts.count + EXCLUDED.count;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    LOCK TABLE academic_documents IN SHARE ROW EXCLUSIVE MODE;
+
+    DROP TRIGGER IF EXISTS trg_document_tag_list ON academic_documents;
+    CREATE TRIGGER trg_document_tag_list
+        BEFORE INSERT OR UPDATE OF tags ON academic_documents
+        FOR EACH ROW EXECUTE FUNCTION document_tag_list_trigger();
+
+    -- No column list: tag_list changes made by the BEFORE trigger don't count as
+    -- "UPDATE OF tag_list", so the function compares old and new itself.
+    DROP TRIGGER IF EXISTS trg_document_tag_counts ON academic_documents;
+    CREATE TRIGGER trg_document_tag_counts
+        AFTER INSERT OR DELETE OR UPDATE ON academic_documents
+        FOR EACH ROW EXECUTE FUNCTION document_tag_counts_trigger();
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM document_tag_counts) THEN
+            INSERT INTO document_tag_counts (status, tag, count)
+            SELECT status, t, COUNT(*) FROM academic_documents, unnest(tag_list) AS t GROUP BY status, t;
+        END IF;
+    END $$;
     """
 
     with _connect() as conn:
         with conn.cursor() as cur:
+            # Serialize schema setup across workers starting at the same time.
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_INIT_LOCK_ID,))
             cur.execute(ddl)
             cur.execute(migration)
             cur.execute(migration_documents)
+            cur.execute(migration_facets)
+            cur.execute(migration_minhash)
+            cur.execute(migration_tags)
         conn.commit()
 
 
@@ -139,11 +331,16 @@ def fetchone(sql: str, params: tuple[object, ...] = ()) -> tuple[object, ...] |
             return row
 
 
-def execute_returning(sql: str, params: tuple[object, ...] = ()) -> tuple[object, ...] | None:
+def execute_returning(
+    sql: str, params: tuple[object, ...] = (), *, notify: str | None = None
+) -> tuple[object, ...] | None:
     with _connect() as conn:
         with conn.cursor() as cur:
             cur.execute(sql, params)
             row = cur.fetchone()
+            if notify is not None and row:
+                # Delivered to listeners on commit (identity cache invalidation).
+                cur.execute("SELECT pg_notify(%s, %s)", (IDENTITY_CHANNEL, notify))
         conn.commit()
         return row
 
@@ -179,6 +376,7 @@ def create_user(email: str, password_hash: str, role: str) -> dict:
     row = execute_returning(
         "INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s) RETURNING id, username, role, created_at",
         (email, password_hash, role),
+        notify=f"user:{email}",
     )
     if not row:
         raise RuntimeError("Failed to create user")
@@ -200,6 +398,7 @@ def update_user_credentials_by_email(*, email: str, password_hash: str, role: st
         RETURNING id, username, role, created_at
         """,
         (password_hash, role, email),
+        notify=f"user:{email}",
     )
     if not row:
         return None
@@ -230,6 +429,7 @@ def add_allowed_email(email: str) -> dict:
     row = execute_returning(
         "INSERT INTO allowed_emails (email) VALUES (%s) ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email RETURNING email, created_at",
         (email,),
+        notify=f"allowed:{email}",
     )
     if not row:
         raise RuntimeError("Failed to add allowed email")
@@ -237,7 +437,9 @@ def add_allowed_email(email: str) -> dict:
 
 
 def remove_allowed_email(email: str) -> bool:
-    row = execute_returning("DELETE FROM allowed_emails WHERE email = %s RETURNING email", (email,))
+    row = execute_returning(
+        "DELETE FROM allowed_emails WHERE email = %s RETURNING email", (email,), notify=f"allowed:{email}"
+    )
     return bool(row)
 
 
@@ -246,34 +448,99 @@ def is_email_allowed(email: str) -> bool:
     return bool(row)
 
 
+def get_login_identity(email: str) -> dict:
+    # User row (if any) and whitelist membership in one round trip.
+    row = fetchone(
+        """
+        SELECT u.id, u.username, u.password_hash, u.role, u.created_at,
+               EXISTS (SELECT 1 FROM allowed_emails a WHERE a.email = %s)
+        FROM (SELECT 1) AS one
+        LEFT JOIN users u ON u.username = %s
+        """,
+        (email, email),
+    )
+    user = None
+    if row and row[0] is not None:
+        user = {
+            "id": row[0],
+            "email": row[1],
+            "password_hash": row[2],
+            "role": row[3],
+            "created_at": _isoformat_if_possible(row[4]),
+        }
+    return {"user": user, "allowed": bool(row[5]) if row else False}
+
+
+# Public document fields -> SQL expression, in response order.
+_DOCUMENT_COLUMNS = {
+    "id": "d.id",
+    "title": "d.title",
+    "description": "d.description",
+    "category": "d.category",
+    "tags": "d.tags",
+    "file_type": "d.file_type",
+    "drive_file_id": "d.drive_file_id",
+    "web_view_link": "d.web_view_link",
+    "uploaded_by_email": "u.username",
+    "status": "d.status",
+    "ai_summary": "d.ai_summary",
+    "created_at": "d.created_at",
+    "updated_at": "d.updated_at",
+    "drive_state": "d.drive_state",
+    "storage_backend": "d.storage_backend",
+    "drive_folder_id": "d.drive_folder_id",
+    "drive_owner_user_id": "d.drive_owner_user_id",
+}
+
+DOCUMENT_FIELDS = tuple(_DOCUMENT_COLUMNS)
+# Default list shape: everything except the large free-text columns.
+LIST_DEFAULT_FIELDS = tuple(f for f in DOCUMENT_FIELDS if f not in {"description", "ai_summary"})
+
+
+def _document_select(fields: tuple[str, ...]) -> str:
+    columns = ", ".join(_DOCUMENT_COLUMNS[f] for f in fields)
+    sql = f"SELECT {columns} FROM academic_documents d"
+    if "uploaded_by_email" in fields:
+        sql += " LEFT JOIN users u ON u.id = d.uploaded_by_user_id"
+    return sql
+
+
+def _row_to_fields(row: tuple[object, ...], fields: tuple[str, ...]) -> dict:
+    # Datetimes stay native; the JSON response class encodes them.
+    return dict(zip(fields, row))
+
+
+_DOCUMENT_SELECT = _document_select(DOCUMENT_FIELDS) + "\n"
+
+
 def _row_to_document(row: tuple[object, ...]) -> dict:
-    return {
-        "id": row[0],
-        "title": row[1],
-        "description": row[2],
-        "category": row[3],
-        "tags": row[4],
-        "file_type": row[5],
-        "drive_file_id": row[6],
-        "web_view_link": row[7],
-        "uploaded_by_email": row[8],
-        "status": row[9],
-        "ai_summary": row[10],
-        "created_at": row[11].isoformat() if hasattr(row[11], "isoformat") else row[11],
-        "updated_at": row[12].isoformat() if hasattr(row[12], "isoformat") else row[12],
-    }
+    return _row_to_fields(row, DOCUMENT_FIELDS)
+
+
+def _mark_indexes_dirty() -> None:
+    # In-process indexes refresh from Postgres before their next query.
+    from .catalog import mark_dirty as mark_catalog_dirty
+    from .similarity import mark_dirty as mark_similarity_dirty
+    from .suggest import mark_dirty as mark_suggest_dirty
+
+    mark_catalog_dirty()
+    mark_similarity_dirty()
+    mark_suggest_dirty()
+
+
+def _document_written(doc_id: int, images: list[dict] | tuple[dict, ...] = ()) -> None:
+    invalidate_document(doc_id, images)
+    _mark_indexes_dirty()
+
+
+def _membership_image(row: tuple[object, ...]) -> dict:
+    # The columns list filters look at, as returned by the "old" side of an UPDATE/DELETE.
+    return {"title": row[0], "category": row[1], "status": row[2], "created_at": row[3]}
 
 
 def get_document_by_id(doc_id: int) -> dict | None:
     row = fetchone(
-        """
-        SELECT d.id, d.title, d.description, d.category, d.tags, d.file_type, d.drive_file_id, d.web_view_link,
-               u.username AS uploaded_by_email,
-               d.status, d.ai_summary, d.created_at, d.updated_at
-        FROM academic_documents d
-        LEFT JOIN users u ON u.id = d.uploaded_by_user_id
-        WHERE d.id = %s
-        """,
+        _DOCUMENT_SELECT + " WHERE d.id = %s",
         (doc_id,),
     )
     if not row:
@@ -281,15 +548,191 @@ def get_document_by_id(doc_id: int) -> dict | None:
     return _row_to_document(row)
 
 
+def get_document_facets(status: str | None) -> dict:
+    sql = "SELECT status, facet, value, count FROM document_facet_counts WHERE count > 0"
+    params: tuple[object, ...] = ()
+    if status:
+        sql += " AND status = %s"
+        params = (status,)
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall() or []
+
+    counts: dict[str, dict[str, int]] = {"category": {}, "status": {}, "file_type": {}, "month": {}}
+    for row_status, facet, value, count in rows:
+        bucket = counts.setdefault(facet, {})
+        bucket[value] = bucket.get(value, 0) + int(count)
+        # Every document has exactly one category row, so those double as status/total counts.
+        if facet == "category":
+            counts["status"][row_status] = counts["status"].get(row_status, 0) + int(count)
+
+    def items(facet: str) -> list[dict]:
+        pairs = counts.get(facet, {}).items()
+        if facet == "month":
+            ordered = sorted(pairs, key=lambda p: p[0], reverse=True)
+        else:
+            ordered = sorted(pairs, key=lambda p: (-p[1], p[0]))
+        return [{"value": value, "count": count} for value, count in ordered]
+
+    return {
+        "total": sum(counts["status"].values()),
+        "facets": {facet: items(facet) for facet in ("category", "status", "file_type", "month")},
+    }
+
+
+def get_tag_counts(*, status: str | None, prefix: str | None, limit: int) -> list[dict]:
+    # Tag cloud from document_tag_counts (trigger-maintained), most used first.
+    where = ["count > 0"]
+    params: list[object] = []
+    if status:
+        where.append("status = %s")
+        params.append(status)
+    if prefix:
+        where.append("tag LIKE %s")
+        params.append(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    params.append(limit)
+    sql = (
+        "SELECT tag, SUM(count) FROM document_tag_counts WHERE "
+        + " AND ".join(where)
+        + " GROUP BY tag HAVING SUM(count) > 0 ORDER BY SUM(count) DESC, tag LIMIT %s"
+    )
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, tuple(params))
+            rows = cur.fetchall() or []
+    return [{"tag": tag, "count": int(count)} for tag, count in rows]
+
+
+def backfill_document_tags_batch(*, after_id: int, limit: int) -> list[int] | None:
+    # Fills tag_list for the next `limit` rows (by id) whose list doesn't match
+    # what their tags text parses to (rows from before the column, or parsed by an
+    # older document_tag_array); returns their ids, or None while another worker
+    # runs a batch. A finished backfill finds no rows.
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (_TAGS_BACKFILL_LOCK_ID,))
+            row = cur.fetchone()
+            if not row or not row[0]:
+                return None
+            cur.execute(
+                """
+                SELECT id FROM academic_documents
+                WHERE id > %s AND tags IS NOT NULL AND tags <> '' AND tag_list <> document_tag_array(tags)
+                ORDER BY id
+                LIMIT %s
+                """,
+                (after_id, limit),
+            )
+            ids = [int(r[0]) for r in cur.fetchall() or []]
+            if ids:
+                # updated_at stays: the document didn't change, only its derived column.
+                cur.execute(
+                    "UPDATE academic_documents SET tag_list = document_tag_array(tags) WHERE id = ANY(%s)", (ids,)
+                )
+        conn.commit()
+    if ids:
+        # Tag filters now match these rows: cached pages and indexes are stale.
+        clear_list_cache()
+        _mark_indexes_dirty()
+    return ids
+
+
+def list_catalog_rows(updated_since: datetime | None = None) -> list[tuple]:
+    # Filterable metadata for the in-process catalog (backend/app/catalog.py).
+    sql = "SELECT id, created_at, updated_at, category, status, file_type, title FROM academic_documents"
+    params: tuple[object, ...] = ()
+    if updated_since is not None:
+        sql += " WHERE updated_at > %s"
+        params = (updated_since,)
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall() or []
+
+
+def list_similarity_rows(updated_since: datetime | None = None) -> list[tuple]:
+    # Text the similarity index is built from (backend/app/similarity.py).
+    sql = "SELECT id, updated_at, status, title, description, tags, ai_summary FROM academic_documents"
+    params: tuple[object, ...] = ()
+    if updated_since is not None:
+        sql += " WHERE updated_at > %s"
+        params = (updated_since,)
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall() or []
+
+
+def list_suggest_rows(updated_since: datetime | None = None) -> list[tuple]:
+    # Titles and tags for the autocomplete index (backend/app/suggest.py).
+    sql = "SELECT id, updated_at, created_at, status, title, tags FROM academic_documents"
+    params: tuple[object, ...] = ()
+    if updated_since is not None:
+        sql += " WHERE updated_at > %s"
+        params = (updated_since,)
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall() or []
+
+
+def list_document_ids() -> list[int]:
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM academic_documents")
+            return [int(r[0]) for r in cur.fetchall() or []]
+
+
+def count_documents() -> int:
+    return int(scalar("SELECT COUNT(*) FROM academic_documents") or 0)
+
+
+def get_db_timezone() -> str:
+    return str(scalar("SELECT current_setting('TimeZone')") or "UTC")
+
+
+def get_documents_by_ids(ids: list[int], fields: tuple[str, ...] = LIST_DEFAULT_FIELDS) -> list[dict]:
+    # Rows in the order of `ids` (missing ids are skipped).
+    if not ids:
+        return []
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_document_select(fields) + " WHERE d.id = ANY(%s)", (list(ids),))
+            rows = cur.fetchall() or []
+    by_id = {row[fields.index("id")]: _row_to_fields(row, fields) for row in rows}
+    return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+
+def get_document_version(doc_id: int) -> datetime | None:
+    # Same updated_at value get_document_by_id returns, without fetching the row.
+    row = fetchone("SELECT updated_at FROM academic_documents WHERE id = %s", (doc_id,))
+    if not row:
+        return None
+    return row[0]
+
+
+def get_document_by_drive_file_id(drive_file_id: str) -> dict | None:
+    row = fetchone(
+        _DOCUMENT_SELECT + " WHERE d.drive_file_id = %s",
+        (drive_file_id,),
+    )
+    if not row:
+        return None
+    return _row_to_document(row)
+
+
 def update_document_file_by_id(
     *,
     doc_id: int,
     file_type: str,
     web_view_link: str,
     title: str | None = None,
+    drive_md5: str | None = None,
+    drive_modified_at: datetime | None = None,
 ) -> dict | None:
-    sets = ["file_type = %s", "web_view_link = %s"]
-    params: list[object] = [file_type, web_view_link]
+    sets = ["file_type = %s", "web_view_link = %s", "drive_md5 = %s", "drive_modified_at = %s", "drive_state = 'ok'"]
+    params: list[object] = [file_type, web_view_link, drive_md5, drive_modified_at]
     if title is not None:
         sets.append("title = %s")
         params.append(title)
@@ -298,71 +741,345 @@ def update_document_file_by_id(
     row = execute_returning(
         (
             """
-        UPDATE academic_documents
+        UPDATE academic_documents d
         SET {sets}, updated_at = NOW()
-        WHERE id = %s
-        RETURNING id
+        FROM academic_documents old
+        WHERE d.id = %s AND old.id = d.id
+        RETURNING old.title, old.category, old.status, old.created_at
         """.format(sets=", ".join(sets))
         ),
         tuple(params),
     )
     if not row:
         return None
-    return get_document_by_id(doc_id)
+    doc = get_document_by_id(doc_id)
+    _document_written(doc_id, [_membership_image(row)] + ([doc] if doc else []))
+    return doc
 
 
-def list_documents_rows(
+def _document_filters_sql(
     *,
     query: str | None,
     category: str | None,
     status: str | None,
     from_dt,
     to_dt,
-    page: int,
-    page_size: int,
-) -> list[dict]:
-    import psycopg
-
+    tags: tuple[str, ...] | None = None,
+    tags_match: str | None = None,
+) -> tuple[str, list[object]]:
     where = []
     params: list[object] = []
 
     if query:
-        where.append("title ILIKE %s")
+        where.append("d.title ILIKE %s")
         params.append(f"%{query}%")
     if category:
-        where.append("category = %s")
+        where.append("d.category = %s")
         params.append(category)
     if status:
-        where.append("status = %s")
+        where.append("d.status = %s")
         params.append(status)
     if from_dt is not None:
-        where.append("created_at >= %s")
+        where.append("d.created_at >= %s")
         params.append(from_dt)
     if to_dt is not None:
-        where.append("created_at <= %s")
+        where.append("d.created_at <= %s")
         params.append(to_dt)
+    if tags:
+        # Normalized (tags.parse_tags); both operators use the GIN index on tag_list.
+        where.append("d.tag_list && %s::text[]" if tags_match == "any" else "d.tag_list @> %s::text[]")
+        params.append(list(tags))
 
     where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+    return where_sql, params
+
+
+def list_documents_rows(
+    *,
+    query: str | None,
+    category: str | None,
+    status: str | None,
+    from_dt,
+    to_dt,
+    page: int,
+    page_size: int,
+    fields: tuple[str, ...] = LIST_DEFAULT_FIELDS,
+    tags: tuple[str, ...] | None = None,
+    tags_match: str | None = None,
+) -> list[dict]:
+    where_sql, params = _document_filters_sql(
+        query=query, category=category, status=status, from_dt=from_dt, to_dt=to_dt, tags=tags, tags_match=tags_match
+    )
     offset = (page - 1) * page_size
 
+    sql = _document_select(fields) + where_sql + " ORDER BY d.created_at DESC, d.id DESC LIMIT %s OFFSET %s"
+    params.extend([page_size, offset])
+
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, tuple(params))
+            rows = cur.fetchall() or []
+    return [_row_to_fields(r, fields) for r in rows]
+
+
+def iter_documents_export(
+    *,
+    query: str | None,
+    category: str | None,
+    status: str | None,
+    from_dt,
+    to_dt,
+    fields: tuple[str, ...] = DOCUMENT_FIELDS,
+    batch_size: int = 1000,
+    tags: tuple[str, ...] | None = None,
+    tags_match: str | None = None,
+) -> Iterator[list[dict]]:
+    # Server-side (named) cursor: Postgres hands rows over batch_size at a time,
+    # so memory stays flat however large the catalog is. Yields one batch per step.
+    where_sql, params = _document_filters_sql(
+        query=query, category=category, status=status, from_dt=from_dt, to_dt=to_dt, tags=tags, tags_match=tags_match
+    )
+    sql = _document_select(fields) + where_sql + " ORDER BY d.created_at DESC, d.id DESC"
+
+    with _connect() as conn:
+        with conn.cursor(name="documents_export") as cur:
+            cur.itersize = batch_size
+            cur.execute(sql, tuple(params))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [_row_to_fields(r, fields) for r in rows]
+
+
+def list_archive_documents(
+    *,
+    ids: list[int] | None = None,
+    query: str | None = None,
+    category: str | None = None,
+    status: str | None = None,
+    from_dt=None,
+    to_dt=None,
+    tags: tuple[str, ...] | None = None,
+    tags_match: str | None = None,
+    limit: int,
+) -> list[dict]:
+    # What the ZIP download needs per file (storage key + credential chain);
+    # either the given ids or the filtered set, at most `limit` rows.
+    if ids is not None:
+        where_sql, params = " WHERE d.id = ANY(%s)", [list(ids)]
+    else:
+        where_sql, params = _document_filters_sql(
+            query=query,
+            category=category,
+            status=status,
+            from_dt=from_dt,
+            to_dt=to_dt,
+            tags=tags,
+            tags_match=tags_match,
+        )
     sql = (
-        """
-        SELECT d.id, d.title, d.description, d.category, d.tags, d.file_type, d.drive_file_id, d.web_view_link,
-               u.username AS uploaded_by_email,
-               d.status, d.ai_summary, d.created_at, d.updated_at
-        FROM academic_documents d
-        LEFT JOIN users u ON u.id = d.uploaded_by_user_id
-        """
-        + where_sql.replace("created_at", "d.created_at")
-        + " ORDER BY d.created_at DESC LIMIT %s OFFSET %s"
+        "SELECT d.id, d.title, d.category, d.file_type, d.drive_file_id, d.storage_backend, "
+        "d.uploaded_by_user_id, d.drive_owner_user_id, d.created_at FROM academic_documents d"
+        + where_sql
+        + " ORDER BY d.category, d.title, d.id LIMIT %s"
     )
-    params.extend([page_size, offset])
+    params.append(limit)
 
     with _connect() as conn:
         with conn.cursor() as cur:
             cur.execute(sql, tuple(params))
             rows = cur.fetchall() or []
-    return [_row_to_document(r) for r in rows]
+    keys = (
+        "id",
+        "title",
+        "category",
+        "file_type",
+        "drive_file_id",
+        "storage_backend",
+        "uploaded_by_user_id",
+        "drive_owner_user_id",
+        "created_at",
+    )
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def save_document_minhash(rows: list[tuple[int, bytes, list[int], object]]) -> None:
+    # rows: (doc_id, signature, band buckets, document updated_at)
+    if not rows:
+        return
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO document_minhash (doc_id, signature, bands, source_updated_at)
+                SELECT %s, %s, %s, COALESCE(%s::timestamptz, NOW())
+                WHERE EXISTS (SELECT 1 FROM academic_documents WHERE id = %s)
+                ON CONFLICT (doc_id) DO UPDATE
+                SET signature = EXCLUDED.signature,
+                    bands = EXCLUDED.bands,
+                    source_updated_at = EXCLUDED.source_updated_at
+                """,
+                [(doc_id, signature, bands, updated_at, doc_id) for doc_id, signature, bands, updated_at in rows],
+            )
+        conn.commit()
+
+
+def find_minhash_candidates(bands: list[int], *, exclude_id: int, limit: int = 500) -> list[tuple[int, bytes]]:
+    # Documents sharing at least one LSH bucket (GIN index lookup).
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT doc_id, signature FROM document_minhash
+                WHERE bands && %s::bigint[] AND doc_id <> %s
+                LIMIT %s
+                """,
+                (bands, exclude_id, limit),
+            )
+            return [(int(r[0]), bytes(r[1])) for r in cur.fetchall() or []]
+
+
+def list_minhash_stale(*, limit: int) -> list[tuple]:
+    # Documents without a signature, or edited since theirs was computed.
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT d.id, d.updated_at, d.title, d.description, d.tags
+                FROM academic_documents d
+                LEFT JOIN document_minhash m ON m.doc_id = d.id
+                WHERE m.doc_id IS NULL OR m.source_updated_at < d.updated_at
+                ORDER BY d.id
+                LIMIT %s
+                """,
+                (limit,),
+            )
+            return cur.fetchall() or []
+
+
+def iter_document_minhash(batch_size: int = 5000) -> Iterator[list[tuple[int, bytes, list[int]]]]:
+    with _connect() as conn:
+        with conn.cursor(name="document_minhash_scan") as cur:
+            cur.itersize = batch_size
+            cur.execute("SELECT doc_id, signature, bands FROM document_minhash")
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [(int(r[0]), bytes(r[1]), list(r[2])) for r in rows]
+
+
+# Bulk metadata import (backend/app/document_import.py): rows are COPYed into a
+# temp staging table, duplicates / existing drive_file_ids / unknown uploaders
+# are reported, and the rest is merged with one INSERT ... SELECT.
+IMPORT_STAGING_COLUMNS = (
+    "line_no",
+    "title",
+    "description",
+    "category",
+    "tags",
+    "file_type",
+    "drive_file_id",
+    "web_view_link",
+    "status",
+    "uploaded_by_email",
+    "created_at",
+)
+
+_IMPORT_STAGING_DDL = """
+CREATE TEMP TABLE import_documents_staging (
+    line_no BIGINT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NULL,
+    category TEXT NOT NULL,
+    tags TEXT NULL,
+    file_type TEXT NOT NULL,
+    drive_file_id TEXT NOT NULL,
+    web_view_link TEXT NOT NULL,
+    status TEXT NOT NULL,
+    uploaded_by_email TEXT NULL,
+    created_at TIMESTAMPTZ NULL
+) ON COMMIT DROP
+"""
+
+_IMPORT_REJECTS_SQL = """
+WITH ranked AS (
+    SELECT s.*, ROW_NUMBER() OVER (PARTITION BY s.drive_file_id ORDER BY s.line_no) AS rn
+    FROM import_documents_staging s
+)
+SELECT r.line_no, r.drive_file_id,
+       CASE
+           WHEN r.rn > 1 THEN 'duplicate drive_file_id in file'
+           WHEN d.id IS NOT NULL THEN 'drive_file_id already exists'
+           ELSE 'unknown uploaded_by_email'
+       END
+FROM ranked r
+LEFT JOIN academic_documents d ON d.drive_file_id = r.drive_file_id
+LEFT JOIN users u ON u.username = r.uploaded_by_email
+WHERE r.rn > 1 OR d.id IS NOT NULL OR (r.uploaded_by_email IS NOT NULL AND u.id IS NULL)
+ORDER BY r.line_no
+"""
+
+_IMPORT_MERGE_SQL = """
+INSERT INTO academic_documents
+  (title, description, category, tags, file_type, drive_file_id, web_view_link, uploaded_by_user_id, status,
+   storage_backend, created_at, updated_at)
+SELECT s.title, s.description, s.category, s.tags, s.file_type, s.drive_file_id, s.web_view_link, u.id, s.status,
+       'drive', COALESCE(s.created_at, NOW()), NOW()
+FROM import_documents_staging s
+LEFT JOIN users u ON u.username = s.uploaded_by_email
+ON CONFLICT (drive_file_id) DO NOTHING
+"""
+
+
+def import_document_rows(rows: Iterable[tuple]) -> tuple[int, list[tuple[int, str, str]]]:
+    # Returns (inserted count, [(line_no, drive_file_id, reason), ...]); one transaction.
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_IMPORT_STAGING_DDL)
+            with cur.copy(f"COPY import_documents_staging ({', '.join(IMPORT_STAGING_COLUMNS)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+            cur.execute(_IMPORT_REJECTS_SQL)
+            rejects = [(int(r[0]), str(r[1]), str(r[2])) for r in cur.fetchall() or []]
+            if rejects:
+                cur.execute(
+                    "DELETE FROM import_documents_staging WHERE line_no = ANY(%s)", ([r[0] for r in rejects],)
+                )
+            cur.execute(_IMPORT_MERGE_SQL)
+            imported = max(cur.rowcount, 0)
+        conn.commit()
+
+    # Imported rows can land anywhere in created_at order.
+    clear_list_cache()
+    _mark_indexes_dirty()
+    return imported, rejects
+
+
+def get_documents_list_version(
+    *,
+    query: str | None,
+    category: str | None,
+    status: str | None,
+    from_dt,
+    to_dt,
+    tags: tuple[str, ...] | None = None,
+    tags_match: str | None = None,
+) -> tuple[object, ...]:
+    # Cheap change marker for a filtered list (used for ETags): row count, newest
+    # updated_at and highest id. Any insert, update or delete in the set moves one of them.
+    where_sql, params = _document_filters_sql(
+        query=query, category=category, status=status, from_dt=from_dt, to_dt=to_dt, tags=tags, tags_match=tags_match
+    )
+    row = fetchone(
+        "SELECT COUNT(*), MAX(d.updated_at), MAX(d.id) FROM academic_documents d" + where_sql,
+        tuple(params),
+    )
+    if not row:
+        return (0, None, None)
+    return (row[0], _isoformat_if_possible(row[1]), row[2])
 
 
 def create_document_row(
@@ -375,20 +1092,42 @@ def create_document_row(
     drive_file_id: str,
     web_view_link: str,
     uploaded_by_user_id: int | None,
+    drive_md5: str | None = None,
+    drive_modified_at: datetime | None = None,
+    storage_backend: str = "drive",
+    drive_folder_id: str | None = None,
+    drive_owner_user_id: int | None = None,
 ) -> dict:
     row = execute_returning(
         """
         INSERT INTO academic_documents
-          (title, description, category, tags, file_type, drive_file_id, web_view_link, uploaded_by_user_id, status, updated_at)
+          (title, description, category, tags, file_type, drive_file_id, web_view_link, uploaded_by_user_id, status,
+           drive_md5, drive_modified_at, storage_backend, drive_folder_id, drive_owner_user_id, updated_at)
         VALUES
-          (%s, %s, %s, %s, %s, %s, %s, %s, 'active', NOW())
+          (%s, %s, %s, %s, %s, %s, %s, %s, 'active', %s, %s, %s, %s, %s, NOW())
         RETURNING id
         """,
-        (title, description, category, tags, file_type, drive_file_id, web_view_link, uploaded_by_user_id),
+        (
+            title,
+            description,
+            category,
+            tags,
+            file_type,
+            drive_file_id,
+            web_view_link,
+            uploaded_by_user_id,
+            drive_md5,
+            drive_modified_at,
+            storage_backend,
+            drive_folder_id,
+            drive_owner_user_id,
+        ),
     )
     if not row:
         raise RuntimeError("Failed to create document")
-    return get_document_by_id(int(row[0]))
+    doc = get_document_by_id(int(row[0]))
+    _document_written(int(row[0]), [doc] if doc else [{}])
+    return doc
 
 
 def update_document_by_id(
@@ -421,50 +1160,63 @@ def update_document_by_id(
     params.append(doc_id)
     row = execute_returning(
         """
-        UPDATE academic_documents
+        UPDATE academic_documents d
         SET {sets}, updated_at = NOW()
-        WHERE id = %s
-        RETURNING id
+        FROM academic_documents old
+        WHERE d.id = %s AND old.id = d.id
+        RETURNING old.title, old.category, old.status, old.created_at
         """.format(sets=", ".join(sets)),
         tuple(params),
     )
     if not row:
         return None
-    return get_document_by_id(doc_id)
+    doc = get_document_by_id(doc_id)
+    _document_written(doc_id, [_membership_image(row)] + ([doc] if doc else []))
+    return doc
 
 
 def archive_document_by_id(doc_id: int) -> dict | None:
     row = execute_returning(
         """
-        UPDATE academic_documents
+        UPDATE academic_documents d
         SET status = 'archived', updated_at = NOW()
-        WHERE id = %s
-        RETURNING id
+        FROM academic_documents old
+        WHERE d.id = %s AND old.id = d.id
+        RETURNING old.title, old.category, old.status, old.created_at
         """,
         (doc_id,),
     )
     if not row:
         return None
-    return get_document_by_id(doc_id)
+    doc = get_document_by_id(doc_id)
+    _document_written(doc_id, [_membership_image(row)] + ([doc] if doc else []))
+    return doc
 
 
 def unarchive_document_by_id(doc_id: int) -> dict | None:
     row = execute_returning(
         """
-        UPDATE academic_documents
+        UPDATE academic_documents d
         SET status = 'active', updated_at = NOW()
-        WHERE id = %s
-        RETURNING id
+        FROM academic_documents old
+        WHERE d.id = %s AND old.id = d.id
+        RETURNING old.title, old.category, old.status, old.created_at
         """,
         (doc_id,),
     )
     if not row:
         return None
-    return get_document_by_id(doc_id)
+    doc = get_document_by_id(doc_id)
+    _document_written(doc_id, [_membership_image(row)] + ([doc] if doc else []))
+    return doc
 
 
 def delete_document_by_id(doc_id: int) -> bool:
-    row = execute_returning("DELETE FROM academic_documents WHERE id = %s RETURNING id", (doc_id,))
+    row = execute_returning(
+        "DELETE FROM academic_documents WHERE id = %s RETURNING title, category, status, created_at", (doc_id,)
+    )
+    if row:
+        _document_written(doc_id, [_membership_image(row)])
     return bool(row)
 
 
@@ -488,9 +1240,140 @@ def set_document_ai_summary(*, doc_id: int, ai_summary: str) -> dict | None:
     )
     if not row:
         return None
+    _document_written(doc_id)
     return get_document_by_id(doc_id)
 
 
+def get_documents_drive_info(drive_file_ids: list[str]) -> dict[str, dict]:
+    if not drive_file_ids:
+        return {}
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, drive_file_id, drive_md5, drive_modified_at, drive_state
+                FROM academic_documents
+                WHERE drive_file_id = ANY(%s)
+                """,
+                (list(drive_file_ids),),
+            )
+            rows = cur.fetchall() or []
+    return {
+        str(r[1]): {"id": r[0], "drive_md5": r[2], "drive_modified_at": r[3], "drive_state": r[4]}
+        for r in rows
+    }
+
+
+def set_document_drive_state(
+    *,
+    doc_id: int,
+    drive_state: str,
+    drive_md5: str | None,
+    drive_modified_at: datetime | None,
+    web_view_link: str | None = None,
+) -> None:
+    execute(
+        """
+        UPDATE academic_documents
+        SET drive_state = %s,
+            drive_md5 = COALESCE(%s, drive_md5),
+            drive_modified_at = COALESCE(%s, drive_modified_at),
+            web_view_link = COALESCE(%s, web_view_link),
+            updated_at = NOW()
+        WHERE id = %s
+        """,
+        (drive_state, drive_md5, drive_modified_at, web_view_link, doc_id),
+    )
+    _document_written(doc_id)
+
+
+def list_documents_for_storage(storage_backend: str) -> list[dict]:
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, title, file_type, drive_file_id, uploaded_by_user_id, drive_owner_user_id
+                FROM academic_documents
+                WHERE storage_backend = %s
+                ORDER BY id
+                """,
+                (storage_backend,),
+            )
+            rows = cur.fetchall() or []
+    return [
+        {
+            "id": r[0],
+            "title": r[1],
+            "file_type": r[2],
+            "drive_file_id": r[3],
+            "uploaded_by_user_id": r[4],
+            "drive_owner_user_id": r[5],
+        }
+        for r in rows
+    ]
+
+
+def set_document_storage(
+    *,
+    doc_id: int,
+    storage_backend: str,
+    drive_file_id: str,
+    web_view_link: str,
+    drive_md5: str | None,
+    drive_modified_at: datetime | None,
+    drive_folder_id: str | None = None,
+    drive_owner_user_id: int | None = None,
+) -> bool:
+    row = execute_returning(
+        """
+        UPDATE academic_documents
+        SET storage_backend = %s,
+            drive_file_id = %s,
+            web_view_link = %s,
+            drive_md5 = %s,
+            drive_modified_at = %s,
+            drive_folder_id = %s,
+            drive_owner_user_id = %s,
+            drive_state = 'ok',
+            updated_at = NOW()
+        WHERE id = %s
+        RETURNING id
+        """,
+        (
+            storage_backend,
+            drive_file_id,
+            web_view_link,
+            drive_md5,
+            drive_modified_at,
+            drive_folder_id,
+            drive_owner_user_id,
+            doc_id,
+        ),
+    )
+    if row:
+        _document_written(doc_id)
+    return bool(row)
+
+
+def get_drive_sync_page_token(user_id: int) -> str | None:
+    row = fetchone("SELECT page_token FROM drive_sync_state WHERE user_id = %s", (user_id,))
+    if not row:
+        return None
+    return str(row[0])
+
+
+def set_drive_sync_page_token(*, user_id: int, page_token: str) -> None:
+    execute(
+        """
+        INSERT INTO drive_sync_state (user_id, page_token)
+        VALUES (%s, %s)
+        ON CONFLICT (user_id)
+        DO UPDATE SET page_token = EXCLUDED.page_token, updated_at = NOW()
+        """,
+        (user_id, page_token),
+    )
+
+
 def upsert_drive_oauth_token(*, refresh_token: str, token_uri: str, client_id: str, client_secret: str) -> None:
     execute(
         """
@@ -554,7 +1437,8 @@ def upsert_drive_oauth_token_for_user(
     client_id: str,
     client_secret: str,
 ) -> None:
-    execute(
+    # Other workers drop their cached access token for this user (identity_cache listener).
+    execute_returning(
         """
         INSERT INTO drive_oauth_tokens_by_user (user_id, refresh_token, token_uri, client_id, client_secret)
         VALUES (%s, %s, %s, %s, %s)
@@ -565,8 +1449,10 @@ def upsert_drive_oauth_token_for_user(
             client_id = EXCLUDED.client_id,
             client_secret = EXCLUDED.client_secret,
             updated_at = NOW()
+        RETURNING user_id
         """,
         (user_id, refresh_token, token_uri, client_id, client_secret),
+        notify=f"drive:{user_id}",
     )
 
 
@@ -609,6 +1495,7 @@ def delete_drive_oauth_token_for_user(user_id: int) -> bool:
     row = execute_returning(
         "DELETE FROM drive_oauth_tokens_by_user WHERE user_id = %s RETURNING user_id",
         (user_id,),
+        notify=f"drive:{user_id}",
     )
     return bool(row)
 
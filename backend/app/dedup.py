@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+import time
+
+from .config import get_dedup_threshold
+from .metrics import incr
+
+
+# Near-duplicate detection (same document re-uploaded with a new date, a fixed
+# typo, a different export) over each document's title, description and tags.
+#
+#   - text is lowercased, ë/ç folded, punctuation collapsed, then cut into
+#     overlapping character 5-grams (shingles)
+#   - MinHash signature by one-permutation hashing: each shingle's 64-bit hash
+#     picks one of _BINS bins and competes for its minimum; empty bins borrow
+#     from the next filled bin (densification). 64 x uint32 = 256 bytes/doc.
+#   - LSH: _BANDS bands of _ROWS values, each hashed to one BIGINT bucket.
+#     Buckets live in document_minhash.bands (GIN), so finding candidates is
+#     an index lookup; candidates are confirmed by comparing signatures.
+#
+# The fraction of equal bins estimates Jaccard similarity of the shingle sets.
+# With 16 x 4 bands a pair at 0.8 becomes a candidate with p > 0.999.
+
+_SHINGLE = 5
+_BINS = 64
+_BANDS = 16
+_ROWS = _BINS // _BANDS
+_EMPTY = 1 << 32
+_PACK = struct.Struct(f"<{_BINS}I")
+_FOLD = str.maketrans({"ë": "e", "ç": "c"})
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_REFRESH_BATCH = 2000
+
+
+def document_text(title: object, description: object, tags: object) -> str:
+    return " ".join(str(part) for part in (title, description, tags) if part)
+
+
+def shingles(text: str) -> set[str]:
+    normalized = _NON_WORD_RE.sub(" ", text.lower().translate(_FOLD)).strip()
+    if len(normalized) <= _SHINGLE:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + _SHINGLE] for i in range(len(normalized) - _SHINGLE + 1)}
+
+
+def signature(text: str) -> tuple[int, ...] | None:
+    # None for texts without any shingle (nothing to compare).
+    bins = [_EMPTY] * _BINS
+    for shingle in shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        b = h & (_BINS - 1)
+        value = h >> 32
+        if value < bins[b]:
+            bins[b] = value
+    if all(v == _EMPTY for v in bins):
+        return None
+    # Densify: an empty bin takes the value of the next filled bin to its right,
+    # offset by the distance so borrowed values stay distinct per position.
+    out = list(bins)
+    for b in range(_BINS):
+        if bins[b] == _EMPTY:
+            step = 1
+            while bins[(b + step) % _BINS] == _EMPTY:
+                step += 1
+            out[b] = (bins[(b + step) % _BINS] + step * 0x9E3779B1) & 0xFFFFFFFF
+    return tuple(out)
+
+
+def band_buckets(sig: tuple[int, ...]) -> list[int]:
+    # One signed 64-bit bucket per band; the band number is part of the hash.
+    buckets = []
+    for band in range(_BANDS):
+        values = sig[band * _ROWS : (band + 1) * _ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<H{_ROWS}I", band, *values), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def pack(sig: tuple[int, ...]) -> bytes:
+    return _PACK.pack(*sig)
+
+
+def unpack(data: bytes) -> tuple[int, ...]:
+    return _PACK.unpack(bytes(data))
+
+
+def estimate(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / _BINS
+
+
+def index_document(doc: dict) -> list[dict]:
+    # Store the signature of a created/edited document and return likely
+    # duplicates ([{id, title, similarity}], best first).
+    from .db import find_minhash_candidates, get_documents_by_ids, save_document_minhash
+
+    sig = signature(document_text(doc.get("title"), doc.get("description"), doc.get("tags")))
+    doc_id = int(doc["id"])
+    if sig is None:
+        save_document_minhash([(doc_id, b"", [], doc.get("updated_at"))])
+        return []
+    buckets = band_buckets(sig)
+    threshold = get_dedup_threshold()
+    matches = {}
+    for other_id, other_sig in find_minhash_candidates(buckets, exclude_id=doc_id):
+        score = estimate(sig, unpack(other_sig))
+        if score >= threshold:
+            matches[int(other_id)] = round(score, 3)
+    save_document_minhash([(doc_id, pack(sig), buckets, doc.get("updated_at"))])
+    if not matches:
+        return []
+    incr("dedup.flagged")
+    ranked = sorted(matches, key=lambda i: (-matches[i], i))
+    rows = get_documents_by_ids(ranked, ("id", "title"))
+    return [{**row, "similarity": matches[row["id"]]} for row in rows]
+
+
+def refresh_signatures() -> int:
+    # Signatures for documents that have none or changed since; returns how many were written.
+    from .db import list_minhash_stale, save_document_minhash
+
+    written = 0
+    while True:
+        rows = list_minhash_stale(limit=_REFRESH_BATCH)
+        if not rows:
+            return written
+        batch = []
+        for doc_id, updated_at, title, description, tags in rows:
+            sig = signature(document_text(title, description, tags))
+            if sig is None:
+                # Nothing to compare: an empty marker keeps the row from being retried.
+                batch.append((doc_id, b"", [], updated_at))
+            else:
+                batch.append((doc_id, pack(sig), band_buckets(sig), updated_at))
+        save_document_minhash(batch)
+        written += len(batch)
+        if len(rows) < _REFRESH_BATCH:
+            return written
+
+
+def _find(parent: dict[int, int], x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def duplicate_clusters(*, threshold: float | None = None) -> dict:
+    # Whole-catalog report in one pass over the stored signatures: bucket every
+    # document per band, confirm pairs sharing a bucket, union them into clusters.
+    from .db import get_documents_by_ids, iter_document_minhash
+
+    started = time.perf_counter()
+    threshold = get_dedup_threshold() if threshold is None else threshold
+    refreshed = refresh_signatures()
+
+    signatures: dict[int, tuple[int, ...]] = {}
+    buckets: dict[int, list[int]] = {}
+    for batch in iter_document_minhash():
+        for doc_id, data, bands in batch:
+            if not data:
+                continue
+            signatures[doc_id] = unpack(data)
+            for bucket in bands:
+                buckets.setdefault(bucket, []).append(doc_id)
+
+    parent = {doc_id: doc_id for doc_id in signatures}
+    scores: dict[int, float] = {}
+    checked: set[tuple[int, int]] = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1 :]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                score = estimate(signatures[a], signatures[b])
+                if score >= threshold:
+                    root_a, root_b = _find(parent, a), _find(parent, b)
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+                    scores[a] = max(scores.get(a, 0.0), score)
+                    scores[b] = max(scores.get(b, 0.0), score)
+
+    grouped: dict[int, list[int]] = {}
+    for doc_id in scores:
+        grouped.setdefault(_find(parent, doc_id), []).append(doc_id)
+    clusters = sorted((sorted(ids) for ids in grouped.values()), key=lambda ids: (-len(ids), ids[0]))
+
+    fields = ("id", "title", "category", "status", "created_at")
+    docs = {row["id"]: row for row in get_documents_by_ids([i for ids in clusters for i in ids], fields)}
+    incr("dedup.reports")
+    return {
+        "threshold": threshold,
+        "documents_scanned": len(signatures),
+        "signatures_refreshed": refreshed,
+        "pairs_compared": len(checked),
+        "clusters": [
+            [{**docs[i], "similarity": round(scores[i], 3)} for i in ids if i in docs] for ids in clusters
+        ],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
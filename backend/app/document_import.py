@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, TextIO
+
+from .db import import_document_rows
+from .metrics import incr
+
+
+# Bulk import of document metadata for files that already exist in Drive
+# (legacy register migration). Records are validated one at a time while being
+# streamed into a temp staging table with COPY, then merged into
+# academic_documents with a single INSERT ... SELECT, all in one transaction.
+# Rejected records (validation errors, duplicate or existing drive_file_id,
+# unknown uploader) are reported through on_error and never abort the import.
+#
+#   python -m backend.app.document_import register.csv --errors register.errors.ndjson
+#
+# Columns (CSV header / NDJSON keys): title, category, drive_file_id (required);
+# description, tags, file_type, web_view_link, status, uploaded_by_email, created_at.
+# validate_record() returns rows in db.IMPORT_STAGING_COLUMNS order.
+
+_MAX_LENGTHS = {"category": 100, "file_type": 100}
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    # (line number, record or None, parse error or None)
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def _text(record: dict, key: str) -> str | None:
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_record(line_no: int, record: dict) -> tuple:
+    # Staging row (db.IMPORT_STAGING_COLUMNS order); ValueError with the reason otherwise.
+    title = _text(record, "title")
+    category = _text(record, "category")
+    drive_file_id = _text(record, "drive_file_id")
+    missing = [k for k, v in (("title", title), ("category", category), ("drive_file_id", drive_file_id)) if not v]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    file_type = _text(record, "file_type") or "application/octet-stream"
+    for key, value in (("category", category), ("file_type", file_type)):
+        if len(value) > _MAX_LENGTHS[key]:
+            raise ValueError(f"{key} longer than {_MAX_LENGTHS[key]} characters")
+
+    status = (_text(record, "status") or "active").lower()
+    if status not in {"active", "archived"}:
+        raise ValueError("status must be active or archived")
+
+    created_at = None
+    created_raw = _text(record, "created_at")
+    if created_raw:
+        try:
+            created_at = datetime.fromisoformat(created_raw)
+        except ValueError:
+            raise ValueError("created_at must be an ISO date or datetime") from None
+
+    email = _text(record, "uploaded_by_email")
+    return (
+        line_no,
+        title,
+        _text(record, "description"),
+        category,
+        _text(record, "tags"),
+        file_type,
+        drive_file_id,
+        _text(record, "web_view_link") or f"https://drive.google.com/file/d/{drive_file_id}/view",
+        status,
+        email.lower() if email else None,
+        created_at,
+    )
+
+
+def import_documents(
+    records: Iterable[tuple[int, dict | None, str | None]],
+    *,
+    on_error: Callable[[dict], None],
+) -> dict:
+    started = time.perf_counter()
+    stats = {"records": 0, "imported": 0, "rejected": 0}
+
+    def valid_rows() -> Iterator[tuple]:
+        for line_no, record, error in records:
+            stats["records"] += 1
+            if error is None:
+                try:
+                    yield validate_record(line_no, record or {})
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            stats["rejected"] += 1
+            on_error({"line": line_no, "error": error, "record": record})
+
+    imported, rejects = import_document_rows(valid_rows())
+    for line_no, drive_file_id, reason in rejects:
+        on_error({"line": line_no, "error": reason, "drive_file_id": drive_file_id})
+    stats["imported"] = imported
+    stats["rejected"] += len(rejects)
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 3)
+    stats["rows_per_second"] = round(stats["records"] / seconds, 1) if seconds > 0 else None
+    incr("document_import.imported", imported)
+    incr("document_import.rejected", stats["rejected"])
+    return stats
+
+
+def detect_format(filename: str) -> str:
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import document metadata for files already in Drive.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--errors", default=None, help="Rejected records (NDJSON); default: <path>.errors.ndjson")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    errors_path = args.errors or f"{args.path}.errors.ndjson"
+    with open(args.path, encoding="utf-8-sig", newline="") as source, open(errors_path, "w", encoding="utf-8") as errors:
+
+        def on_error(entry: dict) -> None:
+            errors.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+        stats = import_documents(iter_records(source, fmt), on_error=on_error)
+
+    print(json.dumps(stats))
+    if stats["rejected"]:
+        print(f"Rejected records written to {errors_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,61 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import io
 import json
-from datetime import datetime
+import math
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Mapping
 
+import anyio
+from starlette.concurrency import run_in_threadpool
 from starlette.datastructures import UploadFile
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import Response, StreamingResponse
 
+from . import list_cache
 from .auth import require_auth, require_role
-from .config import get_drive_folder_id
+from .bulkhead import AI, CATALOG, WRITES, BulkheadFullError, run_in_bulkhead
+from .catalog import get_catalog, is_stale as catalog_is_stale, refresh_if_dirty as catalog_refresh_if_dirty
+from .circuit import CircuitOpenError
+from .dedup import index_document
 from .db import (
+    DOCUMENT_FIELDS,
+    LIST_DEFAULT_FIELDS,
     archive_document_by_id,
     create_document_row,
     delete_document_by_id,
+    get_document_by_drive_file_id,
     get_document_by_id,
+    get_documents_by_ids,
+    get_document_facets,
+    get_tag_counts,
     get_document_uploader_id,
+    get_document_version,
+    iter_documents_export,
+    get_documents_list_version,
+    list_archive_documents,
     list_documents_rows,
     unarchive_document_by_id,
     update_document_file_by_id,
     update_document_by_id,
 )
-from .drive import delete_file_from_drive, download_file_from_drive, update_file_content_in_drive, upload_file_to_drive
+from .drive_async import is_rate_limit_error
+from .drive_quota import background_priority
+from .metrics import incr
+from .archive import stream_archive
+from .responses import JSONResponse, dumps
+from .similarity import get_index as get_similarity_index, refresh_if_dirty as similarity_refresh_if_dirty
+from .singleflight import coalesce
+from .suggest import (
+    get_index as get_suggest_index,
+    needs_refresh as suggest_needs_refresh,
+    refresh_if_dirty as suggest_refresh_if_dirty,
+)
+from .storage import get_storage, read_content
+from .tags import normalize_tag, parse_tags
 
 
 def _forbidden(message: str = "forbidden") -> Response:
@@ -45,27 +79,144 @@ def _bad_request(message: str) -> Response:
     return JSONResponse({"error": {"code": "bad_request", "message": message}}, status_code=400)
 
 
+def _dependency_error(e: Exception, message: str) -> Response:
+    if isinstance(e, BulkheadFullError):
+        return _busy(e)
+    # Drive/Gemini circuit open: fail fast with 503 instead of waiting for timeouts.
+    if isinstance(e, CircuitOpenError):
+        return JSONResponse(
+            {"error": {"code": "service_unavailable", "message": str(e)}},
+            status_code=503,
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    # Drive quota still exhausted after backoff: ask the client to retry later
+    # instead of reporting a bad request.
+    if is_rate_limit_error(e):
+        retry_after = getattr(e, "retry_after", None) or 30
+        return JSONResponse(
+            {"error": {"code": "drive_rate_limited", "message": "Google Drive rate limit reached. Try again later."}},
+            status_code=503,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return _bad_request(message)
+
+
+def _busy(e: BulkheadFullError) -> Response:
+    return JSONResponse(
+        {"error": {"code": "service_unavailable", "message": str(e)}},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
 def _not_found() -> Response:
     return JSONResponse({"error": {"code": "not_found", "message": "Document not found"}}, status_code=404)
 
 
-def list_documents(request: Request) -> Response:
+def _etag(*parts: object) -> str:
+    digest = hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides.
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    # Clients may keep the body but must revalidate each time.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def _drive_candidates(user: dict, uploader_id: int | None, doc: dict | None = None) -> tuple[int | None, ...]:
+    # Current user, then uploader, then the account the file was uploaded with, then service account (-1).
+    owner_id = (doc or {}).get("drive_owner_user_id")
+    return (
+        int(user["id"]),
+        int(uploader_id) if uploader_id is not None else None,
+        int(owner_id) if owner_id is not None else None,
+        -1,
+    )
+
+
+async def get_local_file(request: Request) -> Response:
+    key = str(request.path_params["key"])
+    storage = get_storage("local")
+    # Browsers navigate here without a Bearer token, using a signed link from local_file_link.
+    if not storage.verify_link(key, request.query_params.get("expires"), request.query_params.get("signature")):
+        require_auth(request)
+    try:
+        storage.path_for(key)
+    except RuntimeError:
+        return _not_found()
+
+    doc = await run_in_bulkhead(CATALOG, get_document_by_drive_file_id, key)
+    if not doc:
+        return _not_found()
+    # The row can outlive its file; check before the 200 headers go out.
+    try:
+        await storage.stat(user_ids=(), key=key)
+    except RuntimeError:
+        return _not_found()
+    return StreamingResponse(
+        storage.iter_content(user_ids=(), key=key),
+        media_type=str(doc.get("file_type") or "application/octet-stream"),
+    )
+
+
+async def local_file_link(request: Request) -> Response:
     require_auth(request)
 
-    query = (request.query_params.get("query") or "").strip()
-    category = (request.query_params.get("category") or "").strip()
-    status = (request.query_params.get("status") or "").strip() or "active"
-    date_from = (request.query_params.get("from") or "").strip()
-    date_to = (request.query_params.get("to") or "").strip()
+    key = str(request.path_params["key"])
+    storage = get_storage("local")
+    try:
+        storage.path_for(key)
+    except RuntimeError:
+        return _not_found()
+    doc = await run_in_bulkhead(CATALOG, get_document_by_drive_file_id, key)
+    if not doc:
+        return _not_found()
+
+    from .config import get_storage_local_link_ttl_seconds
+
+    url, expires = storage.signed_link(key, ttl_seconds=get_storage_local_link_ttl_seconds())
+    return JSONResponse(
+        {"url": url, "expires_at": datetime.fromtimestamp(expires, tz=timezone.utc).isoformat()},
+        headers={"Cache-Control": "no-store"},
+    )
 
-    page = int(request.query_params.get("page") or 1)
-    page_size = int(request.query_params.get("page_size") or 20)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 20
-    if page_size > 100:
-        page_size = 100
+
+def _catalog_search(filters: dict, page: int, page_size: int) -> tuple[list[int], tuple] | None:
+    catalog_refresh_if_dirty()
+    snapshot = get_catalog()
+    # A stale snapshot is reloaded by the background refresher; SQL serves meanwhile.
+    if snapshot is None or catalog_is_stale():
+        return None
+    return snapshot.search(**filters, page=page, page_size=page_size)
+
+
+def _list_filters(params: Mapping[str, str]) -> dict:
+    # Filters shared by the list, export and archive endpoints; ValueError -> 400.
+    query = (params.get("query") or "").strip()
+    category = (params.get("category") or "").strip()
+    status = (params.get("status") or "").strip() or "active"
+    date_from = (params.get("from") or "").strip()
+    date_to = (params.get("to") or "").strip()
+    # tag=a&tag=b or tag=a,b; tag_match=all (default: every tag) or any.
+    tags = parse_tags(params.getlist("tag") if hasattr(params, "getlist") else params.get("tag"))
+    tags_match = (params.get("tag_match") or "").strip().lower() or "all"
+    if tags_match not in {"all", "any"}:
+        raise ValueError("tag_match must be all or any")
 
     def parse_date(value: str) -> datetime | None:
         if not value:
@@ -79,68 +230,365 @@ def list_documents(request: Request) -> Response:
     from_dt = parse_date(date_from)
     to_dt = parse_date(date_to)
     if date_from and not from_dt:
-        return _bad_request("Invalid 'from' date. Use ISO format (e.g. 2026-01-11 or 2026-01-11T10:00:00)")
+        raise ValueError("Invalid 'from' date. Use ISO format (e.g. 2026-01-11 or 2026-01-11T10:00:00)")
     if date_to and not to_dt:
-        return _bad_request("Invalid 'to' date. Use ISO format (e.g. 2026-01-11 or 2026-01-11T10:00:00)")
-
-    rows = list_documents_rows(
-        query=query or None,
-        category=category or None,
-        status=status or None,
-        from_dt=from_dt,
-        to_dt=to_dt,
-        page=page,
-        page_size=page_size,
+        raise ValueError("Invalid 'to' date. Use ISO format (e.g. 2026-01-11 or 2026-01-11T10:00:00)")
+
+    return {
+        "query": query or None,
+        "category": category or None,
+        "status": status or None,
+        "from_dt": from_dt,
+        "to_dt": to_dt,
+        "tags": tuple(tags) or None,
+        "tags_match": tags_match if tags else None,
+    }
+
+
+def _requested_fields(request: Request, default: tuple[str, ...]) -> tuple[str, ...]:
+    # fields=title,category,...  ("all" for every field); id is always included.
+    fields_param = (request.query_params.get("fields") or "").strip()
+    if not fields_param:
+        return default
+    if fields_param == "all":
+        return DOCUMENT_FIELDS
+    requested = {f.strip() for f in fields_param.split(",") if f.strip()}
+    unknown = requested - set(DOCUMENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(DOCUMENT_FIELDS)}")
+    requested.add("id")
+    return tuple(f for f in DOCUMENT_FIELDS if f in requested)
+
+
+async def list_documents(request: Request) -> Response:
+    require_auth(request)
+
+    page = int(request.query_params.get("page") or 1)
+    page_size = int(request.query_params.get("page_size") or 20)
+    if page < 1:
+        page = 1
+    if page_size < 1:
+        page_size = 20
+    if page_size > 100:
+        page_size = 100
+
+    try:
+        filters = _list_filters(request.query_params)
+        # Default list shape: everything except description/ai_summary.
+        fields = _requested_fields(request, LIST_DEFAULT_FIELDS)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    cache_key = (*filters.values(), page, page_size, fields)
+    generation = list_cache.generation()
+    cached = list_cache.get(cache_key)
+    if cached is not None:
+        version, rows = cached
+        etag = _etag("list", *cache_key, *version)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        return JSONResponse({"items": rows, "page": page, "page_size": page_size}, headers=_cache_headers(etag))
+
+    # Optional in-process catalog: filter/sort in memory, hydrate only the page.
+    if get_catalog() is not None:
+        found = await run_in_bulkhead(CATALOG, _catalog_search, filters, page, page_size)
+        if found is not None:
+            ids, version = found
+            etag = _etag("list", *cache_key, "catalog", *version)
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+            rows = await run_in_bulkhead(CATALOG, get_documents_by_ids, ids, fields)
+            list_cache.put(
+                cache_key, filters=filters, version=("catalog", *version), rows=rows, generation=generation
+            )
+            return JSONResponse({"items": rows, "page": page, "page_size": page_size}, headers=_cache_headers(etag))
+
+    # The ETag comes from a cheap aggregate over the filtered set, so a
+    # revalidation that hits skips fetching and serializing the page.
+    version = await coalesce(
+        "list_documents_version",
+        tuple(filters.values()),
+        lambda: run_in_bulkhead(CATALOG, get_documents_list_version, **filters),
+    )
+    etag = _etag("list", *cache_key, *version)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    # Identical concurrent list requests share one query.
+    rows = await coalesce(
+        "list_documents",
+        cache_key,
+        lambda: run_in_bulkhead(
+            CATALOG, list_documents_rows, **filters, page=page, page_size=page_size, fields=fields
+        ),
+    )
+    list_cache.put(cache_key, filters=filters, version=version, rows=rows, generation=generation)
+    return JSONResponse({"items": rows, "page": page, "page_size": page_size}, headers=_cache_headers(etag))
+
+
+async def document_facets(request: Request) -> Response:
+    require_auth(request)
+
+    # Same default as the list (active); status=all counts every document.
+    status = (request.query_params.get("status") or "").strip() or "active"
+    if status == "all":
+        status = ""
+    facets = await coalesce(
+        "document_facets", status, lambda: run_in_bulkhead(CATALOG, get_document_facets, status or None)
+    )
+    return JSONResponse({"status": status or "all", **facets})
+
+
+async def document_tags(request: Request) -> Response:
+    require_auth(request)
+
+    # Tag cloud: normalized tags with document counts, most used first.
+    status = (request.query_params.get("status") or "").strip() or "active"
+    if status == "all":
+        status = ""
+    prefix = normalize_tag(request.query_params.get("prefix") or "")
+    try:
+        limit = int(request.query_params.get("limit") or 100)
+    except ValueError:
+        return _bad_request("limit must be an integer")
+    limit = min(max(limit, 1), 500)
+    items = await coalesce(
+        "document_tags",
+        (status, prefix, limit),
+        lambda: run_in_bulkhead(CATALOG, get_tag_counts, status=status or None, prefix=prefix or None, limit=limit),
+    )
+    return JSONResponse({"status": status or "all", "items": items})
+
+
+async def suggest_documents(request: Request) -> Response:
+    require_auth(request)
+
+    prefix = (request.query_params.get("prefix") or "").strip()
+    try:
+        limit = int(request.query_params.get("limit") or 8)
+    except ValueError:
+        return _bad_request("limit must be an integer")
+    limit = min(max(limit, 1), 20)
+    kind = (request.query_params.get("kind") or "").strip() or None
+    if kind not in {None, "title", "tag"}:
+        return _bad_request("kind must be title or tag")
+
+    if get_suggest_index() is None:
+        return JSONResponse(
+            {"error": {"code": "service_unavailable", "message": "Suggestion index is not available yet"}},
+            status_code=503,
+            headers={"Retry-After": "5"},
+        )
+    if not prefix:
+        return JSONResponse({"prefix": prefix, "items": []})
+    # In-memory lookup on the event loop; only a pending refresh (a DB read) goes to the pool.
+    if suggest_needs_refresh():
+        await run_in_bulkhead(CATALOG, suggest_refresh_if_dirty)
+    items = get_suggest_index().suggest(prefix, limit=limit, kind=kind)
+    return JSONResponse({"prefix": prefix, "items": items}, headers={"Cache-Control": "private, max-age=5"})
+
+
+def _csv_value(value: object) -> object:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    # Keep spreadsheet apps from evaluating user-entered text as a formula.
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+def _csv_chunk(rows: list[dict], fields: tuple[str, ...], *, header: bool) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_csv_value(row[f]) for f in fields])
+    return out.getvalue().encode("utf-8")
+
+
+async def export_documents(request: Request) -> Response:
+    require_auth(request)
+
+    export_format = (request.query_params.get("format") or "csv").strip().lower()
+    if export_format not in {"csv", "ndjson"}:
+        return _bad_request("format must be csv or ndjson")
+    try:
+        filters = _list_filters(request.query_params)
+        fields = _requested_fields(request, DOCUMENT_FIELDS)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    async def body():
+        batches = iter_documents_export(**filters, fields=fields)
+        try:
+            if export_format == "csv":
+                # BOM so Excel opens UTF-8 (Albanian characters) correctly.
+                yield b"\xef\xbb\xbf" + _csv_chunk([], fields, header=True)
+            while True:
+                # One server-side cursor batch per step, off the event loop.
+                rows = await run_in_bulkhead(CATALOG, next, batches, None)
+                if rows is None:
+                    break
+                if export_format == "csv":
+                    yield _csv_chunk(rows, fields, header=False)
+                else:
+                    yield b"".join(dumps(row) + b"\n" for row in rows)
+        finally:
+            # Closes the cursor/connection also when the client disconnects:
+            # shielded from the cancellation and not queued behind the bulkhead.
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(batches.close)
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="documents-{stamp}.{export_format}"'},
     )
-    return JSONResponse({"items": rows, "page": page, "page_size": page_size})
 
 
-def get_document(request: Request) -> Response:
+async def download_archive(request: Request) -> Response:
+    user = require_auth(request)
+
+    # {"ids": [1, 2, ...]} or list filters ({"category": ..., "status": ..., "query": ..., "from": ..., "to": ...,
+    # "tag": [...], "tag_match": ...}).
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return _bad_request("Invalid JSON")
+    if not isinstance(body, dict):
+        return _bad_request("Body must be a JSON object")
+
+    from .config import get_archive_download_concurrency, get_archive_max_documents
+
+    max_documents = get_archive_max_documents()
+    if body.get("ids") is not None:
+        ids = body["ids"]
+        if not isinstance(ids, list) or not ids:
+            return _bad_request("ids must be a non-empty list of document ids")
+        try:
+            ids = list(dict.fromkeys(int(i) for i in ids))
+        except (TypeError, ValueError):
+            return _bad_request("ids must be a non-empty list of document ids")
+        if len(ids) > max_documents:
+            return _bad_request(f"At most {max_documents} documents per archive")
+        selection: dict = {"ids": ids}
+    else:
+        try:
+            selection = _list_filters(
+                {k: ",".join(map(str, v)) if isinstance(v, list) else str(v) for k, v in body.items() if v is not None}
+            )
+        except ValueError as e:
+            return _bad_request(str(e))
+
+    docs = await run_in_bulkhead(CATALOG, list_archive_documents, **selection, limit=max_documents + 1)
+    if not docs:
+        return _not_found()
+    if len(docs) > max_documents:
+        return _bad_request(f"More than {max_documents} documents match; narrow the filters")
+
+    async def fetch(doc: dict) -> bytes:
+        # Local-storage files are read from disk; Drive files through the credential chain,
+        # queued behind interactive Drive calls so a bulk ZIP can't starve uploads.
+        with background_priority():
+            return await read_content(
+                get_storage(doc.get("storage_backend")),
+                user_ids=_drive_candidates(user, doc.get("uploaded_by_user_id"), doc),
+                key=str(doc["drive_file_id"]),
+            )
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        stream_archive(docs, fetch, concurrency=get_archive_download_concurrency()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="documents-{stamp}.zip"'},
+    )
+
+
+async def get_document(request: Request) -> Response:
     doc_id = int(request.path_params["doc_id"])
-    doc = get_document_by_id(doc_id)
+    if request.headers.get("if-none-match"):
+        updated_at = await coalesce(
+            "get_document_version", doc_id, lambda: run_in_bulkhead(CATALOG, get_document_version, doc_id)
+        )
+        if updated_at is None:
+            return _not_found()
+        etag = _etag("doc", doc_id, updated_at)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+    doc = await coalesce("get_document", doc_id, lambda: run_in_bulkhead(CATALOG, get_document_by_id, doc_id))
     if not doc:
         return _not_found()
-    return JSONResponse(doc)
+    return JSONResponse(doc, headers=_cache_headers(_etag("doc", doc_id, doc.get("updated_at"))))
 
 
-def generate_ai_summary(request: Request) -> Response:
-    user = require_role(request, {"staf", "sekretaria", "admin"})
+def _similar(doc_id: int, limit: int, status: str | None) -> list[tuple[int, float]] | None:
+    similarity_refresh_if_dirty()
+    index = get_similarity_index()
+    if index is None:
+        return None
+    return index.similar(doc_id, limit=limit, status=status)
+
+
+async def similar_documents(request: Request) -> Response:
+    require_auth(request)
 
     doc_id = int(request.path_params["doc_id"])
-    doc = get_document_by_id(doc_id)
-    if not doc:
+    try:
+        limit = int(request.query_params.get("limit") or 10)
+    except ValueError:
+        return _bad_request("limit must be an integer")
+    limit = min(max(limit, 1), 50)
+    # Same default as the list (active); status=all returns every match.
+    status = (request.query_params.get("status") or "").strip() or "active"
+    try:
+        fields = _requested_fields(request, LIST_DEFAULT_FIELDS)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    if get_similarity_index() is None:
+        return JSONResponse(
+            {"error": {"code": "service_unavailable", "message": "Similarity index is not available yet"}},
+            status_code=503,
+            headers={"Retry-After": "5"},
+        )
+    found = await run_in_bulkhead(CATALOG, _similar, doc_id, limit, None if status == "all" else status)
+    if found is None:
         return _not_found()
 
-    from .config import get_gemini_api_key
+    scores = dict(found)
+    rows = await run_in_bulkhead(CATALOG, get_documents_by_ids, list(scores), fields)
+    return JSONResponse({"doc_id": doc_id, "items": [{**row, "score": scores[row["id"]]} for row in rows]})
 
-    api_key = get_gemini_api_key()
-    if not api_key:
-        return _bad_request("GEMINI_API_KEY is not configured")
 
-    uploader_id = get_document_uploader_id(doc_id)
-    drive_file_id = str(doc["drive_file_id"])
+class _SummaryError(Exception):
+    def __init__(self, cause: Exception, message: str):
+        super().__init__(message)
+        self.cause = cause
+        self.message = message
 
-    file_bytes = None
-    for candidate_user_id in (
-        int(user["id"]),
-        int(uploader_id) if uploader_id is not None else None,
-        -1,
-    ):
-        if candidate_user_id is None:
-            continue
-        try:
-            file_bytes = download_file_from_drive(user_id=int(candidate_user_id), drive_file_id=drive_file_id)
-            break
-        except Exception:
-            continue
 
-    if file_bytes is None:
-        return _bad_request("Unable to download file for AI summary")
+async def _summarize(doc: dict, *, api_key: str, user_ids: tuple[int | None, ...]) -> str:
+    try:
+        file_bytes = await read_content(
+            get_storage(doc.get("storage_backend")),
+            user_ids=user_ids,
+            key=str(doc["drive_file_id"]),
+        )
+    except Exception as e:
+        raise _SummaryError(e, "Unable to download file for AI summary") from e
 
     from .gemini import generate_summary
 
     try:
-        summary = generate_summary(
+        return await run_in_bulkhead(
+            AI,
+            generate_summary,
             api_key=api_key,
             title=str(doc.get("title") or ""),
             category=str(doc.get("category") or ""),
@@ -150,11 +598,50 @@ def generate_ai_summary(request: Request) -> Response:
             file_bytes=file_bytes,
         )
     except Exception as e:
-        return _bad_request(f"AI summary generation failed: {e}")
+        raise _SummaryError(e, f"AI summary generation failed: {e}") from e
+
+
+async def generate_ai_summary(request: Request) -> Response:
+    user = require_role(request, {"staf", "sekretaria", "admin"})
+
+    doc_id = int(request.path_params["doc_id"])
+    doc = await coalesce("get_document", doc_id, lambda: run_in_bulkhead(CATALOG, get_document_by_id, doc_id))
+    if not doc:
+        return _not_found()
+
+    from .config import get_gemini_api_key
+
+    api_key = get_gemini_api_key()
+    if not api_key:
+        return _bad_request("GEMINI_API_KEY is not configured")
+
+    uploader_id = await run_in_bulkhead(CATALOG, get_document_uploader_id, doc_id)
+
+    # Several users opening the same document at once share one download + Gemini
+    # call. The key includes the file identity so a replaced file is never
+    # answered with a summary of the old one.
+    try:
+        summary = await coalesce(
+            "ai_summary",
+            (doc_id, str(doc["drive_file_id"]), doc.get("drive_md5")),
+            lambda: _summarize(doc, api_key=api_key, user_ids=_drive_candidates(user, uploader_id, doc)),
+        )
+    except _SummaryError as e:
+        return _dependency_error(e.cause, e.message)
 
     return JSONResponse({"doc_id": doc_id, "ai_summary": summary})
 
 
+async def _near_duplicates(doc: dict) -> list[dict]:
+    # Stores the document's MinHash signature and returns likely duplicates.
+    # Advisory only: a failure here never fails the write.
+    try:
+        return await run_in_bulkhead(WRITES, index_document, doc)
+    except Exception:
+        incr("dedup.errors")
+        return []
+
+
 async def create_document(request: Request) -> Response:
     user = require_role(request, {"staf", "sekretaria", "admin"})
 
@@ -191,22 +678,25 @@ async def create_document(request: Request) -> Response:
     if len(content) > max_bytes:
         return _bad_request("File too large. Max size is 10MB")
 
+    storage = get_storage()
     try:
-        drive = upload_file_to_drive(
-            user_id=int(user["id"]),
+        drive = await storage.put(
+            user_ids=(int(user["id"]),),
             filename=upload.filename or "document",
             content_type=file_content_type,
             content=content,
-            folder_id=get_drive_folder_id(),
+            category=category,
         )
     except RuntimeError as e:
-        return _bad_request(str(e))
+        return _dependency_error(e, str(e))
     drive_file_id = (drive.get("drive_file_id") or "").strip()
     web_view_link = (drive.get("web_view_link") or "").strip()
     if not drive_file_id or not web_view_link:
         raise RuntimeError("Drive upload did not return required fields")
 
-    doc = create_document_row(
+    doc = await run_in_bulkhead(
+        WRITES,
+        create_document_row,
         title=title,
         category=category,
         description=description,
@@ -215,8 +705,13 @@ async def create_document(request: Request) -> Response:
         drive_file_id=drive_file_id,
         web_view_link=web_view_link,
         uploaded_by_user_id=int(user["id"]),
+        drive_md5=drive.get("md5_checksum"),
+        drive_modified_at=drive.get("modified_time"),
+        storage_backend=storage.name,
+        drive_folder_id=drive.get("folder_id"),
+        drive_owner_user_id=drive.get("owner_user_id"),
     )
-    return JSONResponse(doc, status_code=201)
+    return JSONResponse({**doc, "possible_duplicates": await _near_duplicates(doc)}, status_code=201)
 
 
 async def update_document(request: Request) -> Response:
@@ -250,7 +745,9 @@ async def update_document(request: Request) -> Response:
     if tags is not None:
         tags = str(tags).strip() or None
 
-    updated = update_document_by_id(
+    updated = await run_in_bulkhead(
+        WRITES,
+        update_document_by_id,
         doc_id=doc_id,
         title=title,
         category=category,
@@ -261,6 +758,8 @@ async def update_document(request: Request) -> Response:
     if not updated:
         return _not_found()
 
+    if title is not None or description is not None or tags is not None:
+        updated = {**updated, "possible_duplicates": await _near_duplicates(updated)}
     return JSONResponse(updated)
 
 
@@ -292,41 +791,31 @@ def unarchive_document(request: Request) -> Response:
     return JSONResponse(updated)
 
 
-def delete_document(request: Request) -> Response:
+async def delete_document(request: Request) -> Response:
     doc_id = int(request.path_params["doc_id"])
 
     try:
-        user = _require_owner_or_admin(request, doc_id=doc_id)
+        user = await run_in_bulkhead(WRITES, _require_owner_or_admin, request, doc_id=doc_id)
     except PermissionError:
         return _forbidden("Only the uploader (or admin) can delete this document")
     if not user:
         return _not_found()
 
-    doc = get_document_by_id(doc_id)
+    doc = await run_in_bulkhead(WRITES, get_document_by_id, doc_id)
     if not doc:
         return _not_found()
 
-    uploader_id = get_document_uploader_id(doc_id)
+    uploader_id = await run_in_bulkhead(WRITES, get_document_uploader_id, doc_id)
     drive_file_id = str(doc["drive_file_id"])
-    last_err: Exception | None = None
-    for candidate_user_id in (
-        int(user["id"]),
-        int(uploader_id) if uploader_id is not None else None,
-        -1,
-    ):
-        if candidate_user_id is None:
-            continue
-        try:
-            delete_file_from_drive(user_id=int(candidate_user_id), drive_file_id=drive_file_id)
-            last_err = None
-            break
-        except Exception as e:
-            last_err = e
-            continue
-    if last_err is not None:
-        return _bad_request(f"Failed to delete file from Drive: {last_err}")
-
-    ok = delete_document_by_id(doc_id)
+    try:
+        await get_storage(doc.get("storage_backend")).delete(
+            user_ids=_drive_candidates(user, uploader_id, doc),
+            key=drive_file_id,
+        )
+    except Exception as e:
+        return _dependency_error(e, f"Failed to delete file from Drive: {e}")
+
+    ok = await run_in_bulkhead(WRITES, delete_document_by_id, doc_id)
     if not ok:
         return _not_found()
     return JSONResponse({"status": "deleted"})
@@ -336,13 +825,13 @@ async def replace_document_file(request: Request) -> Response:
     doc_id = int(request.path_params["doc_id"])
 
     try:
-        user = _require_owner_or_admin(request, doc_id=doc_id)
+        user = await run_in_bulkhead(WRITES, _require_owner_or_admin, request, doc_id=doc_id)
     except PermissionError:
         return _forbidden("Only the uploader (or admin) can replace the file for this document")
     if not user:
         return _not_found()
 
-    doc = get_document_by_id(doc_id)
+    doc = await run_in_bulkhead(WRITES, get_document_by_id, doc_id)
     if not doc:
         return _not_found()
 
@@ -381,40 +870,29 @@ async def replace_document_file(request: Request) -> Response:
         return _bad_request("File too large. Max size is 10MB")
 
     try:
-        uploader_id = get_document_uploader_id(doc_id)
+        uploader_id = await run_in_bulkhead(WRITES, get_document_uploader_id, doc_id)
         drive_file_id = str(doc["drive_file_id"])
-        last_err: Exception | None = None
-        drive = None
-        for candidate_user_id in (
-            int(user["id"]),
-            int(uploader_id) if uploader_id is not None else None,
-            -1,
-        ):
-            if candidate_user_id is None:
-                continue
-            try:
-                drive = update_file_content_in_drive(
-                    user_id=int(candidate_user_id),
-                    drive_file_id=drive_file_id,
-                    content_type=file_content_type,
-                    content=content,
-                )
-                last_err = None
-                break
-            except Exception as e:
-                last_err = e
-                continue
-        if last_err is not None or drive is None:
-            raise RuntimeError(str(last_err) if last_err is not None else "Drive update failed")
-    except RuntimeError as e:
-        return _bad_request(str(e))
+        drive = await get_storage(doc.get("storage_backend")).replace(
+            user_ids=_drive_candidates(user, uploader_id, doc),
+            key=drive_file_id,
+            content_type=file_content_type,
+            content=content,
+        )
+        if drive is None:
+            raise RuntimeError("Drive update failed")
+    except Exception as e:
+        return _dependency_error(e, str(e))
     web_view_link = (drive.get("web_view_link") or "").strip() or str(doc["web_view_link"])
 
-    updated = update_document_file_by_id(
+    updated = await run_in_bulkhead(
+        WRITES,
+        update_document_file_by_id,
         doc_id=doc_id,
         file_type=file_content_type,
         web_view_link=web_view_link,
         title=title,
+        drive_md5=drive.get("md5_checksum"),
+        drive_modified_at=drive.get("modified_time"),
     )
     if not updated:
         return _not_found()
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_drive_http_max_connections, get_drive_http_timeout_seconds, get_drive_max_retries
+from .circuit import get_breaker
+from .db import get_drive_oauth_token_for_user
+from .drive_quota import backoff_delay, get_scheduler
+from .metrics import incr
+
+
+_DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
+_API_BASE = "https://www.googleapis.com/drive/v3"
+_UPLOAD_BASE = "https://www.googleapis.com/upload/drive/v3"
+_FILE_FIELDS = "id, webViewLink, md5Checksum, modifiedTime"
+
+# Refresh access tokens a bit before Google expires them.
+_TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+_client: httpx.AsyncClient | None = None
+_tokens: dict[int, tuple[str, float]] = {}
+_token_locks: dict[int, asyncio.Lock] = {}
+_service_account_credentials = None
+
+
+class DriveHTTPError(RuntimeError):
+    def __init__(self, *, status: int, reason: str | None, message: str | None, retry_after: float | None = None):
+        super().__init__(f"Drive HTTP {status}: {reason or 'unknown'}. {message or ''}".strip())
+        self.status = status
+        self.reason = reason
+        self.message = message
+        self.retry_after = retry_after
+
+
+def get_client() -> httpx.AsyncClient:
+    # One pooled client per worker: keeps TLS connections to googleapis.com alive
+    # and lets a single event loop keep many Drive transfers in flight.
+    global _client
+    if _client is None or _client.is_closed:
+        max_connections = get_drive_http_max_connections()
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(get_drive_http_timeout_seconds(), connect=10),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _service_account_token() -> tuple[str, float]:
+    global _service_account_credentials
+
+    from google.auth.transport.requests import Request
+    from google.oauth2 import service_account
+
+    from .drive import _ensure_credentials_file
+
+    if _service_account_credentials is None:
+        _service_account_credentials = service_account.Credentials.from_service_account_file(
+            _ensure_credentials_file(),
+            scopes=_DRIVE_SCOPES,
+        )
+    creds = _service_account_credentials
+    creds.refresh(Request())
+    expires_at = time.time() + 3600
+    if creds.expiry is not None:
+        # google-auth stores expiry as naive UTC.
+        expires_at = creds.expiry.replace(tzinfo=timezone.utc).timestamp()
+    return str(creds.token), expires_at
+
+
+async def _refresh_access_token(user_id: int) -> tuple[str, float]:
+    # 1) Prefer OAuth (user account) so uploads work on personal Google Drive.
+    token = await run_in_threadpool(get_drive_oauth_token_for_user, user_id)
+    if token:
+        res = await get_client().post(
+            str(token["token_uri"]),
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": str(token["refresh_token"]),
+                "client_id": str(token["client_id"]),
+                "client_secret": str(token["client_secret"]),
+            },
+        )
+        if res.status_code >= 400:
+            raise RuntimeError(f"Failed to refresh Google OAuth token: HTTP {res.status_code} {res.text}".strip())
+        out = res.json()
+        return str(out["access_token"]), time.time() + float(out.get("expires_in") or 3600)
+
+    # 2) Fallback: service account.
+    if os.getenv("GOOGLE_CREDENTIALS_JSON"):
+        return await run_in_threadpool(_service_account_token)
+
+    raise RuntimeError("Google Drive is not connected for this user. Connect it via /api/drive/auth/url")
+
+
+def forget_token(user_id: int) -> None:
+    # The user's Drive connection changed (disconnected / reconnected another account).
+    _tokens.pop(user_id, None)
+
+
+async def get_access_token(user_id: int) -> str:
+    cached = _tokens.get(user_id)
+    if cached and cached[1] - _TOKEN_EXPIRY_MARGIN_SECONDS > time.time():
+        return cached[0]
+
+    lock = _token_locks.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        cached = _tokens.get(user_id)
+        if cached and cached[1] - _TOKEN_EXPIRY_MARGIN_SECONDS > time.time():
+            return cached[0]
+        try:
+            value = await _refresh_access_token(user_id)
+        except Exception as e:
+            raise RuntimeError(f"Failed to initialize Google Drive client. Inner error: {e}") from e
+        _tokens[user_id] = value
+        return value[0]
+
+
+def parse_drive_time(value: str | None) -> datetime | None:
+    # Drive returns RFC 3339 timestamps, e.g. 2026-01-11T10:00:00.000Z
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(res: httpx.Response) -> float | None:
+    value = res.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _error_from_response(res: httpx.Response, body: bytes | None = None) -> DriveHTTPError:
+    raw = body if body is not None else res.content
+    reason = None
+    message = None
+    try:
+        payload = json.loads(raw)
+        err = payload.get("error") if isinstance(payload, dict) else None
+        message = err.get("message") if isinstance(err, dict) else None
+        details = err.get("errors") if isinstance(err, dict) else None
+        if isinstance(details, list) and details and isinstance(details[0], dict):
+            reason = details[0].get("reason")
+    except Exception:
+        message = raw.decode("utf-8", errors="replace") if raw else None
+    return DriveHTTPError(status=res.status_code, reason=reason, message=message, retry_after=_parse_retry_after(res))
+
+
+def _is_retryable(e: DriveHTTPError) -> bool:
+    return is_rate_limit_error(e) or e.status in {500, 502, 503, 504}
+
+
+async def _request(method: str, url: str, *, user_id: int, stream: bool = False, **kwargs) -> httpx.Response:
+    # Every Drive call goes through the circuit breaker and the quota scheduler, retries rate-limit/5xx
+    # responses with jittered backoff (honoring Retry-After) and refreshes the
+    # access token once on 401.
+    scheduler = get_scheduler()
+    breaker = get_breaker("drive")
+    headers = dict(kwargs.pop("headers", None) or {})
+    max_retries = get_drive_max_retries()
+    refreshed = False
+    attempt = 0
+    while True:
+        breaker.before_call()
+        await scheduler.acquire()
+        headers["Authorization"] = f"Bearer {await get_access_token(user_id)}"
+        request = get_client().build_request(method, url, headers=headers, **kwargs)
+        try:
+            res = await get_client().send(request, stream=stream)
+        except httpx.TransportError:
+            # Timeouts and connection errors count against the breaker.
+            breaker.record_failure()
+            raise
+        if res.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if res.status_code < 400:
+            return res
+
+        body = await res.aread()
+        await res.aclose()
+        if res.status_code == 401 and not refreshed:
+            # Token revoked/expired early: drop it and retry once with a fresh one.
+            _tokens.pop(user_id, None)
+            refreshed = True
+            continue
+
+        err = _error_from_response(res, body)
+        if not _is_retryable(err) or attempt >= max_retries:
+            if is_rate_limit_error(err):
+                incr("drive_quota.rate_limited_final")
+            raise err
+
+        delay = backoff_delay(attempt, err.retry_after)
+        if is_rate_limit_error(err):
+            incr("drive_quota.rate_limited")
+            await scheduler.pause(delay)
+        incr("drive_quota.retries")
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def get_file_metadata(*, user_id: int, drive_file_id: str, fields: str = "id, name, mimeType, webViewLink") -> dict:
+    res = await _request(
+        "GET",
+        f"{_API_BASE}/files/{drive_file_id}",
+        user_id=user_id,
+        params={"fields": fields, "supportsAllDrives": "true"},
+    )
+    return res.json()
+
+
+async def _ensure_folder_writable(*, user_id: int, folder_id: str) -> None:
+    try:
+        folder = await get_file_metadata(
+            user_id=user_id,
+            drive_file_id=folder_id,
+            fields="id, name, mimeType, driveId, capabilities(canAddChildren)",
+        )
+    except DriveHTTPError as e:
+        if is_rate_limit_error(e):
+            raise
+        if e.status in {403, 404}:
+            raise RuntimeError(
+                "Google Drive folder access check failed. "
+                "Make sure the connected Google account has access to the DRIVE_FOLDER_ID folder (and the Shared Drive if applicable). "
+                f"Drive reason: {e.reason or 'unknown'}. Message: {e.message or 'unknown'}"
+            ) from e
+        raise
+
+    caps = folder.get("capabilities") if isinstance(folder, dict) else None
+    if isinstance(caps, dict) and caps.get("canAddChildren") is False:
+        raise RuntimeError(
+            "Google Drive upload failed: the connected Google account is not allowed to upload into the configured folder. "
+            "The account needs at least Contributor/Editor (Shared Drive) or Editor (My Drive folder) permissions on that folder."
+        )
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    if not isinstance(e, DriveHTTPError):
+        return False
+    if e.status == 429:
+        return True
+    return e.status == 403 and e.reason in {"userRateLimitExceeded", "rateLimitExceeded"}
+
+
+def _is_storage_quota_error(e: DriveHTTPError) -> bool:
+    text = f"{e.reason or ''} {e.message or ''}"
+    return "storageQuotaExceeded" in text or "do not have storage quota" in text
+
+
+async def upload_file_to_drive(*, user_id: int, filename: str, content_type: str, content: bytes, folder_id: str) -> dict:
+    await _ensure_folder_writable(user_id=user_id, folder_id=folder_id)
+
+    boundary = secrets.token_hex(16)
+    metadata = json.dumps({"name": filename, "parents": [folder_id]}).encode("utf-8")
+    body = b"".join(
+        [
+            f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode("ascii"),
+            metadata,
+            f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n\r\n".encode("ascii"),
+            content,
+            f"\r\n--{boundary}--\r\n".encode("ascii"),
+        ]
+    )
+    try:
+        res = await _request(
+            "POST",
+            f"{_UPLOAD_BASE}/files",
+            user_id=user_id,
+            params={"uploadType": "multipart", "fields": _FILE_FIELDS, "supportsAllDrives": "true"},
+            headers={"Content-Type": f"multipart/related; boundary={boundary}"},
+            content=body,
+        )
+    except DriveHTTPError as e:
+        if is_rate_limit_error(e):
+            raise
+        if _is_storage_quota_error(e):
+            raise RuntimeError(
+                "Google Drive upload failed: Service Accounts do not have storage quota. "
+                "Use a Shared Drive (Google Workspace) and add the service account as a member, "
+                "then set DRIVE_FOLDER_ID to a folder inside that Shared Drive."
+            ) from e
+        if e.status in {403, 404}:
+            raise RuntimeError(
+                "Google Drive upload failed: the connected Google account does not have access to the configured folder. "
+                "Make sure the account has permission to the DRIVE_FOLDER_ID folder (share the folder with that email), "
+                "or change DRIVE_FOLDER_ID to a folder the account owns. "
+                f"Drive reason: {e.reason or 'unknown'}. Message: {e.message or 'unknown'}"
+            ) from e
+        raise
+    created = res.json()
+    return {
+        "drive_file_id": created.get("id"),
+        "web_view_link": created.get("webViewLink"),
+        "md5_checksum": created.get("md5Checksum"),
+        "modified_time": parse_drive_time(created.get("modifiedTime")),
+    }
+
+
+async def update_file_content_in_drive(*, user_id: int, drive_file_id: str, content_type: str, content: bytes) -> dict:
+    try:
+        res = await _request(
+            "PATCH",
+            f"{_UPLOAD_BASE}/files/{drive_file_id}",
+            user_id=user_id,
+            params={"uploadType": "media", "fields": _FILE_FIELDS, "supportsAllDrives": "true"},
+            headers={"Content-Type": content_type},
+            content=content,
+        )
+    except DriveHTTPError as e:
+        if is_rate_limit_error(e):
+            # Keep the status/retry_after so handlers answer 503 + Retry-After.
+            raise
+        if _is_storage_quota_error(e):
+            raise RuntimeError(
+                "Google Drive update failed: Service Accounts do not have storage quota. "
+                "Use a Shared Drive (Google Workspace) and add the service account as a member."
+            ) from e
+        if e.status in {403, 404}:
+            raise RuntimeError(
+                "Google Drive update failed: the connected Google account does not have permission to modify this file. "
+                "Ensure the account that connected Drive is allowed to access/edit the file and folder."
+            ) from e
+        raise
+    updated = res.json()
+    return {
+        "drive_file_id": updated.get("id"),
+        "web_view_link": updated.get("webViewLink"),
+        "md5_checksum": updated.get("md5Checksum"),
+        "modified_time": parse_drive_time(updated.get("modifiedTime")),
+    }
+
+
+async def delete_file_from_drive(*, user_id: int, drive_file_id: str) -> None:
+    await _request(
+        "DELETE",
+        f"{_API_BASE}/files/{drive_file_id}",
+        user_id=user_id,
+        params={"supportsAllDrives": "true"},
+    )
+
+
+async def get_start_page_token(*, user_id: int) -> str:
+    res = await _request(
+        "GET",
+        f"{_API_BASE}/changes/startPageToken",
+        user_id=user_id,
+        params={"supportsAllDrives": "true"},
+    )
+    return str(res.json()["startPageToken"])
+
+
+async def list_changes(*, user_id: int, page_token: str, page_size: int = 1000) -> dict:
+    res = await _request(
+        "GET",
+        f"{_API_BASE}/changes",
+        user_id=user_id,
+        params={
+            "pageToken": page_token,
+            "pageSize": str(page_size),
+            "supportsAllDrives": "true",
+            "includeItemsFromAllDrives": "true",
+            "includeRemoved": "true",
+            "fields": "nextPageToken, newStartPageToken, "
+            "changes(fileId, removed, file(id, trashed, md5Checksum, modifiedTime, webViewLink))",
+        },
+    )
+    return res.json()
+
+
+async def iter_file_from_drive(*, user_id: int, drive_file_id: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    # Streams get_media without buffering the whole file; closing/cancelling the
+    # iterator releases the pooled connection.
+    res = await _request(
+        "GET",
+        f"{_API_BASE}/files/{drive_file_id}",
+        user_id=user_id,
+        stream=True,
+        params={"alt": "media", "supportsAllDrives": "true"},
+    )
+    try:
+        async for chunk in res.aiter_bytes(chunk_size):
+            yield chunk
+    finally:
+        await res.aclose()
+
+
+async def download_file_from_drive(*, user_id: int, drive_file_id: str) -> bytes:
+    chunks = []
+    async for chunk in iter_file_from_drive(user_id=user_id, drive_file_id=drive_file_id):
+        chunks.append(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+import httpx
+
+from .circuit import CircuitOpenError
+from .config import get_drive_credential_negative_ttl_seconds
+from .drive_async import is_rate_limit_error
+from .metrics import incr
+
+
+T = TypeVar("T")
+
+# Remembers which credential (user_id, -1 = service account) last worked for a
+# Drive file or folder, so we stop paying token refreshes + failed API calls
+# on every request walking the (current user, uploader, service account) chain.
+# Both maps are bounded; the oldest entries go first (dicts keep insertion order).
+_MAX_ENTRIES = 10_000
+_lock = threading.Lock()
+_preferred: dict[str, int] = {}
+_failures: dict[tuple[str, int], tuple[float, Exception]] = {}
+
+
+def _record_success(key: str, user_id: int) -> None:
+    with _lock:
+        _preferred.pop(key, None)
+        _preferred[key] = user_id
+        _failures.pop((key, user_id), None)
+        while len(_preferred) > _MAX_ENTRIES:
+            del _preferred[next(iter(_preferred))]
+
+
+def _record_failure(key: str, user_id: int, error: Exception) -> None:
+    now = time.monotonic()
+    expires_at = now + get_drive_credential_negative_ttl_seconds()
+    with _lock:
+        _failures.pop((key, user_id), None)
+        _failures[(key, user_id)] = (expires_at, error)
+        if _preferred.get(key) == user_id:
+            _preferred.pop(key, None)
+        if len(_failures) > _MAX_ENTRIES:
+            for failure_key in [k for k, (expiry, _) in _failures.items() if expiry <= now]:
+                del _failures[failure_key]
+            while len(_failures) > _MAX_ENTRIES:
+                del _failures[next(iter(_failures))]
+
+
+def _cached_failure(key: str, user_id: int) -> Exception | None:
+    with _lock:
+        entry = _failures.get((key, user_id))
+        if not entry:
+            return None
+        expires_at, error = entry
+        if expires_at <= time.monotonic():
+            _failures.pop((key, user_id), None)
+            return None
+        return error
+
+
+def forget(key: str) -> None:
+    with _lock:
+        _preferred.pop(key, None)
+        for failure_key in [k for k in _failures if k[0] == key]:
+            _failures.pop(failure_key, None)
+
+
+def forget_user(user_id: int) -> None:
+    # The user's Drive connection changed: what worked or failed with it no longer applies.
+    with _lock:
+        for key in [k for k, preferred in _preferred.items() if preferred == user_id]:
+            _preferred.pop(key, None)
+        for failure_key in [k for k in _failures if k[1] == user_id]:
+            _failures.pop(failure_key, None)
+
+
+def _is_dependency_failure(e: Exception) -> bool:
+    # Rate limits (403 userRateLimitExceeded / 429) are quota, not a broken credential.
+    if isinstance(e, (CircuitOpenError, httpx.TransportError)) or is_rate_limit_error(e):
+        return True
+    status = getattr(e, "status", None)
+    return isinstance(status, int) and status >= 500
+
+
+def _ordered_candidates(key: str, candidates: Iterable[int | None]) -> tuple[list[int], int | None]:
+    ordered: list[int] = []
+    for candidate in candidates:
+        if candidate is None or int(candidate) in ordered:
+            continue
+        ordered.append(int(candidate))
+
+    with _lock:
+        preferred = _preferred.get(key)
+    if preferred is not None and preferred in ordered:
+        ordered.remove(preferred)
+        ordered.insert(0, preferred)
+    return ordered, preferred
+
+
+def _record_hit(key: str, user_id: int, *, attempts: int, preferred: int | None) -> None:
+    _record_success(key, user_id)
+    if attempts == 1 and user_id == preferred:
+        incr("drive_credentials.preferred_hits")
+    elif attempts == 1:
+        incr("drive_credentials.first_candidate_hits")
+    else:
+        incr("drive_credentials.fallback_hits")
+        incr("drive_credentials.fallback_attempts", attempts - 1)
+
+
+async def acall_with_drive_credentials(
+    *, key: str, candidates: Iterable[int | None], operation: Callable[[int], Awaitable[T]]
+) -> T:
+    ordered, preferred = _ordered_candidates(key, candidates)
+
+    last_err: Exception | None = None
+    attempts = 0
+    for user_id in ordered:
+        cached = _cached_failure(key, user_id)
+        if cached is not None:
+            incr("drive_credentials.negative_cache_skips")
+            last_err = last_err or cached
+            continue
+
+        attempts += 1
+        try:
+            result = await operation(user_id)
+        except Exception as e:
+            if _is_dependency_failure(e):
+                # Drive itself is down/slow, not this credential: another credential
+                # won't help and the negative cache must not remember it.
+                raise
+            _record_failure(key, user_id, e)
+            last_err = e
+            continue
+
+        _record_hit(key, user_id, attempts=attempts, preferred=preferred)
+        return result
+
+    incr("drive_credentials.exhausted")
+    raise last_err if last_err is not None else RuntimeError("No Drive credential available")
@@ -7,7 +7,7 @@ from urllib.parse import urlencode
 from datetime import datetime, timezone
 
 from starlette.requests import Request
-from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.responses import RedirectResponse, Response
 
 from .auth import get_bearer_token, require_role
 from .config import get_frontend_base_url, get_google_oauth_client_json, get_public_base_url
@@ -20,6 +20,8 @@ from .db import (
     get_drive_oauth_token_meta_for_user,
     upsert_drive_oauth_token_for_user,
 )
+from .identity_cache import forget_drive_user
+from .responses import JSONResponse
 
 
 _DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
@@ -174,6 +176,8 @@ def drive_auth_callback(request: Request) -> Response:
         client_id=client_id,
         client_secret=client_secret,
     )
+    # Possibly another account now: stop using the old token and credential memory.
+    forget_drive_user(int(user["id"]))
 
     # After success, redirect to frontend if configured, otherwise to docs.
     qs = urlencode({"drive": "connected", "at": datetime.now(timezone.utc).isoformat()})
@@ -202,4 +206,5 @@ def drive_status(request: Request) -> Response:
 def drive_disconnect(request: Request) -> Response:
     user = require_role(request, {"staf", "sekretaria", "admin"})
     ok = delete_drive_oauth_token_for_user(int(user["id"]))
+    forget_drive_user(int(user["id"]))
     return JSONResponse({"connected": False, "disconnected": bool(ok)})
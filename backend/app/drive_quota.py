@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import sqlite3
+import time
+from typing import Iterator
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import (
+    get_drive_backoff_base_seconds,
+    get_drive_backoff_max_seconds,
+    get_drive_quota_burst,
+    get_drive_quota_rate_per_second,
+)
+from .metrics import incr, set_gauge
+
+
+# Token bucket in front of every Drive API call. The bucket itself lives in the
+# shared SQLite state file (ratelimit.py), so DRIVE_QUOTA_RATE_PER_SECOND is the
+# rate for all uvicorn workers together, not per worker; if that file stays
+# locked a worker falls back to a bucket of its own for that token. Within a
+# worker, waiters are served by priority (interactive before background), FIFO
+# within a priority. A Retry-After/rate-limit response pauses the shared bucket,
+# so a bulk job backs off instead of burning the per-user quota that interactive
+# uploads need.
+
+_SHARED_KEY = "drive_quota"
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("drive_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def background_priority() -> Iterator[None]:
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class DriveQuotaScheduler:
+    def __init__(self, *, rate_per_second: float, burst: float, shared: bool = True):
+        self.rate = max(rate_per_second, 0.001)
+        self.burst = max(burst, 1.0)
+        self.shared = shared
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.loop = asyncio.get_running_loop()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+        # Tokens taken from the bucket whose waiter was cancelled before it ran.
+        self._held = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _take_local(self) -> float | None:
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+    async def _take(self) -> float | None:
+        # None when a token was taken, otherwise seconds until one is available.
+        if self._held:
+            self._held -= 1
+            return None
+        if not self.shared:
+            return self._take_local()
+        from .ratelimit import take_shared_token
+
+        try:
+            return await run_in_threadpool(take_shared_token, _SHARED_KEY, rate_per_second=self.rate, burst=self.burst)
+        except sqlite3.Error:
+            incr("drive_quota.shared_state_errors")
+            return self._take_local()
+
+    def _publish_depth(self) -> None:
+        depth = {name: 0 for name in _PRIORITY_NAMES.values()}
+        for priority, _, fut in self._waiters:
+            if not fut.done():
+                depth[_PRIORITY_NAMES.get(priority, str(priority))] += 1
+        for name, value in depth.items():
+            set_gauge(f"drive_quota.queue_depth.{name}", value)
+
+    async def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        incr("drive_quota.pauses")
+        if self.shared:
+            from .ratelimit import drain_shared_bucket
+
+            try:
+                await run_in_threadpool(
+                    drain_shared_bucket, _SHARED_KEY, seconds=seconds, rate_per_second=self.rate, burst=self.burst
+                )
+            except sqlite3.Error:
+                incr("drive_quota.shared_state_errors")
+
+    async def acquire(self, priority: int | None = None) -> None:
+        priority = current_priority() if priority is None else priority
+        name = _PRIORITY_NAMES.get(priority, str(priority))
+        if not self._waiters and time.monotonic() >= self.paused_until and await self._take() is None:
+            incr(f"drive_quota.acquired.{name}")
+            return
+
+        fut = self.loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._publish_depth()
+        if self._pump is None or self._pump.done():
+            self._pump = self.loop.create_task(self._run())
+
+        started = time.monotonic()
+        try:
+            await fut
+        except BaseException:
+            if fut.done() and not fut.cancelled():
+                # Granted, but the caller was cancelled before using it: keep the token.
+                self._held += 1
+            else:
+                fut.cancel()
+            incr(f"drive_quota.cancelled.{name}")
+            raise
+        finally:
+            self._publish_depth()
+        incr(f"drive_quota.acquired.{name}")
+        incr(f"drive_quota.waits.{name}")
+        incr(f"drive_quota.wait_seconds.{name}", time.monotonic() - started)
+
+    def _prune(self) -> None:
+        # Drops waiters cancelled while queued.
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+    async def _run(self) -> None:
+        while True:
+            self._prune()
+            if not self._waiters:
+                break
+
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            wait = await self._take()
+            if wait is not None:
+                await asyncio.sleep(wait)
+                continue
+
+            # The head may have been cancelled while the token was being taken.
+            self._prune()
+            if not self._waiters:
+                self._held += 1
+                break
+            _, _, fut = heapq.heappop(self._waiters)
+            fut.set_result(None)
+        self._publish_depth()
+
+
+_scheduler: DriveQuotaScheduler | None = None
+
+
+def get_scheduler() -> DriveQuotaScheduler:
+    global _scheduler
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler.loop is not loop:
+        _scheduler = DriveQuotaScheduler(rate_per_second=get_drive_quota_rate_per_second(), burst=get_drive_quota_burst())
+    return _scheduler
+
+
+def backoff_delay(attempt: int, retry_after: float | None) -> float:
+    # Full-jitter exponential backoff; Retry-After (when Drive sends it) is the floor.
+    base = get_drive_backoff_base_seconds()
+    delay = random.uniform(0, min(get_drive_backoff_max_seconds(), base * (2**attempt)))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, base)
+    return delay
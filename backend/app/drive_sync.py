@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from . import drive_async
+from .db import get_documents_drive_info, get_drive_sync_page_token, set_document_drive_state, set_drive_sync_page_token
+from .drive_quota import background_priority
+from .metrics import incr
+
+
+# Reconciles academic_documents with Drive through the changes feed
+# (changes.list + stored page token), so the cost of a pass is proportional to
+# the number of Drive changes, not to the catalog size.
+#
+# `source` is anything with async get_start_page_token(user_id=...) and
+# list_changes(user_id=..., page_token=...) — the drive_async module in
+# production, or a local fake Drive.
+
+
+def _next_state(row: dict, change: dict) -> tuple[str, str | None, object]:
+    file = change.get("file") or {}
+    if change.get("removed"):
+        return "deleted", None, None
+    if file.get("trashed"):
+        return "trashed", None, None
+
+    md5 = file.get("md5Checksum")
+    modified_at = drive_async.parse_drive_time(file.get("modifiedTime"))
+    known_md5 = row.get("drive_md5")
+    known_modified_at = row.get("drive_modified_at")
+
+    # The stored checksum/mtime are what we last wrote through the API; only
+    # record new ones for rows we have never seen (legacy rows).
+    if known_md5 and md5 and md5 != known_md5:
+        return "checksum_changed", None, None
+    if known_modified_at and modified_at and modified_at > known_modified_at:
+        return "modified", None, None
+    return "ok", (md5 if not known_md5 else None), (modified_at if not known_modified_at else None)
+
+
+async def _apply_changes(changes: list[dict], stats: dict) -> None:
+    by_file: dict[str, dict] = {}
+    for change in changes:
+        file_id = change.get("fileId")
+        if file_id:
+            by_file[str(file_id)] = change
+
+    rows = await run_in_threadpool(get_documents_drive_info, list(by_file))
+    for file_id, row in rows.items():
+        change = by_file[file_id]
+        state, md5, modified_at = _next_state(row, change)
+        stats["matched"] += 1
+        if state == row.get("drive_state") and md5 is None and modified_at is None:
+            continue
+
+        web_view_link = (change.get("file") or {}).get("webViewLink") if state == "ok" else None
+        await run_in_threadpool(
+            set_document_drive_state,
+            doc_id=int(row["id"]),
+            drive_state=state,
+            drive_md5=md5,
+            drive_modified_at=modified_at,
+            web_view_link=web_view_link,
+        )
+        stats["updated"] += 1
+        if state != "ok":
+            stats["flagged"] += 1
+            incr(f"drive_sync.flagged.{state}")
+
+
+async def sync_drive_changes(*, user_id: int, source=drive_async) -> dict:
+    # Reconciliation is never urgent: queue behind interactive Drive calls.
+    with background_priority():
+        return await _sync_drive_changes(user_id=user_id, source=source)
+
+
+async def _sync_drive_changes(*, user_id: int, source) -> dict:
+    stats = {"changes": 0, "matched": 0, "updated": 0, "flagged": 0, "initialized": False}
+
+    page_token = await run_in_threadpool(get_drive_sync_page_token, user_id)
+    if not page_token:
+        # First run: start following the feed from "now".
+        start = await source.get_start_page_token(user_id=user_id)
+        await run_in_threadpool(set_drive_sync_page_token, user_id=user_id, page_token=start)
+        stats["initialized"] = True
+        return stats
+
+    while True:
+        out = await source.list_changes(user_id=user_id, page_token=page_token)
+        changes = out.get("changes") or []
+        stats["changes"] += len(changes)
+        incr("drive_sync.changes", len(changes))
+        await _apply_changes(changes, stats)
+
+        # Persist after each page so a crash resumes where it stopped.
+        next_token = out.get("nextPageToken") or out.get("newStartPageToken")
+        if next_token:
+            page_token = str(next_token)
+            await run_in_threadpool(set_drive_sync_page_token, user_id=user_id, page_token=page_token)
+        if not out.get("nextPageToken"):
+            break
+
+    incr("drive_sync.passes")
+    return stats
+
+
+async def run_drive_sync_forever(*, user_id: int, interval_seconds: float) -> None:
+    while True:
+        try:
+            await sync_drive_changes(user_id=user_id)
+        except Exception:
+            incr("drive_sync.errors")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+
+from .config import get_drive_throttle_cooldown_seconds, get_drive_upload_policy, get_drive_upload_targets
+from .metrics import incr
+
+
+# Routes uploads across the configured Drive folders/credentials
+# (DRIVE_UPLOAD_TARGETS) so peak weeks don't hit one account's rate limit or
+# one folder's item cap. Returns every target, best first, so callers can fail
+# over on rate-limit responses.
+
+_lock = threading.Lock()
+_round_robin = itertools.count()
+_throttled_at: dict[tuple[str, int | None], float] = {}
+
+
+def _target_key(target: dict) -> tuple[str, int | None]:
+    return str(target["folder_id"]), target.get("user_id")
+
+
+def mark_throttled(target: dict) -> None:
+    incr("drive_targets.throttled")
+    with _lock:
+        _throttled_at[_target_key(target)] = time.monotonic()
+
+
+def _is_cooling_down(target: dict, now: float) -> bool:
+    throttled_at = _throttled_at.get(_target_key(target))
+    return throttled_at is not None and now - throttled_at < get_drive_throttle_cooldown_seconds()
+
+
+def choose_targets(category: str | None = None) -> list[dict]:
+    targets = get_drive_upload_targets()
+    policy = get_drive_upload_policy()
+    now = time.monotonic()
+
+    with _lock:
+        if policy == "least_throttled":
+            ordered = sorted(targets, key=lambda t: _throttled_at.get(_target_key(t), float("-inf")))
+        else:
+            start = next(_round_robin) % len(targets)
+            ordered = targets[start:] + targets[:start]
+            if policy == "category" and category:
+                # Stable sort: targets for this category first, others remain as failover.
+                ordered.sort(key=lambda t: category not in t["categories"])
+
+        # Targets that were rate limited recently go last.
+        ordered.sort(key=lambda t: _is_cooling_down(t, now))
+    return ordered
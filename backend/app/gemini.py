@@ -4,6 +4,9 @@ import base64
 
 import httpx
 
+from .circuit import get_breaker
+from .config import get_gemini_timeout_seconds
+
 
 def generate_summary(*, api_key: str, title: str, category: str, description: str | None, tags: str | None, mime_type: str, file_bytes: bytes) -> str:
     # Keep prompt minimal and Albanian-friendly.
@@ -40,11 +43,20 @@ def generate_summary(*, api_key: str, title: str, category: str, description: st
         "generationConfig": {"temperature": 0.2},
     }
 
+    breaker = get_breaker("gemini")
+    breaker.before_call()
     try:
-        with httpx.Client(timeout=90) as client:
+        with httpx.Client(timeout=get_gemini_timeout_seconds()) as client:
             res = client.post(url, json=payload)
+        if res.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
         res.raise_for_status()
         out = res.json()
+    except httpx.TransportError as e:
+        breaker.record_failure()
+        raise RuntimeError(f"Gemini request failed: {e}") from e
     except httpx.HTTPStatusError as e:
         body = None
         try:
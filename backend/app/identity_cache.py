@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from . import db
+from .config import get_identity_cache_ttl_seconds
+from .metrics import incr, set_gauge
+
+
+# In-process cache of login identities (user row + whitelist flag) and of the
+# allowed-emails list. Writes in db.py NOTIFY on IDENTITY_CHANNEL in the same
+# transaction; every worker LISTENs and drops the affected entries. The cache is
+# only served while the listener is connected (a dropped connection could miss
+# notifications), and entries also expire after IDENTITY_CACHE_TTL_SECONDS.
+
+_lock = threading.Lock()
+_identities: dict[str, tuple[float, dict]] = {}
+_allowed_list: tuple[float, list[dict]] | None = None
+_generation = 0
+_listening = False
+
+
+def _enabled() -> bool:
+    return _listening and get_identity_cache_ttl_seconds() > 0
+
+
+def clear() -> None:
+    global _allowed_list, _generation
+    with _lock:
+        _identities.clear()
+        _allowed_list = None
+        _generation += 1
+
+
+def forget_drive_user(user_id: int) -> None:
+    from .drive_async import forget_token
+    from .drive_credentials import forget_user
+
+    forget_token(user_id)
+    forget_user(user_id)
+
+
+def invalidate(payload: str) -> None:
+    global _allowed_list, _generation
+    kind, _, email = payload.partition(":")
+    if kind == "drive":
+        # "drive:<user id>": that user's Drive connection changed in some worker.
+        forget_drive_user(int(email))
+        return
+    with _lock:
+        _generation += 1
+        if not email:
+            _identities.clear()
+            _allowed_list = None
+            return
+        _identities.pop(email, None)
+        if kind == "allowed":
+            _allowed_list = None
+    incr("identity_cache.invalidations")
+
+
+def get_login_identity(email: str) -> dict:
+    now = time.monotonic()
+    if _enabled():
+        with _lock:
+            entry = _identities.get(email)
+            generation = _generation
+        if entry is not None and entry[0] > now:
+            incr("identity_cache.hits")
+            return entry[1]
+    else:
+        generation = None
+
+    incr("identity_cache.misses")
+    identity = db.get_login_identity(email)
+    if generation is not None:
+        with _lock:
+            # Skip the store if an invalidation arrived while we were querying.
+            if generation == _generation:
+                _identities[email] = (now + get_identity_cache_ttl_seconds(), identity)
+    return identity
+
+
+def list_allowed_emails() -> list[dict]:
+    global _allowed_list
+    now = time.monotonic()
+    if _enabled():
+        with _lock:
+            entry = _allowed_list
+            generation = _generation
+        if entry is not None and entry[0] > now:
+            incr("identity_cache.hits")
+            return entry[1]
+    else:
+        generation = None
+
+    incr("identity_cache.misses")
+    items = db.list_allowed_emails()
+    if generation is not None:
+        with _lock:
+            if generation == _generation:
+                _allowed_list = (now + get_identity_cache_ttl_seconds(), items)
+    return items
+
+
+async def run_listener_forever(*, reconnect_seconds: float = 5.0) -> None:
+    global _listening
+    import psycopg
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(db.get_conninfo(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {db.IDENTITY_CHANNEL}")
+                # Anything cached before this point may have missed a notification.
+                clear()
+                _listening = True
+                set_gauge("identity_cache.listening", 1)
+                async for notify in conn.notifies():
+                    invalidate(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            incr("identity_cache.listener_errors")
+        finally:
+            _listening = False
+            set_gauge("identity_cache.listening", 0)
+        await asyncio.sleep(reconnect_seconds)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from .metrics import incr
+
+
+# Shared plumbing for the in-process indexes (catalog, similarity, suggest).
+# Each keeps an index-specific `_refresh` that polls rows changed since its
+# newest updated_at; this module owns the dirty flag that writes in this worker
+# set, the lock that serializes refreshes, and the background refresh loop.
+#
+# The poll overlaps the last OVERLAP_MICROS, so rows committed late with an
+# older updated_at are still seen; re-applying an unchanged row is a no-op.
+
+OVERLAP_MICROS = 5_000_000
+
+
+def micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def poll_since(max_updated: int) -> datetime:
+    return datetime.fromtimestamp((max_updated - OVERLAP_MICROS) / 1_000_000, tz=timezone.utc)
+
+
+def drop_deleted(index: Any, indexed: dict[int, Any]) -> None:
+    # Deleted rows don't show up in the updated_at poll; the row count catches them.
+    from .db import count_documents, list_document_ids
+
+    with index.lock:
+        count = len(indexed)
+    if count == count_documents():
+        return
+    live = set(list_document_ids())
+    with index.lock:
+        for doc_id in [d for d in indexed if d not in live]:
+            index.remove(doc_id)
+
+
+class Refresher:
+    def __init__(self, name: str, refresh: Callable[..., None]):
+        self.name = name
+        self._refresh = refresh
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()
+
+    def mark_dirty(self) -> None:
+        # Called after writes in this worker so the next query refreshes first.
+        self._dirty.set()
+
+    def is_dirty(self) -> bool:
+        return self._dirty.is_set()
+
+    def refresh(self, **options: Any) -> None:
+        with self._lock:
+            self._dirty.clear()
+            self._refresh(**options)
+
+    def refresh_if_dirty(self) -> None:
+        if self._dirty.is_set():
+            self.refresh()
+
+    async def run_forever(self, *, interval_seconds: float, **options: Any) -> None:
+        from starlette.concurrency import run_in_threadpool
+
+        while True:
+            try:
+                await run_in_threadpool(self.refresh, **options)
+            except Exception:
+                incr(f"{self.name}.refresh_errors")
+            await asyncio.sleep(interval_seconds)
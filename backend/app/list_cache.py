@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Hashable
+
+from .config import get_list_cache_max_entries, get_list_cache_ttl_seconds
+from .metrics import incr, set_gauge
+from .tags import parse_tags
+
+
+# Bounded LRU of document list pages keyed by the normalized filter tuple
+# (filters + page + page_size + fields). An entry holds the page rows together
+# with the list version they were read at, so ETags stay consistent with the
+# cached body.
+#
+# Writes in db.py call invalidate_document() with the row's images (before
+# and/or after the change). An entry is dropped when any image could belong to
+# its filtered set (inserts/removals shift every page of that set) or when the
+# page itself contains the row. Other workers see the change after the TTL.
+#
+# A reader takes generation() before querying and hands it to put(); put()
+# drops the rows when an invalidation since then could touch them, so a page
+# read just before a write can't be cached after that write's invalidation.
+
+_lock = threading.Lock()
+_entries: OrderedDict[Hashable, tuple[float, dict, tuple, list[dict]]] = OrderedDict()
+_RECENT_WRITES = 256
+_generation = 0
+# (generation, doc_id, images) of the latest invalidations; None clears everything.
+_recent: deque[tuple[int, int | None, tuple[dict, ...]]] = deque(maxlen=_RECENT_WRITES)
+_hits = 0
+_misses = 0
+
+
+def _publish() -> None:
+    total = _hits + _misses
+    set_gauge("list_cache.entries", len(_entries))
+    set_gauge("list_cache.hit_rate", round(_hits / total, 4) if total else 0.0)
+
+
+def get(key: Hashable) -> tuple[tuple, list[dict]] | None:
+    global _hits, _misses
+    if get_list_cache_ttl_seconds() <= 0:
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            _hits += 1
+            incr("list_cache.hits")
+            _publish()
+            return entry[2], entry[3]
+        if entry is not None:
+            del _entries[key]
+        _misses += 1
+        incr("list_cache.misses")
+        _publish()
+    return None
+
+
+def generation() -> int:
+    with _lock:
+        return _generation
+
+
+def _written_since(read_generation: int, filters: dict, rows: list[dict]) -> bool:
+    if read_generation >= _generation:
+        return False
+    if not _recent or _recent[0][0] > read_generation + 1:
+        # Older than the write log: assume the worst.
+        return True
+    for gen, doc_id, images in _recent:
+        if gen <= read_generation:
+            continue
+        if doc_id is None or any(_could_match(filters, image) for image in images):
+            return True
+        if any(row.get("id") == doc_id for row in rows):
+            return True
+    return False
+
+
+def put(key: Hashable, *, filters: dict, version: tuple, rows: list[dict], generation: int) -> None:
+    ttl = get_list_cache_ttl_seconds()
+    if ttl <= 0:
+        return
+    with _lock:
+        if _written_since(generation, filters, rows):
+            incr("list_cache.stale_puts")
+            return
+        _entries[key] = (time.monotonic() + ttl, filters, version, rows)
+        _entries.move_to_end(key)
+        while len(_entries) > get_list_cache_max_entries():
+            _entries.popitem(last=False)
+        _publish()
+
+
+def _record_write(doc_id: int | None, images: tuple[dict, ...]) -> None:
+    global _generation
+    _generation += 1
+    _recent.append((_generation, doc_id, images))
+
+
+def clear() -> None:
+    with _lock:
+        _record_write(None, ())
+        _entries.clear()
+        _publish()
+
+
+def _could_match(filters: dict, image: dict) -> bool:
+    # Mirrors _document_filters_sql; anything we can't evaluate counts as a match.
+    try:
+        if filters.get("category") and image["category"] != filters["category"]:
+            return False
+        if filters.get("status") and image["status"] != filters["status"]:
+            return False
+        query = filters.get("query")
+        if query and "%" not in query and "_" not in query and query.lower() not in str(image["title"]).lower():
+            return False
+        created_at = image["created_at"]
+        if filters.get("from_dt") is not None and created_at < filters["from_dt"]:
+            return False
+        if filters.get("to_dt") is not None and created_at > filters["to_dt"]:
+            return False
+        tags = filters.get("tags")
+        if tags:
+            image_tags = set(parse_tags(image["tags"]))
+            if filters.get("tags_match") == "any" and not image_tags.intersection(tags):
+                return False
+            if filters.get("tags_match") != "any" and not image_tags.issuperset(tags):
+                return False
+    except (KeyError, TypeError):
+        return True
+    return True
+
+
+def invalidate_document(doc_id: int, images: list[dict] | tuple[dict, ...] = ()) -> None:
+    with _lock:
+        _record_write(doc_id, tuple(images))
+        stale = [
+            key
+            for key, (_, filters, _, rows) in _entries.items()
+            if any(_could_match(filters, image) for image in images) or any(row.get("id") == doc_id for row in rows)
+        ]
+        for key in stale:
+            del _entries[key]
+        if stale:
+            incr("list_cache.invalidations", len(stale))
+            _publish()
+
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import threading
+
+
+# Simple in-process counters/gauges. Each uvicorn worker keeps its own values.
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {"counters": dict(_counters), "gauges": dict(_gauges)}
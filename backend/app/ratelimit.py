@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import functools
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from .config import get_rate_limit_policies, get_rate_limit_state_path
+from .metrics import incr
+
+
+# Admission control for expensive endpoints: token buckets (rate + burst) and
+# concurrency caps, per user (overridable per role) and globally per action.
+#
+# State lives in a small SQLite file on the host (RATE_LIMIT_STATE_PATH) so all
+# uvicorn workers share the same buckets without a round trip to Postgres; one
+# BEGIN IMMEDIATE transaction checks and updates every limit for a request.
+# Concurrency slots are leases with an expiry so a crashed worker can't leak them.
+# The SQLite calls run in the threadpool; if the file stays locked past the busy
+# timeout the request is refused with an explicit 503 instead of a 500.
+
+_LEASE_TTL_SECONDS = 600
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_policies: dict | None = None
+
+
+class RateLimitedError(Exception):
+    def __init__(self, action: str, retry_after: float):
+        super().__init__(f"Too many requests for {action}. Try again later.")
+        self.action = action
+        self.retry_after = retry_after
+
+
+class RateLimitStateBusyError(Exception):
+    def __init__(self, action: str):
+        super().__init__(f"Admission control for {action} is busy. Try again shortly.")
+        self.action = action
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(get_rate_limit_state_path(), timeout=1.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (id TEXT PRIMARY KEY, key TEXT NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_leases_key ON leases (key)")
+        _conn = conn
+    return _conn
+
+
+def _take_token(cur: sqlite3.Cursor, key: str, *, rate_per_minute: float, burst: float, now: float) -> float | None:
+    # Returns None when a token was taken, otherwise seconds until one is available.
+    rate = rate_per_minute / 60.0
+    row = cur.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+    tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate if rate > 0 else 60.0
+    cur.execute(
+        "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+        (key, tokens - 1, now),
+    )
+    return None
+
+
+def _active_leases(cur: sqlite3.Cursor, key: str, now: float) -> int:
+    cur.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+    return int(cur.execute("SELECT COUNT(*) FROM leases WHERE key = ?", (key,)).fetchone()[0])
+
+
+def _limits_for(action: str, role: str | None) -> tuple[dict, dict]:
+    global _policies
+    if _policies is None:
+        _policies = get_rate_limit_policies()
+    policy = _policies.get(action) or {}
+    per_user = dict(policy.get("per_user") or {})
+    per_user.update((policy.get("roles") or {}).get(role or "", {}) or {})
+    return per_user, dict(policy.get("global") or {})
+
+
+def acquire(action: str, *, subject: str, role: str | None) -> list[str]:
+    per_user, global_limits = _limits_for(action, role)
+    scopes = [(f"{action}:user:{subject}", per_user), (f"{action}:global", global_limits)]
+    now = time.time()
+    lease_ids: list[str] = []
+
+    with _lock:
+        cur = _connection().cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as exc:
+            raise RateLimitStateBusyError(action) from exc
+        try:
+            for key, limits in scopes:
+                concurrency = int(limits.get("concurrency") or 0)
+                if concurrency > 0 and _active_leases(cur, key, now) >= concurrency:
+                    raise RateLimitedError(action, 1.0)
+            for key, limits in scopes:
+                rate = float(limits.get("rate_per_minute") or 0)
+                if rate > 0:
+                    wait = _take_token(cur, key, rate_per_minute=rate, burst=float(limits.get("burst") or rate), now=now)
+                    if wait is not None:
+                        raise RateLimitedError(action, wait)
+            for key, limits in scopes:
+                if int(limits.get("concurrency") or 0) > 0:
+                    lease_id = uuid.uuid4().hex
+                    cur.execute(
+                        "INSERT INTO leases (id, key, expires_at) VALUES (?, ?, ?)",
+                        (lease_id, key, now + _LEASE_TTL_SECONDS),
+                    )
+                    lease_ids.append(lease_id)
+        except sqlite3.OperationalError as exc:
+            cur.execute("ROLLBACK")
+            raise RateLimitStateBusyError(action) from exc
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+    return lease_ids
+
+
+def release(lease_ids: list[str]) -> None:
+    if not lease_ids:
+        return
+    with _lock:
+        try:
+            _connection().executemany("DELETE FROM leases WHERE id = ?", [(lease_id,) for lease_id in lease_ids])
+        except sqlite3.OperationalError:
+            # Still locked: the leases expire on their own after _LEASE_TTL_SECONDS.
+            incr("ratelimit.release_failed")
+
+
+def take_shared_token(key: str, *, rate_per_second: float, burst: float) -> float | None:
+    # One token from a bucket shared by every worker (e.g. the Drive API quota);
+    # None when taken, otherwise seconds until one is available. sqlite3 errors
+    # (state file locked) propagate so the caller can fall back.
+    with _lock:
+        cur = _connection().cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            wait = _take_token(cur, key, rate_per_minute=rate_per_second * 60, burst=burst, now=time.time())
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+    return wait
+
+
+def drain_shared_bucket(key: str, *, seconds: float, rate_per_second: float, burst: float) -> None:
+    # Nobody gets a token from the bucket for the next `seconds` (upstream sent Retry-After).
+    now = time.time()
+    with _lock:
+        cur = _connection().cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            row = cur.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate_per_second)
+            cur.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, min(tokens, 1 - seconds * rate_per_second), now),
+            )
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+
+
+def _subject(request: Request) -> tuple[str, str | None]:
+    user = getattr(request.state, "user", None)
+    if user:
+        return f"u{user['id']}", user.get("role")
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}", None
+
+
+def rate_limited(action: str, endpoint: Callable[[Request], Any]) -> Callable[[Request], Any]:
+    # Wraps an async endpoint: admits the request (or raises RateLimitedError -> 429)
+    # and holds its concurrency slots until the handler returns, or until a
+    # streamed body has been sent.
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request) -> Response:
+        subject, role = _subject(request)
+        try:
+            lease_ids = await run_in_threadpool(acquire, action, subject=subject, role=role)
+        except RateLimitedError:
+            incr(f"ratelimit.{action}.rejected")
+            raise
+        except RateLimitStateBusyError:
+            incr(f"ratelimit.{action}.busy")
+            raise
+        try:
+            response = await endpoint(request)
+        except BaseException:
+            await _release(lease_ids)
+            raise
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = _release_after(response.body_iterator, lease_ids)
+        else:
+            await _release(lease_ids)
+        return response
+
+    return wrapper
+
+
+async def _release_after(body: AsyncIterator[Any], lease_ids: list[str]) -> AsyncIterator[Any]:
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        await _release(lease_ids)
+
+
+async def _release(lease_ids: list[str]) -> None:
+    if not lease_ids:
+        return
+    # Shielded so a cancelled request (client gone) still frees its slots.
+    with anyio.CancelScope(shield=True):
+        await run_in_threadpool(release, lease_ids)
+
+
+def retry_after_header(e: RateLimitedError) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gzip
+import json
+import typing
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse as _StarletteJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_compression_min_size
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is used instead
+    brotli = None
+
+
+def _json_default(value: typing.Any) -> typing.Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: typing.Any) -> bytes:
+    # orjson when installed (datetimes encoded natively, same ISO format as
+    # isoformat()), stdlib json with an isoformat fallback otherwise.
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+class JSONResponse(_StarletteJSONResponse):
+    def render(self, content: typing.Any) -> bytes:
+        return dumps(content)
+
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    offered = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    # Negotiated br/gzip for complete (non-streamed) text/JSON responses at or
+    # above COMPRESSION_MIN_SIZE bytes. Streamed bodies (file downloads) and
+    # responses that already carry a Content-Encoding pass through untouched.
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None) -> None:
+        self.app = app
+        self.minimum_size = get_compression_min_size() if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0:
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            passthrough = True
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import heapq
+import math
+from math import log
+import re
+import threading
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+from .index_refresh import Refresher, drop_deleted, micros, poll_since
+from .metrics import incr, set_gauge
+
+
+# In-process "similar documents" index (SIMILARITY_REFRESH_SECONDS > 0).
+#
+# Every document becomes a sparse TF-IDF vector over its title (counted twice),
+# tags, description and AI summary: sublinear tf * smoothed idf, truncated to
+# the _DOC_TERMS heaviest terms and L2-normalized. Vectors are stored as
+# per-term postings in typed arrays (doc ids + float32 weights), so a query is
+# a sparse dot product over the postings of every term in the query document's
+# vector: the exact cosine between the stored vectors, without touching
+# documents that share no term with it.
+#
+# The truncation is the approximation. Against cosine over untruncated vectors,
+# top-10 recall on the synthetic corpus in backend/benchmarks/similarity.py is
+# 0.73 at 20k documents and 0.61 at 100k; keeping more terms pulls in the long
+# postings of common words and makes queries several times slower.
+#
+# idf is fixed when the index is built; changed rows (polled by updated_at, like
+# the catalog) are re-vectorized with it, and the index is rebuilt in the
+# background once enough of the corpus has changed since. Rows the poll's
+# overlap window returns again with the same updated_at are skipped, and only
+# vectors that actually moved count towards that rebuild.
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+# Users often type Albanian without diacritics: fold ë -> e, ç -> c.
+_FOLD = str.maketrans({"ë": "e", "ç": "c"})
+_STOP_WORDS = frozenset(
+    """
+    a ai ajo apo ata ato cdo ca deri do dhe e edhe eshte i ia jane je jam ka kane keto kete kjo kur ky me mbi
+    mes me ne nen nga nje per perket por pas para prej qe se si sipas tek te tij saj tyre u ose nuk vetem
+    and an are as at be by for from in is it of on or that the this to was were with
+    """.split()
+)
+# Definite / plural / case endings, longest first; applied once, keeping at least _MIN_STEM letters.
+_SUFFIXES = ("ave", "eve", "ise", "it", "in", "en", "un", "ut", "ve", "es", "et", "ja", "ri", "re", "ra", "a", "e", "i")
+_MIN_STEM = 4
+
+_DOC_TERMS = 48
+_REBUILD_CHANGED_RATIO = 0.2
+_REBUILD_CHANGED_MIN = 500
+
+
+def _stem(word: str) -> str:
+    word = word.translate(_FOLD)
+    if len(word) < 2 or word in _STOP_WORDS:
+        return ""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[: -len(suffix)]
+    return word
+
+
+class _StemCache(dict):
+    # word -> stem ("" for stop words); the vocabulary is small next to the corpus.
+    def __missing__(self, word: str) -> str:
+        stem = _stem(word)
+        if len(self) < _STEM_CACHE_SIZE:
+            self[word] = stem
+        return stem
+
+
+_STEM_CACHE_SIZE = 500_000
+_stems = _StemCache()
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [stem for stem in map(_stems.__getitem__, _TOKEN_RE.findall(text.lower())) if stem]
+
+
+def _document_terms(row: tuple) -> Counter:
+    # row: (id, updated_at, status, title, description, tags, ai_summary)
+    title = tokenize(row[3])
+    return Counter(title + title + tokenize(row[5]) + tokenize(row[4]) + tokenize(row[6]))
+
+
+class SimilarityIndex:
+    def __init__(self, rows: list[tuple]):
+        self.lock = threading.Lock()
+        self.terms: dict[str, int] = {}
+        self.post_ids: list[array] = []
+        self.post_weights: list[array] = []
+        self.vectors: dict[int, tuple[array, array]] = {}
+        # Position of each of a document's terms in that term's postings, so
+        # removing it is a swap-remove per term instead of a postings scan.
+        self.slots: dict[int, array] = {}
+        self.updated: dict[int, int] = {}
+        self.status: dict[int, str] = {}
+        self.max_updated = 0
+        self.changed = 0
+
+        # Pass 1: term counts per document as compact arrays, and document frequencies.
+        counted: list[tuple[int, array, array]] = []
+        df: Counter = Counter()
+        term_id = self._term_id
+        for row in rows:
+            counts = _document_terms(row)
+            df.update(counts.keys())
+            counted.append((int(row[0]), array("I", map(term_id, counts)), array("I", counts.values())))
+            self.status[int(row[0])] = str(row[2])
+            self.updated[int(row[0])] = micros(row[1])
+            self.max_updated = max(self.max_updated, micros(row[1]))
+
+        self.n = len(counted)
+        self.idf = array("f", (math.log((1 + self.n) / (1 + df[term])) + 1.0 for term in self.terms))
+        self.unseen_idf = math.log(1 + self.n) + 1.0
+        # Pass 2: weight, truncate, normalize, post.
+        for doc_id, ids, tfs in counted:
+            self._index(doc_id, self._vector(zip(ids, tfs)))
+
+    # -- vectors ----------------------------------------------------------------
+
+    def _term_id(self, term: str) -> int:
+        t = self.terms.get(term)
+        if t is None:
+            t = len(self.terms)
+            self.terms[term] = t
+            self.post_ids.append(array("q"))
+            self.post_weights.append(array("f"))
+        return t
+
+    def _vector(self, counts) -> list[tuple[int, float]]:
+        idf, unseen = self.idf, self.unseen_idf
+        known = len(idf)
+        weighted = [(t, (1.0 + log(tf)) * (idf[t] if t < known else unseen)) for t, tf in counts]
+        top = heapq.nlargest(_DOC_TERMS, weighted, key=itemgetter(1)) if len(weighted) > _DOC_TERMS else weighted
+        norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+        return [(t, w / norm) for t, w in top]
+
+    def _index(self, doc_id: int, vector: list[tuple[int, float]]) -> None:
+        ids = array("I", (t for t, _ in vector))
+        weights = array("f", (w for _, w in vector))
+        slots = array("I")
+        self.vectors[doc_id] = (ids, weights)
+        self.slots[doc_id] = slots
+        for t, w in vector:
+            slots.append(len(self.post_ids[t]))
+            self.post_ids[t].append(doc_id)
+            self.post_weights[t].append(w)
+
+    def _unindex(self, doc_id: int) -> None:
+        vector = self.vectors.pop(doc_id, None)
+        if vector is None:
+            return
+        slots = self.slots.pop(doc_id)
+        for t, i in zip(vector[0], slots):
+            ids, weights = self.post_ids[t], self.post_weights[t]
+            # Swap-remove: postings order doesn't matter; the moved posting's slot follows it.
+            last = len(ids) - 1
+            if i != last:
+                moved = ids[last]
+                ids[i], weights[i] = moved, weights[last]
+                self.slots[moved][self.vectors[moved][0].index(t)] = i
+            ids.pop()
+            weights.pop()
+
+    # -- updates ----------------------------------------------------------------
+
+    def apply(self, row: tuple) -> bool:
+        # Re-vectorize one row; True when its vector changed (what counts towards a rebuild).
+        doc_id, updated = int(row[0]), micros(row[1])
+        # Equal, not <=: a row rewritten by a transaction that started earlier can
+        # come back with an older NOW() and still be a real change.
+        if self.updated.get(doc_id) == updated:
+            return False
+        self.updated[doc_id] = updated
+        self.status[doc_id] = str(row[2])
+        self.max_updated = max(self.max_updated, updated)
+        counts = _document_terms(row)
+        vector = self._vector((self._term_id(term), tf) for term, tf in counts.items())
+        old = self.vectors.get(doc_id)
+        if old is not None and old == (array("I", (t for t, _ in vector)), array("f", (w for _, w in vector))):
+            # Same text (a status or file change): postings stay, no idf churn.
+            return False
+        self._unindex(doc_id)
+        self._index(doc_id, vector)
+        self.changed += 1
+        return True
+
+    def remove(self, doc_id: int) -> None:
+        self._unindex(doc_id)
+        self.status.pop(doc_id, None)
+        self.updated.pop(doc_id, None)
+        self.changed += 1
+
+    def needs_rebuild(self) -> bool:
+        # idf drifts as the corpus changes; rebuild once a good part of it has.
+        return self.changed > max(_REBUILD_CHANGED_MIN, _REBUILD_CHANGED_RATIO * self.n)
+
+    # -- queries ----------------------------------------------------------------
+
+    def similar(self, doc_id: int, *, limit: int, status: str | None) -> list[tuple[int, float]] | None:
+        # [(doc id, cosine score)] best first; None when the document isn't indexed.
+        with self.lock:
+            vector = self.vectors.get(doc_id)
+            if vector is None:
+                return None
+            scores: dict[int, float] = {}
+            get = scores.get
+            for t, wq in zip(*vector):
+                for other, w in zip(self.post_ids[t], self.post_weights[t]):
+                    scores[other] = get(other, 0.0) + wq * w
+            scores.pop(doc_id, None)
+            if status:
+                doc_status = self.status
+                candidates = ((d, s) for d, s in scores.items() if doc_status.get(d) == status)
+            else:
+                candidates = iter(scores.items())
+            return [(d, round(s, 4)) for d, s in heapq.nlargest(limit, candidates, key=itemgetter(1))]
+
+
+_index: SimilarityIndex | None = None
+
+
+def get_index() -> SimilarityIndex | None:
+    return _index
+
+
+def _publish(index: SimilarityIndex) -> None:
+    set_gauge("similarity.documents", len(index.vectors))
+    set_gauge("similarity.terms", len(index.terms))
+
+
+def reload() -> SimilarityIndex:
+    global _index
+    from .db import list_similarity_rows
+
+    index = SimilarityIndex(list_similarity_rows())
+    _index = index
+    incr("similarity.reloads")
+    _publish(index)
+    return index
+
+
+def _refresh(*, allow_rebuild: bool = False) -> None:
+    from .db import list_similarity_rows
+
+    index = _index
+    if index is None or (allow_rebuild and index.needs_rebuild()):
+        reload()
+        return
+
+    changed = list_similarity_rows(updated_since=poll_since(index.max_updated))
+    with index.lock:
+        for row in changed:
+            index.apply(row)
+    drop_deleted(index, index.vectors)
+    incr("similarity.refreshes")
+    _publish(index)
+
+
+_refresher = Refresher("similarity", _refresh)
+mark_dirty = _refresher.mark_dirty
+refresh = _refresher.refresh
+refresh_if_dirty = _refresher.refresh_if_dirty
+
+
+async def run_refresh_forever(*, interval_seconds: float) -> None:
+    await _refresher.run_forever(interval_seconds=interval_seconds, allow_rebuild=True)
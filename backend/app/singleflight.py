@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from .metrics import incr
+
+
+T = TypeVar("T")
+
+# In-flight deduplication: concurrent calls with the same (name, key) share one
+# execution and all receive its result (or its exception). Nothing is cached;
+# the entry is dropped as soon as the call finishes. The shared call runs as
+# its own task, so one caller disconnecting doesn't cancel it for the others.
+#
+# Metrics: singleflight.<name>.executions / singleflight.<name>.coalesced
+
+_inflight: dict[tuple[str, Hashable], asyncio.Task] = {}
+
+
+async def coalesce(name: str, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+    flight_key = (name, key)
+    task = _inflight.get(flight_key)
+    if task is None or task.done():
+        task = asyncio.ensure_future(factory())
+        _inflight[flight_key] = task
+
+        def _forget(done: asyncio.Task, flight_key: tuple[str, Hashable] = flight_key) -> None:
+            if _inflight.get(flight_key) is done:
+                del _inflight[flight_key]
+            # Avoid "exception was never retrieved" when every waiter was cancelled.
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(_forget)
+        incr(f"singleflight.{name}.executions")
+    else:
+        incr(f"singleflight.{name}.coalesced")
+    return await asyncio.shield(task)
+
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+from urllib.parse import urlencode
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+from . import drive_async
+from .config import get_jwt_secret, get_public_base_url, get_storage_backend, get_storage_local_path
+from .drive_credentials import acall_with_drive_credentials, forget
+from .drive_targets import choose_targets, mark_throttled
+from .metrics import incr
+
+
+# Storage engines for document files. Every engine exposes the same async API:
+#   put / replace / delete / iter_content / stat
+# and returns/accepts the storage key that is kept in academic_documents.drive_file_id
+# (the column predates local storage; academic_documents.storage_backend says which
+# engine a row lives in).
+#
+# `user_ids` is the credential chain to try (current user, uploader, -1 = service
+# account). Only the Drive engine uses it.
+
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class DriveStorage:
+    name = "drive"
+
+    async def put(
+        self,
+        *,
+        user_ids: Iterable[int | None],
+        filename: str,
+        content_type: str,
+        content: bytes,
+        category: str | None = None,
+    ) -> dict:
+        user_ids = tuple(user_ids)
+        last_err: Exception | None = None
+        for target in choose_targets(category):
+            folder_id = str(target["folder_id"])
+            candidates = (target["user_id"],) if target.get("user_id") is not None else user_ids
+
+            async def upload(uid: int, folder_id: str = folder_id) -> dict:
+                result = await drive_async.upload_file_to_drive(
+                    user_id=uid,
+                    filename=filename,
+                    content_type=content_type,
+                    content=content,
+                    folder_id=folder_id,
+                )
+                return {**result, "folder_id": folder_id, "owner_user_id": uid}
+
+            try:
+                return await acall_with_drive_credentials(key=folder_id, candidates=candidates, operation=upload)
+            except Exception as e:
+                if not drive_async.is_rate_limit_error(e):
+                    raise
+                # Rate limited: fail over to the next target.
+                mark_throttled(target)
+                incr("drive_targets.failovers")
+                last_err = e
+        raise last_err if last_err is not None else RuntimeError("No Drive upload target configured")
+
+    async def replace(self, *, user_ids: Iterable[int | None], key: str, content_type: str, content: bytes) -> dict:
+        return await acall_with_drive_credentials(
+            key=key,
+            candidates=user_ids,
+            operation=lambda uid: drive_async.update_file_content_in_drive(
+                user_id=uid,
+                drive_file_id=key,
+                content_type=content_type,
+                content=content,
+            ),
+        )
+
+    async def delete(self, *, user_ids: Iterable[int | None], key: str) -> None:
+        await acall_with_drive_credentials(
+            key=key,
+            candidates=user_ids,
+            operation=lambda uid: drive_async.delete_file_from_drive(user_id=uid, drive_file_id=key),
+        )
+        forget(key)
+
+    async def iter_content(self, *, user_ids: Iterable[int | None], key: str) -> AsyncIterator[bytes]:
+        # Pick the credential by pulling the first chunk, then keep streaming with it.
+        async def open_stream(uid: int):
+            stream = drive_async.iter_file_from_drive(user_id=uid, drive_file_id=key, chunk_size=_CHUNK_SIZE)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                return b"", None
+            except BaseException:
+                await stream.aclose()
+                raise
+            return first, stream
+
+        first, stream = await acall_with_drive_credentials(key=key, candidates=user_ids, operation=open_stream)
+        if first:
+            yield first
+        if stream is None:
+            return
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def stat(self, *, user_ids: Iterable[int | None], key: str) -> dict:
+        meta = await acall_with_drive_credentials(
+            key=key,
+            candidates=user_ids,
+            operation=lambda uid: drive_async.get_file_metadata(
+                user_id=uid,
+                drive_file_id=key,
+                fields="id, size, md5Checksum, modifiedTime, webViewLink",
+            ),
+        )
+        return {
+            "size": int(meta["size"]) if meta.get("size") is not None else None,
+            "md5_checksum": meta.get("md5Checksum"),
+            "modified_time": drive_async.parse_drive_time(meta.get("modifiedTime")),
+            "web_view_link": meta.get("webViewLink"),
+        }
+
+
+_LOCAL_KEY_RE = re.compile(r"^local-[0-9a-f]{32}$")
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        if not _LOCAL_KEY_RE.match(key):
+            raise RuntimeError("Invalid local storage key")
+        return self.root / key[6:8] / key
+
+    def web_view_link(self, key: str) -> str:
+        # Needs a Bearer token; browsers open signed_link() instead.
+        return f"{(get_public_base_url() or '').rstrip('/')}/api/storage/local/{key}"
+
+    def _signature(self, key: str, expires: int) -> str:
+        message = f"local-file:{key}:{expires}".encode()
+        return hmac.new(get_jwt_secret().encode(), message, hashlib.sha256).hexdigest()
+
+    def signed_link(self, key: str, *, ttl_seconds: int) -> tuple[str, int]:
+        expires = int(time.time()) + ttl_seconds
+        query = urlencode({"expires": expires, "signature": self._signature(key, expires)})
+        return f"{self.web_view_link(key)}?{query}", expires
+
+    def verify_link(self, key: str, expires: str | None, signature: str | None) -> bool:
+        if not expires or not signature:
+            return False
+        try:
+            expires_at = int(expires)
+        except ValueError:
+            return False
+        if expires_at < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(key, expires_at))
+
+    def _write(self, key: str, content: bytes) -> dict:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+        return {
+            "drive_file_id": key,
+            "web_view_link": self.web_view_link(key),
+            "md5_checksum": hashlib.md5(content).hexdigest(),
+            "modified_time": datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc),
+        }
+
+    async def put(
+        self,
+        *,
+        user_ids: Iterable[int | None],
+        filename: str,
+        content_type: str,
+        content: bytes,
+        category: str | None = None,
+    ) -> dict:
+        key = f"local-{uuid.uuid4().hex}"
+        return await run_in_threadpool(self._write, key, content)
+
+    async def replace(self, *, user_ids: Iterable[int | None], key: str, content_type: str, content: bytes) -> dict:
+        if not self.path_for(key).exists():
+            raise RuntimeError("File not found in local storage")
+        return await run_in_threadpool(self._write, key, content)
+
+    async def delete(self, *, user_ids: Iterable[int | None], key: str) -> None:
+        await run_in_threadpool(self.path_for(key).unlink, missing_ok=True)
+
+    async def iter_content(self, *, user_ids: Iterable[int | None], key: str) -> AsyncIterator[bytes]:
+        try:
+            f = await anyio.open_file(self.path_for(key), "rb")
+        except FileNotFoundError as e:
+            raise RuntimeError("File not found in local storage") from e
+        async with f:
+            while True:
+                chunk = await f.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def stat(self, *, user_ids: Iterable[int | None], key: str) -> dict:
+        path = self.path_for(key)
+        try:
+            st = await run_in_threadpool(path.stat)
+        except FileNotFoundError as e:
+            raise RuntimeError("File not found in local storage") from e
+        return {
+            "size": st.st_size,
+            "md5_checksum": None,
+            "modified_time": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+            "web_view_link": self.web_view_link(key),
+        }
+
+
+_engines: dict[str, object] = {}
+
+
+def get_storage(name: str | None = None):
+    # No name -> the engine new uploads go to (STORAGE_BACKEND).
+    name = (name or get_storage_backend()).strip().lower()
+    engine = _engines.get(name)
+    if engine is not None:
+        return engine
+    if name == "drive":
+        engine = DriveStorage()
+    elif name == "local":
+        engine = LocalStorage(get_storage_local_path())
+    else:
+        raise RuntimeError(f"Unknown storage backend: {name}")
+    _engines[name] = engine
+    return engine
+
+
+async def read_content(engine, *, user_ids: Iterable[int | None], key: str) -> bytes:
+    chunks = []
+    async for chunk in engine.iter_content(user_ids=user_ids, key=key):
+        chunks.append(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from .db import list_documents_for_storage, set_document_storage
+from .drive_quota import background_priority
+from .storage import get_storage, read_content
+
+
+# Copies document files between storage engines, N at a time, and repoints the
+# rows. Source files are left in place.
+#
+#   python -m backend.app.storage_migrate --from drive --to local --concurrency 8
+
+
+async def _migrate_one(doc: dict, *, source, target, semaphore: asyncio.Semaphore, stats: dict) -> None:
+    async with semaphore:
+        user_ids = (doc.get("uploaded_by_user_id"), doc.get("drive_owner_user_id"), -1)
+        try:
+            content = await read_content(source, user_ids=user_ids, key=str(doc["drive_file_id"]))
+            stored = await target.put(
+                user_ids=user_ids,
+                filename=str(doc.get("title") or "document"),
+                content_type=str(doc.get("file_type") or "application/octet-stream"),
+                content=content,
+            )
+            await run_in_threadpool(
+                set_document_storage,
+                doc_id=int(doc["id"]),
+                storage_backend=target.name,
+                drive_file_id=str(stored["drive_file_id"]),
+                web_view_link=str(stored["web_view_link"]),
+                drive_md5=stored.get("md5_checksum"),
+                drive_modified_at=stored.get("modified_time"),
+                drive_folder_id=stored.get("folder_id"),
+                drive_owner_user_id=stored.get("owner_user_id"),
+            )
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"document {doc['id']}: {e}")
+            return
+        stats["copied"] += 1
+        stats["bytes"] += len(content)
+
+
+async def migrate(*, source_name: str, target_name: str, concurrency: int) -> dict:
+    source = get_storage(source_name)
+    target = get_storage(target_name)
+    if source.name == target.name:
+        raise RuntimeError("Source and target storage backends must differ")
+
+    docs = await run_in_threadpool(list_documents_for_storage, source.name)
+    stats = {"documents": len(docs), "copied": 0, "failed": 0, "bytes": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+    with background_priority():
+        await asyncio.gather(
+            *(_migrate_one(doc, source=source, target=target, semaphore=semaphore, stats=stats) for doc in docs)
+        )
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy document files between storage backends.")
+    parser.add_argument("--from", dest="source", required=True, choices=["drive", "local"])
+    parser.add_argument("--to", dest="target", required=True, choices=["drive", "local"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    from .drive_async import close_client
+
+    async def run() -> dict:
+        try:
+            return await migrate(source_name=args.source, target_name=args.target, concurrency=args.concurrency)
+        finally:
+            await close_client()
+
+    print(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
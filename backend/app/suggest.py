@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from .index_refresh import Refresher, drop_deleted, micros, poll_since
+from .metrics import incr, set_gauge
+
+
+# In-process prefix index for search-as-you-type (SUGGEST_REFRESH_SECONDS > 0).
+#
+# Completions are whole titles and individual tags of active documents. Each
+# one is reachable from the start of any of its first _WORD_STARTS words, so
+# "stud" completes "Rregullore e studimeve". Keys are normalized (lowercase,
+# ë/ç folded, whitespace collapsed) and kept in one sorted list; a prefix is a
+# bisect range.
+#
+# Ranking: log(documents using it) + _RECENCY_PER_DAY * (day of the newest
+# one). Adding a linear time term ranks like exponential decay with a half-life
+# of _HALF_LIFE_DAYS, but never has to be recomputed as time passes.
+#
+# Rankings are cached per (kind, prefix) (LRU; kind None = titles and tags
+# mixed), so a kind filter never starves behind the other kind: the best _KEEP
+# completions plus the best score left out ("floor"). Writes patch them in place instead of dropping
+# them (gone -> removed, new score above the floor -> added), and a ranking is
+# recomputed only once fewer than _MAX_LIMIT kept entries still beat the floor.
+# One- and two-letter prefixes, whose ranges are the largest, are ranked when
+# the index is built.
+#
+# Changed rows are polled by updated_at like the catalog; the row count
+# catches deletes.
+
+_WORD_STARTS = 6
+_HALF_LIFE_DAYS = 180
+_RECENCY_PER_DAY = math.log(2) / _HALF_LIFE_DAYS
+_CACHE_SIZE = 10_000
+_MAX_LIMIT = 20
+_KEEP = 64
+_WARM_PREFIX = 2
+_KINDS = (None, "title", "tag")
+_FOLD = str.maketrans({"ë": "e", "ç": "c"})
+_SPACE_RE = re.compile(r"\s+")
+_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.lower().translate(_FOLD)).strip()
+
+
+def _completions(row: tuple) -> dict[tuple[str, str], str]:
+    # row: (id, updated_at, created_at, status, title, tags) -> {(kind, normalized): display}
+    if str(row[3]) != "active":
+        return {}
+    out: dict[tuple[str, str], str] = {}
+    title = str(row[4] or "").strip()
+    if normalize(title):
+        out[("title", normalize(title))] = title
+    for tag in str(row[5] or "").split(","):
+        tag = tag.strip()
+        if normalize(tag):
+            out[("tag", normalize(tag))] = tag
+    return out
+
+
+def _prefixes(entry: tuple[str, str]) -> set[str]:
+    return {key[:end] for key in _keys(entry) for end in range(1, len(key) + 1)}
+
+
+def _keys(entry: tuple[str, str]) -> list[str]:
+    text = entry[1]
+    keys = [text]
+    at = text.find(" ")
+    while at != -1 and len(keys) < _WORD_STARTS:
+        keys.append(text[at + 1 :])
+        at = text.find(" ", at + 1)
+    return keys
+
+
+class _Ranking:
+    __slots__ = ("entries", "floor", "ordered")
+
+    def __init__(self, entries: list[tuple[str, str]], floor: float):
+        self.entries = entries
+        # Best score among completions not kept (-inf: nothing was left out).
+        self.floor = floor
+        self.ordered = True
+
+
+class SuggestIndex:
+    def __init__(self, rows: list[tuple]):
+        self.lock = threading.Lock()
+        # (kind, normalized) -> [display, documents, newest created_at (days)]
+        self.entries: dict[tuple[str, str], list] = {}
+        # doc id -> (completions, created_at days)
+        self.docs: dict[int, tuple[tuple[tuple[str, str], ...], float]] = {}
+        self.max_updated = 0
+        self._cache: OrderedDict[tuple[str | None, str], _Ranking] = OrderedDict()
+        for row in rows:
+            self._add(row)
+        self.keys: list[tuple[str, str, str]] = sorted(
+            (key, *entry) for entry in self.entries for key in _keys(entry)
+        )
+        for prefix in sorted({key[:end] for key, _, _ in self.keys for end in range(1, _WARM_PREFIX + 1)}):
+            seen = self._matching(prefix)
+            self._cache[(None, prefix)] = self._top(seen)
+            for kind in _KINDS[1:]:
+                self._cache[(kind, prefix)] = self._top({entry for entry in seen if entry[0] == kind})
+
+    # -- updates ----------------------------------------------------------------
+
+    def _add(self, row: tuple) -> list[tuple[str, str]]:
+        # Registers the row's completions; returns the entries that are new.
+        doc_id = int(row[0])
+        days = micros(row[2]) / 86_400_000_000
+        completions = _completions(row)
+        created = []
+        for entry, display in completions.items():
+            current = self.entries.get(entry)
+            if current is None:
+                self.entries[entry] = [display, 1, days]
+                created.append(entry)
+            else:
+                current[1] += 1
+                if days >= current[2]:
+                    current[0], current[2] = display, days
+        self.docs[doc_id] = (tuple(completions), days)
+        self.max_updated = max(self.max_updated, micros(row[1]))
+        return created
+
+    def _remove(self, doc_id: int) -> list[tuple[str, str]]:
+        # Drops the document's contribution; returns entries no document uses anymore.
+        previous = self.docs.pop(doc_id, None)
+        if previous is None:
+            return []
+        gone = []
+        for entry in previous[0]:
+            current = self.entries[entry]
+            current[1] -= 1
+            if current[1] <= 0:
+                del self.entries[entry]
+                gone.append(entry)
+        return gone
+
+    def _patch(self, entries) -> None:
+        # Brings cached rankings under the entries' prefixes up to date.
+        for entry in entries:
+            alive = entry in self.entries
+            score = self._score(entry) if alive else -math.inf
+            for prefix in _prefixes(entry):
+                for kind in (None, entry[0]):
+                    ranking = self._cache.get((kind, prefix))
+                    if ranking is None:
+                        continue
+                    if entry in ranking.entries:
+                        if not alive:
+                            ranking.entries.remove(entry)
+                        ranking.ordered = False
+                    elif score > ranking.floor:
+                        ranking.entries.append(entry)
+                        ranking.ordered = False
+
+    def apply(self, row: tuple) -> None:
+        doc_id = int(row[0])
+        before = self.docs.get(doc_id, ((), 0.0))[0]
+        gone = self._remove(doc_id)
+        created = self._add(row)
+        for entry in gone:
+            if entry not in self.entries:
+                for key in _keys(entry):
+                    i = bisect_left(self.keys, (key, *entry))
+                    if i < len(self.keys) and self.keys[i] == (key, *entry):
+                        del self.keys[i]
+        for entry in created:
+            if entry not in before:
+                for key in _keys(entry):
+                    insort(self.keys, (key, *entry))
+        self._patch(set(before) | set(self.docs[doc_id][0]))
+
+    def remove(self, doc_id: int) -> None:
+        before = self.docs.get(doc_id, ((), 0.0))[0]
+        for entry in self._remove(doc_id):
+            for key in _keys(entry):
+                i = bisect_left(self.keys, (key, *entry))
+                if i < len(self.keys) and self.keys[i] == (key, *entry):
+                    del self.keys[i]
+        self._patch(before)
+
+    # -- queries ----------------------------------------------------------------
+
+    def _score(self, entry: tuple[str, str]) -> float:
+        _, count, days = self.entries[entry]
+        return math.log(count) + _RECENCY_PER_DAY * days
+
+    def _matching(self, prefix: str, kind: str | None = None) -> set[tuple[str, str]]:
+        lo = bisect_left(self.keys, (prefix,))
+        hi = bisect_left(self.keys, (prefix + _END,), lo)
+        return {(k, text) for _, k, text in self.keys[lo:hi] if kind is None or k == kind}
+
+    def _rank(self, prefix: str, kind: str | None) -> _Ranking:
+        return self._top(self._matching(prefix, kind))
+
+    def _top(self, seen: set[tuple[str, str]]) -> _Ranking:
+        ranked = heapq.nlargest(_KEEP + 1, seen, key=self._score)
+        if len(ranked) > _KEEP:
+            return _Ranking(ranked[:_KEEP], self._score(ranked[_KEEP]))
+        return _Ranking(ranked, -math.inf)
+
+    def _ranked(self, prefix: str, kind: str | None) -> list[tuple[str, str]]:
+        # Best completions of the kind under the prefix, best first (at least _MAX_LIMIT when there are that many).
+        cache_key = (kind, prefix)
+        ranking = self._cache.get(cache_key)
+        if ranking is not None:
+            self._cache.move_to_end(cache_key)
+            if not ranking.ordered:
+                ranking.entries.sort(key=self._score, reverse=True)
+                if len(ranking.entries) > _KEEP:
+                    ranking.floor = max(ranking.floor, self._score(ranking.entries[_KEEP]))
+                    del ranking.entries[_KEEP:]
+                ranking.ordered = True
+            valid = [entry for entry in ranking.entries if self._score(entry) >= ranking.floor]
+            if len(valid) >= _MAX_LIMIT or ranking.floor == -math.inf:
+                return valid
+        ranking = self._rank(prefix, kind)
+        self._cache[cache_key] = ranking
+        self._cache.move_to_end(cache_key)
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return ranking.entries
+
+    def suggest(self, prefix: str, *, limit: int, kind: str | None = None) -> list[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            return [
+                {"text": self.entries[entry][0], "kind": entry[0], "documents": self.entries[entry][1]}
+                for entry in self._ranked(prefix, kind)[:limit]
+            ]
+
+
+_index: SuggestIndex | None = None
+
+
+def get_index() -> SuggestIndex | None:
+    return _index
+
+
+def _publish(index: SuggestIndex) -> None:
+    set_gauge("suggest.completions", len(index.entries))
+    set_gauge("suggest.keys", len(index.keys))
+
+
+def reload() -> SuggestIndex:
+    global _index
+    from .db import list_suggest_rows
+
+    index = SuggestIndex(list_suggest_rows())
+    _index = index
+    incr("suggest.reloads")
+    _publish(index)
+    return index
+
+
+def _refresh() -> None:
+    from .db import list_suggest_rows
+
+    index = _index
+    if index is None:
+        reload()
+        return
+
+    changed = list_suggest_rows(updated_since=poll_since(index.max_updated))
+    with index.lock:
+        for row in changed:
+            index.apply(row)
+    drop_deleted(index, index.docs)
+    incr("suggest.refreshes")
+    _publish(index)
+
+
+_refresher = Refresher("suggest", _refresh)
+mark_dirty = _refresher.mark_dirty
+needs_refresh = _refresher.is_dirty
+refresh = _refresher.refresh
+refresh_if_dirty = _refresher.refresh_if_dirty
+
+
+async def run_refresh_forever(*, interval_seconds: float) -> None:
+    await _refresher.run_forever(interval_seconds=interval_seconds)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from typing import Iterable
+
+from .metrics import incr
+
+
+# Normalized tags. academic_documents.tags stays the comma-separated text users
+# type; tag_list (TEXT[], GIN-indexed) holds the parsed form and is kept in
+# sync by a trigger (document_tag_array() in db.init_db mirrors normalize_tag /
+# parse_tags). Existing rows are backfilled in batches, by id, without touching
+# updated_at:
+#
+#   python -m backend.app.tags --batch-size 1000
+#
+# The same backfill runs once in the background at startup; it only updates
+# rows whose tag_list differs from what their text parses to (empty, or parsed
+# before a change to the rules), so once done it updates nothing.
+
+# Same set as document_tag_array() in SQL, where \s depends on the server locale.
+_SPACE_RE = re.compile(r"[\t\n\v\f\r \u0085\u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+")
+_BACKFILL_BATCH = 1000
+
+
+def normalize_tag(tag: str) -> str:
+    return _SPACE_RE.sub(" ", tag).strip(" ").lower()
+
+
+def parse_tags(value: str | Iterable[str] | None) -> list[str]:
+    # "Provime, Rregullore,provime" -> ["provime", "rregullore"] (sorted, unique).
+    if not value:
+        return []
+    parts = value.split(",") if isinstance(value, str) else (p for v in value for p in str(v).split(","))
+    return sorted({t for t in map(normalize_tag, parts) if t})
+
+
+def backfill(*, batch_size: int = _BACKFILL_BATCH) -> dict:
+    from .db import backfill_document_tags_batch
+
+    started = time.perf_counter()
+    stats = {"batches": 0, "rows": 0, "skipped": False}
+    after_id = 0
+    while True:
+        ids = backfill_document_tags_batch(after_id=after_id, limit=batch_size)
+        if ids is None:
+            # Another worker holds the backfill lock and is doing the same work.
+            stats["skipped"] = True
+            break
+        if ids:
+            stats["batches"] += 1
+            stats["rows"] += len(ids)
+            after_id = ids[-1]
+        if len(ids) < batch_size:
+            break
+    if stats["rows"]:
+        incr("tags.backfilled", stats["rows"])
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+async def run_backfill() -> None:
+    from starlette.concurrency import run_in_threadpool
+
+    try:
+        await run_in_threadpool(backfill)
+    except Exception:
+        incr("tags.backfill_errors")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill normalized tags (tag_list) from the tags text column.")
+    parser.add_argument("--batch-size", type=int, default=_BACKFILL_BATCH)
+    args = parser.parse_args()
+
+    from .db import init_db
+
+    init_db()
+    print(json.dumps(backfill(batch_size=args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
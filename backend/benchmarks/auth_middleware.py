@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+
+# Per-request overhead of the auth middleware, before (BaseHTTPMiddleware +
+# JWT decode on every request) and after (pure ASGI + verified-token LRU).
+# Calls the ASGI stack directly, no server or network.
+#
+#   python -m backend.benchmarks.auth_middleware --requests 20000
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from backend.app.auth import create_access_token, decode_token, get_bearer_token  # noqa: E402
+from backend.main import AuthMiddleware  # noqa: E402
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request.state.user = None
+        token = get_bearer_token(request)
+        if token:
+            try:
+                payload = decode_token(token)
+                request.state.user = {
+                    "id": int(payload.get("sub")),
+                    "email": payload.get("email"),
+                    "role": payload.get("role"),
+                }
+            except Exception:
+                request.state.user = None
+        return await call_next(request)
+
+
+async def endpoint(scope, receive, send) -> None:
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _scope(token: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/documents",
+        "raw_path": b"/api/documents",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def _run(app, *, token: str, requests: int) -> float:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(_scope(token), receive, send)
+    return time.perf_counter() - started
+
+
+async def main(requests: int) -> None:
+    token = create_access_token(user_id=1, email="bench@example.com", role="staf")
+    baseline = await _run(endpoint, token=token, requests=requests)
+    for name, app in (("before", LegacyAuthMiddleware(endpoint)), ("after", AuthMiddleware(endpoint))):
+        await _run(app, token=token, requests=min(requests, 1000))
+        elapsed = await _run(app, token=token, requests=requests)
+        overhead_us = (elapsed - baseline) / requests * 1e6
+        print(f"{name:>6}: {elapsed / requests * 1e6:8.1f} us/request ({overhead_us:6.1f} us middleware overhead)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark AuthMiddleware per-request overhead.")
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.app.catalog import CatalogSnapshot
+
+
+# In-process catalog on synthetic documents: build time, incremental update
+# cost and list query latency, against a plain Python scan over row tuples
+# (roughly what a naive in-memory filter would cost). No database needed.
+#
+#   python -m backend.benchmarks.catalog --sizes 100000 1000000
+
+CATEGORIES = ["rregullore", "vendime", "procesverbale", "kurrikula", "udhezime", "raporte", "projekte", "te tjera"]
+FILE_TYPES = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "image/png"]
+WORDS = ["rregullore", "senati", "fakulteti", "vendim", "provim", "bursa", "kalendar", "master", "doktorature", "etike"]
+
+
+def _rows(count: int, seed: int = 7) -> list[tuple]:
+    rnd = random.Random(seed)
+    start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created = start + timedelta(seconds=i * 240 + rnd.randint(0, 200))
+        title = " ".join(rnd.choice(WORDS) for _ in range(4)) + f" {i}"
+        rows.append(
+            (
+                i + 1,
+                created,
+                created,
+                rnd.choice(CATEGORIES),
+                "archived" if rnd.random() < 0.2 else "active",
+                rnd.choice(FILE_TYPES),
+                title,
+            )
+        )
+    return rows
+
+
+def _scan(rows: list[tuple], *, query, category, status, from_dt, to_dt, page, page_size) -> list[int]:
+    needle = query.lower() if query else None
+    matched = [
+        r
+        for r in rows
+        if (not category or r[3] == category)
+        and (not status or r[4] == status)
+        and (from_dt is None or r[1] >= from_dt)
+        and (to_dt is None or r[1] <= to_dt)
+        and (needle is None or needle in r[6].lower())
+    ]
+    matched.sort(key=lambda r: (r[1], r[0]), reverse=True)
+    offset = (page - 1) * page_size
+    return [r[0] for r in matched[offset : offset + page_size]]
+
+
+def _time(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        rows = _rows(size)
+        started = time.perf_counter()
+        snapshot = CatalogSnapshot(rows)
+        build_s = time.perf_counter() - started
+        print(f"{size} documents: build {build_s:.2f} s")
+
+        mid = rows[size // 2][1]
+        cases = {
+            "status=active p1": dict(query=None, category=None, status="active", from_dt=None, to_dt=None, page=1),
+            "category+status p1": dict(query=None, category="vendime", status="active", from_dt=None, to_dt=None, page=1),
+            "title query p1": dict(query="bursa kalendar", category=None, status="active", from_dt=None, to_dt=None, page=1),
+            "date range p1": dict(
+                query=None, category=None, status="active", from_dt=mid - timedelta(days=30), to_dt=mid, page=1
+            ),
+            "status=active p500": dict(query=None, category=None, status="active", from_dt=None, to_dt=None, page=500),
+        }
+        for name, case in cases.items():
+            ids, _ = snapshot.search(**case, page_size=20)
+            expected = _scan(rows, **case, page_size=20)
+            assert ids == expected, name
+            catalog_ms = _time(lambda: snapshot.search(**case, page_size=20), repeat)
+            scan_ms = _time(lambda: _scan(rows, **case, page_size=20), 1)
+            print(f"  {name:<20} catalog {catalog_ms:8.3f} ms   scan {scan_ms:9.1f} ms")
+
+        last = rows[-1]
+        updates = [
+            (last[0] + k + 1, last[1] + timedelta(seconds=k + 1), last[1], "vendime", "active", FILE_TYPES[0], f"e re {k}")
+            for k in range(1000)
+        ]
+        started = time.perf_counter()
+        for row in updates:
+            snapshot.apply(row)
+        for row in updates[:500]:
+            snapshot.apply((*row[:4], "archived", *row[5:]))
+        print(f"  1000 inserts + 500 updates: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the in-process document catalog.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
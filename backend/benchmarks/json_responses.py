@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import gzip
+import time
+from datetime import datetime, timedelta, timezone
+
+from starlette.responses import JSONResponse as StdlibJSONResponse
+
+from backend.app.db import DOCUMENT_FIELDS, LIST_DEFAULT_FIELDS
+from backend.app.responses import JSONResponse, brotli, compress
+
+
+# Encode time and bytes on the wire for typical document list pages: stdlib
+# json with per-row isoformat (before) vs the orjson response class with native
+# datetimes (after), uncompressed / gzip / brotli.
+#
+#   python -m backend.benchmarks.json_responses --rows 100 --iterations 200
+
+
+def _rows(count: int, fields: tuple[str, ...]) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        row = {
+            "id": i + 1,
+            "title": f"Rregullore e brendshme e departamentit nr. {i}",
+            "description": "Përshkrim i dokumentit akademik. " * 12,
+            "category": ["rregullore", "vendime", "procesverbale", "kurrikula"][i % 4],
+            "tags": "senati, fakulteti, viti akademik",
+            "file_type": "application/pdf",
+            "drive_file_id": f"1AbCdEfGhIjKlMnOpQrStUvWxYz{i:06d}",
+            "web_view_link": f"https://drive.google.com/file/d/1AbCdEfGhIjKlMnOpQrStUvWxYz{i:06d}/view",
+            "uploaded_by_email": "staf@example.edu",
+            "status": "active",
+            "ai_summary": "Ky dokument përshkruan procedurat dhe afatet kryesore. " * 30,
+            "created_at": now - timedelta(days=i),
+            "updated_at": now - timedelta(hours=i),
+            "drive_state": "ok",
+            "storage_backend": "drive",
+            "drive_folder_id": "folder-1",
+            "drive_owner_user_id": 1,
+        }
+        rows.append({f: row[f] for f in fields})
+    return rows
+
+
+def _isoformat_rows(rows: list[dict]) -> list[dict]:
+    return [{k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in row.items()} for row in rows]
+
+
+def _time(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main(rows: int, iterations: int) -> None:
+    for shape, fields in (("default list", LIST_DEFAULT_FIELDS), ("all fields", DOCUMENT_FIELDS)):
+        page = _rows(rows, fields)
+
+        def before() -> bytes:
+            return StdlibJSONResponse({"items": _isoformat_rows(page), "page": 1, "page_size": rows}).body
+
+        def after() -> bytes:
+            return JSONResponse({"items": page, "page": 1, "page_size": rows}).body
+
+        body = after()
+        sizes = [f"raw {len(body):>7} B", f"gzip {len(compress(body, 'gzip')):>6} B"]
+        if brotli is not None:
+            sizes.append(f"br {len(compress(body, 'br')):>6} B")
+        gzip_ms = _time(lambda: gzip.compress(body, compresslevel=6), iterations)
+
+        print(f"{shape} ({rows} rows): {', '.join(sizes)}")
+        print(f"  encode before {_time(before, iterations):6.3f} ms, after {_time(after, iterations):6.3f} ms, gzip {gzip_ms:6.3f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression of document lists.")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.iterations)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.app.similarity import SimilarityIndex, _document_terms
+
+
+# "Similar documents" index on a synthetic topical corpus: build time, top-10
+# query latency, incremental update cost, and how many of the exact top-10 the
+# query finds: by cosine over the stored (truncated) vectors, and by cosine
+# over untruncated TF-IDF vectors. Also the share of results from the query
+# document's own topic. No database needed.
+#
+#   python -m backend.benchmarks.similarity --sizes 10000 100000
+
+CATEGORIES = ["rregullore", "vendime", "procesverbale", "kurrikula", "udhezime", "raporte", "projekte"]
+
+
+def _vocabulary(size: int, rnd: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvxyzëç"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choice(letters) for _ in range(rnd.randint(5, 11))))
+    return sorted(words)
+
+
+def _rows(count: int, seed: int = 7) -> tuple[list[tuple], list[int]]:
+    # Documents about one of a few hundred topics: topic words mixed into
+    # Zipf-distributed general vocabulary.
+    rnd = random.Random(seed)
+    vocab = _vocabulary(30_000, rnd)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    topics = [rnd.sample(vocab[2_000:], 40) for _ in range(300)]
+    start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+
+    def text(topic: list[str], n: int) -> str:
+        words = rnd.choices(vocab, weights, k=n - n // 3) + rnd.choices(topic, k=n // 3)
+        rnd.shuffle(words)
+        return " ".join(words)
+
+    rows = []
+    row_topics = []
+    for i in range(count):
+        t = rnd.randrange(len(topics))
+        topic = topics[t]
+        updated = start + timedelta(seconds=i * 240)
+        rows.append((i + 1, updated, "active", text(topic, 6), text(topic, 40), rnd.choice(CATEGORIES), text(topic, 80)))
+        row_topics.append(t)
+    return rows, row_topics
+
+
+def _exact_top(index: SimilarityIndex, doc_id: int, k: int) -> list[int]:
+    ids, weights = index.vectors[doc_id]
+    query = dict(zip(ids, weights))
+    scores = []
+    for other, (o_ids, o_weights) in index.vectors.items():
+        if other != doc_id:
+            score = sum(query.get(t, 0.0) * w for t, w in zip(o_ids, o_weights))
+            if score > 0:
+                scores.append((score, other))
+    scores.sort(reverse=True)
+    return [d for _, d in scores[:k]]
+
+
+def _untruncated(index: SimilarityIndex, rows: list[tuple]) -> tuple[dict, dict]:
+    # Every term of every document, same weighting and idf as the index.
+    vectors = {}
+    postings: dict[int, list[tuple[int, float]]] = {}
+    for row in rows:
+        weighted = [
+            (index.terms[term], (1.0 + math.log(tf)) * index.idf[index.terms[term]])
+            for term, tf in _document_terms(row).items()
+        ]
+        norm = math.sqrt(sum(w * w for _, w in weighted)) or 1.0
+        vectors[row[0]] = [(t, w / norm) for t, w in weighted]
+        for t, w in vectors[row[0]]:
+            postings.setdefault(t, []).append((row[0], w / norm))
+    return vectors, postings
+
+
+def _untruncated_top(vectors: dict, postings: dict, doc_id: int, k: int) -> list[int]:
+    scores: dict[int, float] = {}
+    for t, wq in vectors[doc_id]:
+        for other, w in postings[t]:
+            scores[other] = scores.get(other, 0.0) + wq * w
+    scores.pop(doc_id, None)
+    return [d for d, _ in sorted(scores.items(), key=lambda item: -item[1])[:k]]
+
+
+def main(sizes: list[int], queries: int) -> None:
+    rnd = random.Random(11)
+    for size in sizes:
+        rows, topics = _rows(size)
+        started = time.perf_counter()
+        index = SimilarityIndex(rows)
+        print(f"{size} documents: build {time.perf_counter() - started:.2f} s, {len(index.terms)} terms")
+
+        sample = rnd.sample(range(1, size + 1), min(queries, size))
+        timings = []
+        for doc_id in sample:
+            started = time.perf_counter()
+            index.similar(doc_id, limit=10, status="active")
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"  top-10 query: p50 {statistics.median(timings):.2f} ms, p99 {p99:.2f} ms")
+
+        found = 0
+        found_untruncated = 0
+        on_topic = 0
+        checked = sample[:20]
+        vectors, postings = _untruncated(index, rows)
+        for doc_id in checked:
+            got = {d for d, _ in index.similar(doc_id, limit=10, status=None)}
+            found += len(got & set(_exact_top(index, doc_id, 10)))
+            found_untruncated += len(got & set(_untruncated_top(vectors, postings, doc_id, 10)))
+            on_topic += sum(topics[d - 1] == topics[doc_id - 1] for d in got)
+        del vectors, postings
+        print(f"  recall@10 vs exact cosine over stored vectors: {found / (10 * len(checked)):.2f}")
+        print(f"  recall@10 vs untruncated TF-IDF cosine: {found_untruncated / (10 * len(checked)):.2f}")
+        print(f"  same-topic precision@10: {on_topic / (10 * len(checked)):.2f}")
+
+        started = time.perf_counter()
+        for row in rows[:1000]:
+            index.apply((row[0], row[1] + timedelta(days=1), row[2], row[3] + " ndryshuar", *row[4:]))
+        print(f"  1000 updates: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the similar-documents index.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    main(args.sizes, args.queries)
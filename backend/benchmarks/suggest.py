@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.app.suggest import SuggestIndex
+
+
+# Autocomplete index on a synthetic catalog: build time, suggest latency for
+# typed prefixes (first hit and cached), and latency while writes keep
+# invalidating cached prefixes. No database needed.
+#
+#   python -m backend.benchmarks.suggest --sizes 10000 100000
+
+TAGS = 400
+
+
+def _words(size: int, rnd: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvxyzëç"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choice(letters) for _ in range(rnd.randint(4, 10))))
+    return sorted(words)
+
+
+def _row(doc_id: int, words: list[str], tags: list[str], rnd: random.Random, updated: datetime) -> tuple:
+    title = " ".join(rnd.choices(words, k=rnd.randint(2, 8))).capitalize()
+    created = datetime(2018, 1, 1, tzinfo=timezone.utc) + timedelta(days=rnd.randrange(3000))
+    return (doc_id, updated, created, "active", title, ", ".join(rnd.sample(tags, rnd.randint(0, 4))))
+
+
+def _p99(timings: list[float]) -> float:
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def _typed_prefixes(words: list[str], rnd: random.Random, count: int) -> list[str]:
+    # What a user sends while typing: 1..6 characters of a real word.
+    out = []
+    for _ in range(count):
+        word = rnd.choice(words)
+        out.append(word[: rnd.randint(1, min(6, len(word)))])
+    return out
+
+
+def main(sizes: list[int], queries: int) -> None:
+    rnd = random.Random(7)
+    words = _words(20_000, rnd)
+    tags = rnd.sample(words, TAGS)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for size in sizes:
+        rows = [_row(i + 1, words, tags, rnd, start) for i in range(size)]
+        started = time.perf_counter()
+        index = SuggestIndex(rows)
+        print(f"{size} documents: build {time.perf_counter() - started:.2f} s, {len(index.keys)} keys")
+
+        prefixes = _typed_prefixes(words, rnd, queries)
+        for label in ("first hit", "cached"):
+            timings = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                index.suggest(prefix, limit=8)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"  {label}: p50 {statistics.median(timings):.3f} ms, p99 {_p99(timings):.3f} ms")
+
+        # One write per 10 queries, each invalidating the prefixes of its completions.
+        timings = []
+        writes = []
+        for n, prefix in enumerate(_typed_prefixes(words, rnd, queries)):
+            if n % 10 == 0:
+                doc_id = rnd.randint(1, size)
+                row = _row(doc_id, words, tags, rnd, start + timedelta(seconds=n))
+                started = time.perf_counter()
+                with index.lock:
+                    index.apply(row)
+                writes.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            index.suggest(prefix, limit=8)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"  with writes: p50 {statistics.median(timings):.3f} ms, p99 {_p99(timings):.3f} ms")
+        print(f"  apply: p50 {statistics.median(writes):.3f} ms, p99 {_p99(writes):.3f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the autocomplete prefix index.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.sizes, args.queries)
@@ -1,37 +1,67 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
 import os
+import tempfile
 
 from starlette.applications import Starlette
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.responses import HTMLResponse, Response
 from starlette.schemas import SchemaGenerator
 from starlette.routing import Route
 from starlette.exceptions import HTTPException
-
-from backend.app.auth import create_access_token, decode_token, get_bearer_token, hash_password, verify_password
-from backend.app.config import get_seed_admin_email, get_seed_admin_password
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.app.auth import create_access_token, get_bearer_token, hash_password, user_from_token, verify_password
+from backend.app.config import (
+    get_catalog_engine,
+    get_catalog_refresh_seconds,
+    get_similarity_refresh_seconds,
+    get_suggest_refresh_seconds,
+    get_drive_sync_interval_seconds,
+    get_drive_sync_user_id,
+    get_seed_admin_email,
+    get_seed_admin_password,
+)
+from backend.app import identity_cache
 from backend.app.db import (
     add_allowed_email,
     create_user,
     get_user_by_email,
     init_db,
-    is_email_allowed,
-    list_allowed_emails,
     remove_allowed_email,
     update_user_credentials_by_email,
     scalar,
 )
+from backend.app.drive_async import close_client as close_drive_client
+from backend.app.drive_sync import run_drive_sync_forever, sync_drive_changes
+from backend.app.bulkhead import DRIVE, WRITES, BulkheadFullError, bulkhead_endpoint, run_in_bulkhead
+from backend.app.catalog import run_refresh_forever as run_catalog_refresh_forever
+from backend.app.similarity import run_refresh_forever as run_similarity_refresh_forever
+from backend.app.suggest import run_refresh_forever as run_suggest_refresh_forever
+from backend.app.tags import run_backfill as run_tags_backfill
+from backend.app.circuit import breaker_states
+from backend.app.responses import CompressionMiddleware, JSONResponse
+from backend.app.ratelimit import RateLimitedError, RateLimitStateBusyError, rate_limited, retry_after_header
+from backend.app.metrics import snapshot as metrics_snapshot
 from backend.app.drive_oauth import drive_auth_callback, drive_auth_start, drive_auth_url, drive_disconnect, drive_status
 
 from backend.app.documents import (
     create_document,
     delete_document,
+    document_facets,
+    document_tags,
+    download_archive,
+    export_documents,
     get_document,
     generate_ai_summary,
+    similar_documents,
+    suggest_documents,
+    get_local_file,
+    local_file_link,
     list_documents,
     update_document,
     archive_document,
@@ -40,24 +70,17 @@ from backend.app.documents import (
 )
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request.state.user = None
-
-        token = get_bearer_token(request)
-        if token:
-            try:
-                payload = decode_token(token)
-                request.state.user = {
-                    "id": int(payload.get("sub")),
-                    "email": payload.get("email"),
-                    "role": payload.get("role"),
-                }
-            except Exception:
-                # Invalid token -> treat as unauthenticated
-                request.state.user = None
+class AuthMiddleware:
+    # Pure ASGI (no BaseHTTPMiddleware): sets request.state.user and passes the
+    # request through untouched, so streaming responses aren't re-buffered.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            token = get_bearer_token(Request(scope))
+            scope.setdefault("state", {})["user"] = user_from_token(token) if token else None
+        await self.app(scope, receive, send)
 
 
 def health(request) -> Response:
@@ -69,6 +92,16 @@ def health_db(request) -> Response:
     return JSONResponse({"status": "ok", "db": value})
 
 
+def health_dependencies(request) -> Response:
+    breakers = breaker_states()
+    degraded = any(b["state"] != "closed" for b in breakers.values())
+    return JSONResponse({"status": "degraded" if degraded else "ok", "breakers": breakers})
+
+
+def health_metrics(request) -> Response:
+    return JSONResponse(metrics_snapshot())
+
+
 async def login(request: Request) -> Response:
     try:
         body = await request.json()
@@ -84,12 +117,13 @@ async def login(request: Request) -> Response:
             status_code=400,
         )
 
-    user = get_user_by_email(email)
+    identity = identity_cache.get_login_identity(email)
+    user = identity["user"]
     if not user:
         return JSONResponse({"error": {"code": "invalid_credentials", "message": "Invalid credentials"}}, status_code=401)
 
     # For department-only usage: non-admin users must be whitelisted by admin.
-    if user.get("role") != "admin" and not is_email_allowed(email):
+    if user.get("role") != "admin" and not identity["allowed"]:
         return JSONResponse(
             {"error": {"code": "forbidden", "message": "Email is not allowed"}},
             status_code=403,
@@ -110,7 +144,7 @@ async def admin_list_allowed_emails(request: Request) -> Response:
     from backend.app.auth import require_role
 
     require_role(request, {"admin"})
-    return JSONResponse({"items": list_allowed_emails()})
+    return JSONResponse({"items": identity_cache.list_allowed_emails()})
 
 
 async def admin_add_allowed_email(request: Request) -> Response:
@@ -127,6 +161,7 @@ async def admin_add_allowed_email(request: Request) -> Response:
         return _bad_request("email is required")
 
     created = add_allowed_email(email)
+    identity_cache.invalidate(f"allowed:{email}")
     return JSONResponse(created, status_code=201)
 
 
@@ -139,6 +174,7 @@ async def admin_remove_allowed_email(request: Request) -> Response:
         return _bad_request("email is required")
 
     ok = remove_allowed_email(email)
+    identity_cache.invalidate(f"allowed:{email}")
     if not ok:
         return JSONResponse({"error": {"code": "not_found", "message": "Email not found"}}, status_code=404)
     return JSONResponse({"status": "deleted"})
@@ -164,6 +200,7 @@ async def admin_create_staff_user(request: Request) -> Response:
 
     # Ensure user is allowed by admin whitelist.
     add_allowed_email(email)
+    identity_cache.invalidate(f"allowed:{email}")
 
     existing = get_user_by_email(email)
     if existing:
@@ -171,14 +208,89 @@ async def admin_create_staff_user(request: Request) -> Response:
             return JSONResponse({"error": {"code": "forbidden", "message": "Cannot modify admin user"}}, status_code=403)
 
         updated = update_user_credentials_by_email(email=email, password_hash=hash_password(password), role=role)
+        identity_cache.invalidate(f"user:{email}")
         if not updated:
             return JSONResponse({"error": {"code": "internal_error", "message": "Failed to update user"}}, status_code=500)
         return JSONResponse({"status": "updated", "user": updated}, status_code=200)
 
     created = create_user(email, hash_password(password), role=role)
+    identity_cache.invalidate(f"user:{email}")
     return JSONResponse({"status": "created", "user": created}, status_code=201)
 
 
+_IMPORT_ERRORS_IN_RESPONSE = 1000
+
+
+async def admin_import_documents(request: Request) -> Response:
+    from backend.app.auth import require_role
+    from backend.app.document_import import import_documents, iter_records
+
+    require_role(request, {"admin"})
+    fmt = (request.query_params.get("format") or "").strip().lower()
+    if not fmt:
+        content_type = request.headers.get("content-type", "")
+        fmt = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    if fmt not in {"csv", "ndjson"}:
+        return _bad_request("format must be csv or ndjson")
+
+    # Spool the upload to disk so memory stays flat, then import it in the writes pool.
+    spool = tempfile.TemporaryFile()
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+
+        errors: list[dict] = []
+
+        def on_error(entry: dict) -> None:
+            if len(errors) < _IMPORT_ERRORS_IN_RESPONSE:
+                errors.append(entry)
+
+        def run() -> dict:
+            source = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+            try:
+                return import_documents(iter_records(source, fmt), on_error=on_error)
+            finally:
+                source.detach()
+
+        try:
+            stats = await run_in_bulkhead(WRITES, run)
+        except UnicodeDecodeError:
+            return _bad_request("File must be UTF-8 encoded")
+    finally:
+        spool.close()
+
+    return JSONResponse({**stats, "errors": errors, "errors_truncated": stats["rejected"] > len(errors)})
+
+
+async def admin_document_duplicates(request: Request) -> Response:
+    from backend.app.auth import require_role
+    from backend.app.dedup import duplicate_clusters
+
+    require_role(request, {"admin"})
+    threshold = None
+    if request.query_params.get("threshold"):
+        try:
+            threshold = float(request.query_params["threshold"])
+        except ValueError:
+            return _bad_request("threshold must be a number")
+        if not 0 < threshold <= 1:
+            return _bad_request("threshold must be between 0 and 1")
+    # Refreshes stale signatures, then clusters the whole catalog in one pass.
+    return JSONResponse(await run_in_bulkhead(WRITES, duplicate_clusters, threshold=threshold))
+
+
+async def admin_drive_sync(request: Request) -> Response:
+    from backend.app.auth import require_role
+
+    require_role(request, {"admin"})
+    try:
+        stats = await sync_drive_changes(user_id=get_drive_sync_user_id())
+    except RuntimeError as e:
+        return _bad_request(f"Drive sync failed: {e}")
+    return JSONResponse(stats)
+
+
 def me(request: Request) -> Response:
     if not request.state.user:
         return JSONResponse({"error": {"code": "unauthorized", "message": "Missing or invalid token"}}, status_code=401)
@@ -221,34 +333,48 @@ def docs(request: Request) -> Response:
 routes = [
     Route("/health", endpoint=health, methods=["GET"]),
     Route("/health/db", endpoint=health_db, methods=["GET"]),
+    Route("/health/metrics", endpoint=health_metrics, methods=["GET"]),
+    Route("/health/dependencies", endpoint=health_dependencies, methods=["GET"]),
     Route("/openapi.json", endpoint=openapi, methods=["GET"]),
     Route("/docs", endpoint=docs, methods=["GET"]),
-    Route("/api/auth/login", endpoint=login, methods=["POST"]),
+    Route("/api/auth/login", endpoint=rate_limited("login", login), methods=["POST"]),
     Route("/api/auth/me", endpoint=me, methods=["GET"]),
     Route("/api/admin/allowed-emails", endpoint=admin_list_allowed_emails, methods=["GET"]),
     Route("/api/admin/allowed-emails", endpoint=admin_add_allowed_email, methods=["POST"]),
     Route("/api/admin/allowed-emails/{email:str}", endpoint=admin_remove_allowed_email, methods=["DELETE"]),
     Route("/api/admin/users", endpoint=admin_create_staff_user, methods=["POST"]),
-    Route("/api/drive/auth/start", endpoint=drive_auth_start, methods=["GET"]),
-    Route("/api/drive/auth/url", endpoint=drive_auth_url, methods=["GET"]),
-    Route("/api/drive/auth/callback", endpoint=drive_auth_callback, methods=["GET"]),
-    Route("/api/drive/status", endpoint=drive_status, methods=["GET"]),
-    Route("/api/drive/disconnect", endpoint=drive_disconnect, methods=["POST"]),
+    Route("/api/admin/drive/sync", endpoint=admin_drive_sync, methods=["POST"]),
+    Route("/api/admin/documents/import", endpoint=admin_import_documents, methods=["POST"]),
+    Route("/api/admin/documents/duplicates", endpoint=admin_document_duplicates, methods=["GET"]),
+    Route("/api/drive/auth/start", endpoint=bulkhead_endpoint(DRIVE, drive_auth_start), methods=["GET"]),
+    Route("/api/drive/auth/url", endpoint=bulkhead_endpoint(DRIVE, drive_auth_url), methods=["GET"]),
+    Route("/api/drive/auth/callback", endpoint=bulkhead_endpoint(DRIVE, drive_auth_callback), methods=["GET"]),
+    Route("/api/drive/status", endpoint=bulkhead_endpoint(DRIVE, drive_status), methods=["GET"]),
+    Route("/api/drive/disconnect", endpoint=bulkhead_endpoint(DRIVE, drive_disconnect), methods=["POST"]),
     Route("/api/documents", endpoint=list_documents, methods=["GET"]),
-    Route("/api/documents", endpoint=create_document, methods=["POST"]),
+    Route("/api/documents", endpoint=rate_limited("upload", create_document), methods=["POST"]),
+    Route("/api/documents/facets", endpoint=document_facets, methods=["GET"]),
+    Route("/api/documents/suggest", endpoint=suggest_documents, methods=["GET"]),
+    Route("/api/documents/tags", endpoint=document_tags, methods=["GET"]),
+    Route("/api/documents/export", endpoint=export_documents, methods=["GET"]),
+    Route("/api/documents/archive.zip", endpoint=rate_limited("archive", download_archive), methods=["POST"]),
     Route("/api/documents/{doc_id:int}", endpoint=get_document, methods=["GET"]),
-    Route("/api/documents/{doc_id:int}/ai-summary", endpoint=generate_ai_summary, methods=["POST"]),
+    Route("/api/documents/{doc_id:int}/similar", endpoint=similar_documents, methods=["GET"]),
+    Route("/api/documents/{doc_id:int}/ai-summary", endpoint=rate_limited("ai_summary", generate_ai_summary), methods=["POST"]),
     Route("/api/documents/{doc_id:int}", endpoint=update_document, methods=["PUT"]),
-    Route("/api/documents/{doc_id:int}/file", endpoint=replace_document_file, methods=["PUT"]),
-    Route("/api/documents/{doc_id:int}/archive", endpoint=archive_document, methods=["PATCH"]),
-    Route("/api/documents/{doc_id:int}/unarchive", endpoint=unarchive_document, methods=["PATCH"]),
+    Route("/api/documents/{doc_id:int}/file", endpoint=rate_limited("replace", replace_document_file), methods=["PUT"]),
+    Route("/api/documents/{doc_id:int}/archive", endpoint=bulkhead_endpoint(WRITES, archive_document), methods=["PATCH"]),
+    Route("/api/documents/{doc_id:int}/unarchive", endpoint=bulkhead_endpoint(WRITES, unarchive_document), methods=["PATCH"]),
     Route("/api/documents/{doc_id:int}", endpoint=delete_document, methods=["DELETE"]),
+    Route("/api/storage/local/{key:str}", endpoint=get_local_file, methods=["GET"]),
+    Route("/api/storage/local/{key:str}/link", endpoint=local_file_link, methods=["GET"]),
 ]
 
 
 debug = (os.getenv("DEBUG") or "").strip().lower() in {"1", "true", "yes"}
 app = Starlette(debug=debug, routes=routes)
 app.add_middleware(AuthMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -268,6 +394,33 @@ async def permission_error_handler(request: Request, exc: PermissionError):
     return JSONResponse({"error": {"code": "forbidden", "message": message}}, status_code=403)
 
 
+@app.exception_handler(BulkheadFullError)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFullError):
+    return JSONResponse(
+        {"error": {"code": "service_unavailable", "message": str(exc)}},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    return JSONResponse(
+        {"error": {"code": "rate_limited", "message": str(exc)}},
+        status_code=429,
+        headers=retry_after_header(exc),
+    )
+
+
+@app.exception_handler(RateLimitStateBusyError)
+async def rate_limit_busy_handler(request: Request, exc: RateLimitStateBusyError):
+    return JSONResponse(
+        {"error": {"code": "service_unavailable", "message": str(exc)}},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     # Normalize Starlette's default errors into our JSON format.
@@ -317,3 +470,50 @@ async def on_startup() -> None:
             from backend.app.auth import hash_password
 
             create_user(seed_email, hash_password(seed_password), role="admin")
+
+    # Cross-worker invalidation for the user / allowed-email cache.
+    app.state.identity_listener_task = asyncio.create_task(identity_cache.run_listener_forever())
+
+    # Normalized tags for rows that predate tag_list (no-op once done).
+    app.state.tags_backfill_task = asyncio.create_task(run_tags_backfill())
+
+    # Optional in-process catalog for list filtering.
+    if get_catalog_engine() == "memory":
+        app.state.catalog_task = asyncio.create_task(
+            run_catalog_refresh_forever(interval_seconds=get_catalog_refresh_seconds())
+        )
+
+    # In-process TF-IDF index behind /api/documents/{id}/similar.
+    similarity_interval = get_similarity_refresh_seconds()
+    if similarity_interval > 0:
+        app.state.similarity_task = asyncio.create_task(
+            run_similarity_refresh_forever(interval_seconds=similarity_interval)
+        )
+
+    # In-process prefix index behind /api/documents/suggest.
+    suggest_interval = get_suggest_refresh_seconds()
+    if suggest_interval > 0:
+        app.state.suggest_task = asyncio.create_task(run_suggest_refresh_forever(interval_seconds=suggest_interval))
+
+    # Optional background Drive reconciliation (changes feed).
+    interval = get_drive_sync_interval_seconds()
+    if interval > 0:
+        app.state.drive_sync_task = asyncio.create_task(
+            run_drive_sync_forever(user_id=get_drive_sync_user_id(), interval_seconds=interval)
+        )
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for name in (
+        "drive_sync_task",
+        "identity_listener_task",
+        "catalog_task",
+        "similarity_task",
+        "suggest_task",
+        "tags_backfill_task",
+    ):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await close_drive_client()
@@ -1,5 +1,5 @@
 import { useEffect, useRef, useState } from 'react'
-import { apiFetch } from '../lib/api'
+import { apiFetch, openLocalFile } from '../lib/api'
 import type { DocumentItem } from '../lib/types'
 
 type AiCacheEntry = {
@@ -247,6 +247,11 @@ export default function DetailsModal({ open, docId, onClose }: Props) {
                   href={doc.web_view_link}
                   target="_blank"
                   rel="noreferrer"
+                  onClick={(e) => {
+                    if (doc.storage_backend !== 'local') return
+                    e.preventDefault()
+                    openLocalFile(doc.drive_file_id)
+                  }}
                   className="rounded-md bg-slate-900 px-3 py-2 text-sm font-medium text-white hover:bg-slate-800"
                 >
                   Hape në Drive
@@ -1,3 +1,13 @@
+import { useEffect, useRef, useState } from 'react'
+import { apiFetch } from '../lib/api'
+
+type Suggestion = { text: string; kind: 'title' | 'tag'; documents: number }
+
+// Suggestions follow every keystroke (cheap, in-memory on the server); the
+// list query only changes once typing pauses or a suggestion is picked.
+const SUGGEST_DELAY_MS = 100
+const QUERY_DELAY_MS = 400
+
 type Props = {
   query: string
   category: string
@@ -8,6 +18,50 @@ type Props = {
 }
 
 export default function DocumentsFilters({ query, category, from, to, onChange, onClear }: Props) {
+  const [draft, setDraft] = useState(query)
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([])
+  const onChangeRef = useRef(onChange)
+  onChangeRef.current = onChange
+
+  // Cleared / changed by the parent (e.g. "Pastro filtrat").
+  useEffect(() => {
+    setDraft(query)
+  }, [query])
+
+  useEffect(() => {
+    const prefix = draft.trim()
+    if (!prefix) {
+      setSuggestions([])
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(() => {
+      apiFetch(`/api/documents/suggest?prefix=${encodeURIComponent(prefix)}&limit=8`)
+        .then((res) => {
+          if (!cancelled) setSuggestions(res.items || [])
+        })
+        .catch(() => {
+          if (!cancelled) setSuggestions([])
+        })
+    }, SUGGEST_DELAY_MS)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [draft])
+
+  useEffect(() => {
+    if (draft === query) return
+    const timer = setTimeout(() => onChangeRef.current({ query: draft }), QUERY_DELAY_MS)
+    return () => clearTimeout(timer)
+  }, [draft, query])
+
+  function onDraftChange(value: string) {
+    setDraft(value)
+    // Picking a suggestion from the list applies it right away.
+    if (value !== query && suggestions.some((s) => s.text === value)) onChange({ query: value })
+  }
+
   return (
     <div className="rounded-xl border bg-white p-4">
       <div className="grid grid-cols-1 gap-3 md:grid-cols-5">
@@ -16,9 +70,21 @@ export default function DocumentsFilters({ query, category, from, to, onChange,
           <input
             className="mt-1 w-full rounded-md border px-3 py-2"
             placeholder="Titulli..."
-            value={query}
-            onChange={(e) => onChange({ query: e.target.value })}
+            list="documents-suggest"
+            autoComplete="off"
+            value={draft}
+            onChange={(e) => onDraftChange(e.target.value)}
+            onKeyDown={(e) => {
+              if (e.key === 'Enter' && draft !== query) onChange({ query: draft })
+            }}
           />
+          <datalist id="documents-suggest">
+            {suggestions.map((s) => (
+              <option key={`${s.kind}:${s.text}`} value={s.text}>
+                {s.kind === 'tag' ? `etiketë · ${s.documents}` : `titull · ${s.documents}`}
+              </option>
+            ))}
+          </datalist>
         </div>
 
         <div>
@@ -1,3 +1,4 @@
+import { openLocalFile } from '../lib/api'
 import type { Role } from '../lib/auth'
 import type { DocumentItem } from '../lib/types'
 
@@ -65,6 +66,11 @@ export default function DocumentsTable({
                     href={d.web_view_link}
                     target="_blank"
                     rel="noreferrer"
+                    onClick={(e) => {
+                      if (d.storage_backend !== 'local') return
+                      e.preventDefault()
+                      openLocalFile(d.drive_file_id)
+                    }}
                     className="rounded-md border px-2 py-1 text-xs font-medium hover:bg-slate-50"
                   >
                     Shiko
@@ -39,3 +39,17 @@ export async function apiFetch(path: string, init: RequestInit = {}) {
   if (contentType.includes('application/json')) return res.json()
   return res.text()
 }
+
+// Locally stored files can't be opened by plain navigation (no Bearer token):
+// ask for a short-lived signed link and point a new tab at it. The tab is
+// opened before the request so popup blockers treat it as a user action.
+export function openLocalFile(key: string) {
+  const win = window.open('', '_blank')
+  if (win) win.opener = null
+  apiFetch(`/api/storage/local/${encodeURIComponent(key)}/link`)
+    .then((res) => {
+      if (win) win.location.href = res.url
+      else window.location.href = res.url
+    })
+    .catch(() => win?.close())
+}
@@ -3,15 +3,19 @@ export type DocumentStatus = 'active' | 'archived'
 export type DocumentItem = {
   id: number
   title: string
-  description: string | null
+  // Not in list responses unless requested via ?fields=
+  description?: string | null
   category: string
   tags: string | null
   file_type: string
   drive_file_id: string
   web_view_link: string
+  storage_backend?: 'drive' | 'local'
   uploaded_by_email?: string | null
   status: DocumentStatus
-  ai_summary: string | null
+  ai_summary?: string | null
   created_at: string
   updated_at: string
+  // Only on create/edit responses: likely near-duplicates of this document
+  possible_duplicates?: { id: number; title: string; similarity: number }[]
 }
@@ -33,7 +33,7 @@ export default function DokumentePage() {
   const navigate = useNavigate()
   const { role, email } = getAuth()
 
-  const [uploadToast, setUploadToast] = useState<{ id: number; title: string } | null>(null)
+  const [uploadToast, setUploadToast] = useState<{ id: number; title: string; duplicates: string[] } | null>(null)
 
   const [query, setQuery] = useState('')
   const [category, setCategory] = useState('')
@@ -104,7 +104,8 @@ export default function DokumentePage() {
     const toast = st?.uploadToast
     if (!toast || typeof toast?.id !== 'number' || typeof toast?.title !== 'string') return
 
-    setUploadToast({ id: toast.id, title: toast.title })
+    const duplicates = Array.isArray(toast.duplicates) ? toast.duplicates.filter((d: unknown) => typeof d === 'string') : []
+    setUploadToast({ id: toast.id, title: toast.title, duplicates })
     navigate('.', { replace: true, state: null })
   }, [location.state, navigate])
 
@@ -284,6 +285,11 @@ export default function DokumentePage() {
               Undo
             </button>
           </div>
+          {uploadToast.duplicates.length ? (
+            <div className="mt-2 text-sm text-amber-700">
+              Mund të jetë dublikatë e: {uploadToast.duplicates.map((t) => `"${t}"`).join(', ')}
+            </div>
+          ) : null}
         </div>
       ) : null}
 
@@ -53,7 +53,13 @@ export default function NgarkoPage() {
 
       navigate('/dokumente', {
         replace: true,
-        state: { uploadToast: { id: created?.id, title: created?.title || title.trim() } },
+        state: {
+          uploadToast: {
+            id: created?.id,
+            title: created?.title || title.trim(),
+            duplicates: (created?.possible_duplicates || []).map((d: any) => d?.title),
+          },
+        },
       })
     } catch (e: any) {
       const msg = e?.payload?.error?.message || 'Gabim gjatë ngarkimit'
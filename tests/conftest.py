@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+import uuid
+
+import pytest
+
+
+# Tests marked with the `pg` fixture run against a throwaway database created
+# on the server in TEST_DATABASE_URL (e.g. postgresql://postgres@localhost:5432/postgres)
+# and are skipped when it isn't set. Everything else runs without services.
+
+
+@pytest.fixture(scope="session")
+def pg_database():
+    admin_url = os.getenv("TEST_DATABASE_URL")
+    if not admin_url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    import psycopg
+
+    name = f"docs_test_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        conn.execute(f"CREATE DATABASE {name}")
+    url = admin_url.rsplit("/", 1)[0] + "/" + name
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = url
+
+    from backend.app.db import init_db
+
+    init_db()
+    yield url
+
+    if previous is None:
+        os.environ.pop("DATABASE_URL", None)
+    else:
+        os.environ["DATABASE_URL"] = previous
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        conn.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+
+
+@pytest.fixture
+def pg(pg_database):
+    # Empty document tables (and derived counts) for every test.
+    from backend.app import list_cache
+    from backend.app.db import _connect
+
+    with _connect() as conn:
+        conn.execute(
+            "TRUNCATE academic_documents, document_facet_counts, document_tag_counts, drive_sync_state, users "
+            "RESTART IDENTITY CASCADE"
+        )
+        conn.commit()
+    list_cache.clear()
+    yield pg_database
+
+
+@pytest.fixture
+def make_document(pg):
+    from backend.app.db import create_document_row
+
+    counter = iter(range(1, 1_000_000))
+
+    def make(**fields) -> dict:
+        n = next(counter)
+        values = {
+            "title": f"Dokument {n}",
+            "category": "request",
+            "description": None,
+            "tags": None,
+            "file_type": "application/pdf",
+            "drive_file_id": f"file-{n}",
+            "web_view_link": f"https://drive.example/{n}",
+            "uploaded_by_user_id": None,
+        }
+        values.update(fields)
+        return create_document_row(**values)
+
+    return make
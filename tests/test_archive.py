@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import zipfile
+from datetime import datetime, timezone
+
+from backend.app.archive import ERRORS_ENTRY, stream_archive
+
+
+def _doc(doc_id: int, title: str, **fields) -> dict:
+    doc = {"id": doc_id, "title": title, "category": "request", "file_type": "application/pdf"}
+    doc.update(fields)
+    return doc
+
+
+async def _collect(docs: list[dict], fetch, *, concurrency: int = 3) -> tuple[bytes, int]:
+    chunks = [chunk async for chunk in stream_archive(docs, fetch, concurrency=concurrency)]
+    return b"".join(chunks), len(chunks)
+
+
+def test_streams_every_file_and_lists_failures():
+    docs = [
+        _doc(1, "Kërkesë", created_at=datetime(2024, 5, 1, 12, tzinfo=timezone.utc)),
+        _doc(2, "kërkesë"),  # same name case-insensitively
+        _doc(3, "Mungon"),
+        _doc(4, 'a/b:c*?"<>|', category=None, file_type="image/png"),
+    ]
+
+    async def fetch(doc: dict) -> bytes:
+        await asyncio.sleep(0.01 * (4 - doc["id"]))  # finish out of order
+        if doc["id"] == 3:
+            raise RuntimeError("Drive download failed")
+        return f"content-{doc['id']}".encode()
+
+    data, chunks = asyncio.run(_collect(docs, fetch))
+
+    # One flush per finished entry plus the central directory.
+    assert chunks == 4
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        names = {info.filename: zf.read(info).decode() for info in zf.infolist()}
+        stamp = zf.getinfo("request/Kërkesë (1).pdf").date_time
+    # Entries are named in the order they finish: 2 before 1.
+    assert names["request/kërkesë.pdf"] == "content-2"
+    assert names["request/Kërkesë (1).pdf"] == "content-1"
+    assert stamp == docs[0]["created_at"].astimezone().timetuple()[:6]
+    assert names["uncategorized/a_b_c_.png"] == "content-4"
+    assert names[ERRORS_ENTRY] == "id\ttitle\terror\n3\tMungon\tDrive download failed\n"
+
+
+def test_no_errors_entry_when_everything_downloads():
+    async def fetch(doc: dict) -> bytes:
+        return b"x"
+
+    data, _ = asyncio.run(_collect([_doc(1, "A"), _doc(2, "B")], fetch, concurrency=1))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert sorted(zf.namelist()) == ["request/A.pdf", "request/B.pdf"]
+
+
+def test_closing_the_stream_cancels_downloads_in_flight():
+    cancelled = []
+
+    async def fetch(doc: dict) -> bytes:
+        if doc["id"] == 1:
+            return b"first"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(doc["id"])
+            raise
+        return b"never"
+
+    async def main() -> None:
+        stream = stream_archive([_doc(i, f"D{i}") for i in range(1, 4)], fetch, concurrency=3)
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(main())
+    assert sorted(cancelled) == [2, 3]
+
+
+
+def test_archive_downloads_run_at_background_drive_priority(tmp_path, monkeypatch):
+    from starlette.testclient import TestClient
+
+    from backend.app import documents, drive_quota, ratelimit
+    from backend.app.auth import create_access_token
+
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    monkeypatch.setenv("RATE_LIMIT_STATE_PATH", str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(ratelimit, "_conn", None)
+    monkeypatch.setattr(
+        documents, "list_archive_documents", lambda **kwargs: [_doc(i, "A", drive_file_id=f"file-{i}") for i in (1, 2)]
+    )
+    priorities = []
+
+    async def read_content(storage, *, user_ids, key):
+        priorities.append(drive_quota.current_priority())
+        return b"content"
+
+    monkeypatch.setattr(documents, "read_content", read_content)
+    from backend.main import app
+
+    token = create_access_token(1, "staf@example.com", "staf")
+    res = TestClient(app).post(
+        "/api/documents/archive.zip", json={"ids": [1, 2]}, headers={"Authorization": f"Bearer {token}"}
+    )
+    if ratelimit._conn is not None:
+        ratelimit._conn.close()
+
+    assert res.status_code == 200
+    assert priorities == [drive_quota.BACKGROUND] * 2
+    # The request's own context is untouched.
+    assert drive_quota.current_priority() == drive_quota.INTERACTIVE
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+
+import jwt
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app import auth
+from backend.main import AuthMiddleware
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "first-secret")
+    auth._verified_tokens.clear()
+    yield
+    auth._verified_tokens.clear()
+
+
+@pytest.fixture
+def client():
+    def whoami(request):
+        return JSONResponse({"user": request.state.user})
+
+    def stream(request):
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    app = Starlette(
+        routes=[Route("/whoami", whoami), Route("/stream", stream)],
+        middleware=[Middleware(AuthMiddleware)],
+    )
+    return TestClient(app)
+
+
+def _token(exp: float, secret: str = "first-secret") -> str:
+    return jwt.encode({"sub": "5", "email": "a@school.test", "role": "admin", "exp": exp}, secret, algorithm="HS256")
+
+
+def test_middleware_sets_request_user(client):
+    token = auth.create_access_token(5, "a@school.test", "admin")
+    res = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+    assert res.json()["user"] == {"id": 5, "email": "a@school.test", "role": "admin"}
+
+    assert client.get("/whoami").json()["user"] is None
+    assert client.get("/whoami", headers={"Authorization": "Bearer junk"}).json()["user"] is None
+    assert client.get("/whoami", headers={"Authorization": f"Basic {token}"}).json()["user"] is None
+    forged = _token(time.time() + 60, secret="other-secret")
+    assert client.get("/whoami", headers={"Authorization": f"Bearer {forged}"}).json()["user"] is None
+
+
+def test_streaming_responses_pass_through(client):
+    token = auth.create_access_token(5, "a@school.test", "admin")
+    res = client.get("/stream", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.text == "abc"
+
+
+def test_repeat_requests_skip_the_verify(monkeypatch):
+    token = auth.create_access_token(5, "a@school.test", "admin")
+    decodes = []
+    real_decode = auth.decode_token
+
+    def counting_decode(*args):
+        decodes.append(1)
+        return real_decode(*args)
+
+    monkeypatch.setattr(auth, "decode_token", counting_decode)
+    for _ in range(3):
+        assert auth.user_from_token(token)["id"] == 5
+    assert len(decodes) == 1
+
+
+def test_cached_token_is_rejected_once_expired():
+    token = _token(time.time() + 1)
+    assert auth.user_from_token(token)["id"] == 5
+    time.sleep(1.1)
+    assert auth.user_from_token(token) is None
+    assert not auth._verified_tokens
+
+
+def test_cache_is_bounded_lru(monkeypatch):
+    monkeypatch.setattr(auth, "_TOKEN_CACHE_SIZE", 2)
+    exp = time.time() + 60
+    first, second, third = (
+        jwt.encode({"sub": str(i), "exp": exp}, "first-secret", algorithm="HS256") for i in range(3)
+    )
+    auth.user_from_token(first)
+    auth.user_from_token(second)
+    auth.user_from_token(first)
+    auth.user_from_token(third)
+    # `second` was least recently used.
+    assert [user["id"] for _, user in auth._verified_tokens.values()] == [0, 2]
+
+
+def test_rotating_the_secret_invalidates_cached_tokens(monkeypatch):
+    token = auth.create_access_token(1, "a@school.test", "staff")
+    assert auth.user_from_token(token)["id"] == 1
+
+    monkeypatch.setenv("JWT_SECRET", "second-secret")
+    assert auth.user_from_token(token) is None
+
+    # Rolling back accepts the token again; it was never signed with the new secret.
+    monkeypatch.setenv("JWT_SECRET", "first-secret")
+    assert auth.user_from_token(token)["id"] == 1
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+
+import anyio
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app import bulkhead
+from backend.app.bulkhead import Bulkhead, BulkheadFullError
+from backend.main import bulkhead_full_handler
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools(monkeypatch):
+    monkeypatch.setattr(bulkhead, "_bulkheads", {})
+
+
+def test_rejects_beyond_workers_plus_queue():
+    pool = Bulkhead("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    results = []
+
+    async def call():
+        results.append(await pool.run(release.wait, 5))
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(call)
+            tg.start_soon(call)
+            while pool.pending < 2:
+                await anyio.sleep(0.01)
+            # One running, one queued: the third caller is turned away at once.
+            with pytest.raises(BulkheadFullError):
+                await pool.run(lambda: None)
+            release.set()
+        # Slots free up again once the work finishes.
+        assert await pool.run(lambda: "ok") == "ok"
+
+    anyio.run(main)
+    assert results == [True, True]
+    assert pool.pending == 0
+
+
+def test_full_pool_is_a_503_and_other_pools_still_serve(monkeypatch):
+    monkeypatch.setenv("BULKHEAD_AI_WORKERS", "1")
+    monkeypatch.setenv("BULKHEAD_AI_QUEUE", "0")
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow(request):
+        started.set()
+        release.wait(5)
+        return JSONResponse({"ok": True})
+
+    def fast(request):
+        return JSONResponse({"ok": True})
+
+    app = Starlette(
+        routes=[
+            Route("/ai", bulkhead.bulkhead_endpoint(bulkhead.AI, slow)),
+            Route("/catalog", bulkhead.bulkhead_endpoint(bulkhead.CATALOG, fast)),
+        ],
+        exception_handlers={BulkheadFullError: bulkhead_full_handler},
+    )
+
+    with TestClient(app) as client:
+        first = {}
+        worker = threading.Thread(target=lambda: first.update(res=client.get("/ai")))
+        worker.start()
+        try:
+            assert started.wait(5)
+            res = client.get("/ai")
+            assert res.status_code == 503
+            assert res.headers["Retry-After"] == "1"
+            assert res.json()["error"]["code"] == "service_unavailable"
+            # A saturated AI pool doesn't block catalog reads.
+            assert client.get("/catalog").status_code == 200
+        finally:
+            release.set()
+            worker.join(5)
+    assert first["res"].status_code == 200
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from backend.app import circuit, drive_async
+from backend.app.circuit import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_consecutive_failures_and_probes_once(clock):
+    breaker = CircuitBreaker("drive", failure_threshold=3, reset_seconds=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError) as rejected:
+        breaker.before_call()
+    assert rejected.value.retry_after == 30
+
+    clock.now += 30
+    breaker.before_call()  # the single half-open probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()  # probe failed: open again for a full period
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 1
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.snapshot() == {"state": "closed", "consecutive_failures": 0}
+    breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("gemini", failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.before_call()
+
+
+def test_drive_requests_fail_fast_once_drive_keeps_failing(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(503, json={"error": {"errors": [{"reason": "backendError"}], "message": "down"}})
+
+    monkeypatch.setenv("DRIVE_MAX_RETRIES", "0")
+    monkeypatch.setattr(circuit, "_breakers", {"drive": CircuitBreaker("drive", failure_threshold=2, reset_seconds=60)})
+    monkeypatch.setattr(drive_async, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def token(user_id: int) -> str:
+        return "token"
+
+    monkeypatch.setattr(drive_async, "get_access_token", token)
+
+    async def call() -> None:
+        await drive_async.delete_file_from_drive(user_id=1, drive_file_id="abc")
+
+    for _ in range(2):
+        with pytest.raises(drive_async.DriveHTTPError):
+            asyncio.run(call())
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call())
+    # The third call never reached Drive.
+    assert len(calls) == 2
+
+
+def test_drive_timeout_setting_bounds_the_http_client(monkeypatch):
+    # A server that accepts the connection and never answers.
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(server.accept()), daemon=True).start()
+
+    monkeypatch.setenv("DRIVE_HTTP_TIMEOUT_SECONDS", "0.3")
+    monkeypatch.setenv("DRIVE_MAX_RETRIES", "0")
+    monkeypatch.setattr(drive_async, "_client", None)
+    monkeypatch.setattr(drive_async, "_API_BASE", f"http://127.0.0.1:{server.getsockname()[1]}")
+    breaker = CircuitBreaker("drive", failure_threshold=5, reset_seconds=60)
+    monkeypatch.setattr(circuit, "_breakers", {"drive": breaker})
+
+    async def token(user_id: int) -> str:
+        return "token"
+
+    monkeypatch.setattr(drive_async, "get_access_token", token)
+
+    async def call() -> None:
+        try:
+            await drive_async.delete_file_from_drive(user_id=1, drive_file_id="abc")
+        finally:
+            await drive_async.close_client()
+
+    started = time.monotonic()
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(call())
+    assert time.monotonic() - started < 5
+    assert breaker.snapshot()["consecutive_failures"] == 1
+    server.close()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import gzip
+import types
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app import responses
+from backend.app.responses import CompressionMiddleware, JSONResponse
+
+_BIG = {"items": [{"id": i, "title": f"Dokument {i}"} for i in range(100)]}
+
+
+@pytest.fixture
+def client():
+    routes = [
+        Route("/big", lambda request: JSONResponse(_BIG)),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/binary", lambda request: Response(b"\0" * 4096, media_type="application/pdf")),
+        Route("/stream", lambda request: StreamingResponse(iter([b"x" * 4096] * 2), media_type="text/plain")),
+        Route(
+            "/encoded",
+            lambda request: PlainTextResponse("x" * 4096, headers={"Content-Encoding": "identity"}),
+        ),
+    ]
+    app = Starlette(routes=routes, middleware=[Middleware(CompressionMiddleware, minimum_size=500)])
+    return TestClient(app)
+
+
+def _get(client, path: str, accept: str):
+    # Raw body, so the test sees exactly what went over the wire.
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as res:
+        return res, b"".join(res.iter_raw())
+
+
+def test_gzip_above_the_threshold(client):
+    res, body = _get(client, "/big", "gzip")
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert res.headers["Vary"] == "Accept-Encoding"
+    assert int(res.headers["Content-Length"]) == len(body)
+    assert gzip.decompress(body) == responses.dumps(_BIG)
+
+
+def test_small_binary_streamed_and_pre_encoded_bodies_pass_through(client):
+    for path in ("/small", "/binary", "/stream", "/encoded"):
+        res, body = _get(client, path, "gzip")
+        assert res.headers.get("Content-Encoding") in (None, "identity"), path
+    assert body == b"x" * 4096
+
+
+def test_no_acceptable_encoding_passes_through(client):
+    for accept in ("identity", "gzip;q=0", "deflate"):
+        res, body = _get(client, "/big", accept)
+        assert "Content-Encoding" not in res.headers
+        assert body == responses.dumps(_BIG)
+
+
+def test_negotiation_prefers_br_only_when_available(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert responses._choose_encoding("br, gzip") == "gzip"
+    assert responses._choose_encoding("br") is None
+
+    monkeypatch.setattr(responses, "brotli", types.SimpleNamespace())
+    assert responses._choose_encoding("gzip, br") == "br"
+    assert responses._choose_encoding("br;q=0, gzip") == "gzip"
+    assert responses._choose_encoding("br;q=bogus, gzip;q=0.5") == "gzip"
+
+
+def test_brotli_round_trip(client):
+    brotli = pytest.importorskip("brotli")
+    res, body = _get(client, "/big", "br, gzip")
+    assert res.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(body) == responses.dumps(_BIG)
+
+
+def test_threshold_comes_from_settings(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_MIN_SIZE", "0")
+    app = Starlette(
+        routes=[Route("/big", lambda request: JSONResponse(_BIG))], middleware=[Middleware(CompressionMiddleware)]
+    )
+    res, _ = _get(TestClient(app), "/big", "gzip")
+    # 0 disables compression entirely.
+    assert "Content-Encoding" not in res.headers
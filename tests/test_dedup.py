@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from backend.app.dedup import band_buckets, duplicate_clusters, estimate, index_document, shingles, signature
+
+_ORIGINAL = (
+    "Vendim i Senatit Akademik për miratimin e kalendarit akademik të vitit 2023-2024, "
+    "afatet e regjistrimit dhe sesionet e provimeve për të gjitha fakultetet"
+)
+_REUPLOAD = _ORIGINAL.replace("2023-2024", "2023–2024").replace("sesionet", "sesionët")
+_UNRELATED = "Raport vjetor i bibliotekës universitare mbi huazimet dhe blerjet e librave të reja"
+
+
+def _jaccard(a: str, b: str) -> float:
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_signatures_estimate_jaccard_and_collide_for_near_duplicates():
+    original, reupload, unrelated = signature(_ORIGINAL), signature(_REUPLOAD), signature(_UNRELATED)
+
+    assert _jaccard(_ORIGINAL, _REUPLOAD) > 0.85
+    assert estimate(original, reupload) >= 0.8
+    assert estimate(original, unrelated) < 0.2
+    assert set(band_buckets(original)) & set(band_buckets(reupload))
+    assert not set(band_buckets(original)) & set(band_buckets(unrelated))
+
+
+def test_signature_ignores_case_punctuation_and_diacritics():
+    assert signature("Kërkesë, për: ÇERTIFIKATË!") == signature("kerkese per certifikate")
+    assert signature(" ,. ") is None
+
+
+def test_index_document_flags_reuploads_and_report_clusters_them(make_document):
+    original = make_document(title=_ORIGINAL)
+    unrelated = make_document(title=_UNRELATED)
+    assert index_document(original) == []
+    assert index_document(unrelated) == []
+
+    reupload = make_document(title=_REUPLOAD)
+    flagged = index_document(reupload)
+    assert [d["id"] for d in flagged] == [original["id"]]
+    assert flagged[0]["similarity"] >= 0.8
+
+    copy = make_document(title=_REUPLOAD + " (kopje)")  # no signature yet: the report refreshes it
+    report = duplicate_clusters(threshold=0.8)
+    assert report["signatures_refreshed"] == 1
+    assert [[d["id"] for d in cluster] for cluster in report["clusters"]] == [[original["id"], reupload["id"], copy["id"]]]
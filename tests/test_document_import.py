@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import io
+from backend.app.db import _connect
+from backend.app.document_import import import_documents, iter_records
+
+_CSV = """title,category,drive_file_id,status,tags,uploaded_by_email,created_at
+Vendim 1,decision,imp-1,,"senat, 2019",,2019-05-02
+,decision,imp-2,,,,
+Vendim 3,decision,imp-3,deleted,,,
+Vendim 4,decision,imp-1,,,,
+Vendim 5,decision,file-1,,,,
+Vendim 6,decision,imp-6,,,nobody@example.com,
+Vendim 7,request,imp-7,archived,,,
+"""
+
+
+def _rows() -> dict[str, tuple]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT drive_file_id, title, status, tag_list, created_at FROM academic_documents ORDER BY id"
+        ).fetchall()
+    return {r[0]: r[1:] for r in rows}
+
+
+def test_imports_valid_rows_and_reports_every_rejected_line(make_document):
+    make_document()  # drive_file_id file-1
+    errors: list[dict] = []
+
+    stats = import_documents(iter_records(io.StringIO(_CSV), "csv"), on_error=errors.append)
+
+    assert stats["records"] == 7
+    assert stats["imported"] == 2
+    assert stats["rejected"] == 5
+    assert {(e["line"], e["error"]) for e in errors} == {
+        (3, "missing title"),
+        (4, "status must be active or archived"),
+        (5, "duplicate drive_file_id in file"),
+        (6, "drive_file_id already exists"),
+        (7, "unknown uploaded_by_email"),
+    }
+
+    rows = _rows()
+    assert set(rows) == {"file-1", "imp-1", "imp-7"}
+    title, status, tag_list, created_at = rows["imp-1"]
+    assert (title, status, tag_list) == ("Vendim 1", "active", ["2019", "senat"])
+    assert created_at.year == 2019
+    assert rows["imp-7"][1] == "archived"
+
+
+def test_ndjson_parse_errors_are_rejected_not_fatal(pg):
+    errors: list[dict] = []
+    source = io.StringIO('{"title": "A", "category": "request", "drive_file_id": "n-1"}\n{oops\n[1]\n')
+
+    stats = import_documents(iter_records(source, "ndjson"), on_error=errors.append)
+
+    assert (stats["imported"], stats["rejected"]) == (1, 2)
+    assert [e["line"] for e in errors] == [2, 3]
+    assert set(_rows()) == {"n-1"}
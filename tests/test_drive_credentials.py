@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.app import drive_async, drive_credentials, storage
+from backend.app.drive_async import DriveHTTPError
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    drive_credentials._preferred.clear()
+    drive_credentials._failures.clear()
+    yield
+    drive_credentials._preferred.clear()
+    drive_credentials._failures.clear()
+
+
+def _forbidden() -> DriveHTTPError:
+    return DriveHTTPError(status=403, reason="insufficientFilePermissions", message="no access")
+
+
+def _rate_limited() -> DriveHTTPError:
+    return DriveHTTPError(status=403, reason="userRateLimitExceeded", message="slow down", retry_after=2.0)
+
+
+def _call(key: str, candidates: tuple, operation):
+    return asyncio.run(
+        drive_credentials.acall_with_drive_credentials(key=key, candidates=candidates, operation=operation)
+    )
+
+
+def test_falls_back_and_remembers_working_credential():
+    calls = []
+
+    async def operation(user_id: int) -> str:
+        calls.append(user_id)
+        if user_id == 1:
+            raise _forbidden()
+        return f"ok-{user_id}"
+
+    assert _call("f", (1, 2), operation) == "ok-2"
+    assert calls == [1, 2]
+
+    calls.clear()
+    assert _call("f", (1, 2), operation) == "ok-2"
+    # Preferred credential first; the failed one isn't retried within the TTL.
+    assert calls == [2]
+
+
+def test_rate_limit_is_not_negative_cached():
+    attempts = {"n": 0}
+
+    async def operation(user_id: int) -> str:
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise _rate_limited()
+        return "ok"
+
+    with pytest.raises(DriveHTTPError) as e:
+        _call("folder", (7,), operation)
+    assert e.value.retry_after == 2.0
+    assert drive_credentials._failures == {}
+
+    # The quota blip is over: the same (only) credential is tried again right away.
+    assert _call("folder", (7,), operation) == "ok"
+
+
+def test_maps_are_bounded(monkeypatch):
+    monkeypatch.setattr(drive_credentials, "_MAX_ENTRIES", 3)
+
+    async def operation(user_id: int) -> str:
+        if user_id == 1:
+            raise _forbidden()
+        return "ok"
+
+    for i in range(10):
+        assert _call(f"file-{i}", (1, 2), operation) == "ok"
+
+    assert list(drive_credentials._preferred) == ["file-7", "file-8", "file-9"]
+    assert [k for k, _ in drive_credentials._failures] == ["file-7", "file-8", "file-9"]
+
+
+def test_storage_replace_falls_back_and_remembers(monkeypatch):
+    # The production path: DriveStorage -> acall_with_drive_credentials -> drive_async.
+    calls = []
+
+    async def update(*, user_id: int, drive_file_id: str, content_type: str, content: bytes) -> dict:
+        calls.append(user_id)
+        if user_id == 4:
+            raise _forbidden()
+        if len(calls) == 3:
+            raise _rate_limited()
+        return {"drive_file_id": drive_file_id, "web_view_link": "https://drive.example/x"}
+
+    monkeypatch.setattr(drive_async, "update_file_content_in_drive", update)
+    engine = storage.DriveStorage()
+
+    def replace() -> dict:
+        return asyncio.run(engine.replace(user_ids=(4, 5), key="abc", content_type="text/plain", content=b"x"))
+
+    assert replace()["drive_file_id"] == "abc"
+    assert calls == [4, 5]
+    # Remembered: the preferred credential goes first; the rate limit is raised, not cached.
+    with pytest.raises(DriveHTTPError):
+        replace()
+    assert calls == [4, 5, 5]
+    assert ("abc", 5) not in drive_credentials._failures
+    assert replace()["drive_file_id"] == "abc"
+    assert calls == [4, 5, 5, 5]
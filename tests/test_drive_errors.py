@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.app import drive_async
+from backend.app.documents import _dependency_error
+from backend.app.drive_async import DriveHTTPError
+
+
+def _failing_request(error: DriveHTTPError):
+    async def request(*args, **kwargs):
+        raise error
+
+    return request
+
+
+def _replace() -> dict:
+    return asyncio.run(
+        drive_async.update_file_content_in_drive(
+            user_id=1, drive_file_id="abc", content_type="application/pdf", content=b"x"
+        )
+    )
+
+
+def test_rate_limited_replace_answers_503_with_retry_after(monkeypatch):
+    error = DriveHTTPError(status=403, reason="userRateLimitExceeded", message="slow down", retry_after=12.0)
+    monkeypatch.setattr(drive_async, "_request", _failing_request(error))
+
+    with pytest.raises(DriveHTTPError) as raised:
+        _replace()
+
+    res = _dependency_error(raised.value, "Drive update failed")
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "12"
+
+
+def test_permission_error_on_replace_is_a_bad_request(monkeypatch):
+    error = DriveHTTPError(status=403, reason="insufficientFilePermissions", message="no")
+    monkeypatch.setattr(drive_async, "_request", _failing_request(error))
+
+    with pytest.raises(RuntimeError, match="does not have permission") as raised:
+        _replace()
+
+    assert _dependency_error(raised.value, "Drive update failed").status_code == 400
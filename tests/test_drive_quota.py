@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from backend.app import drive_quota, ratelimit
+from backend.app.drive_quota import BACKGROUND, INTERACTIVE, DriveQuotaScheduler
+
+
+@pytest.fixture(autouse=True)
+def state_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_STATE_PATH", str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(ratelimit, "_conn", None)
+    yield
+    if ratelimit._conn is not None:
+        ratelimit._conn.close()
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    counts: dict[str, float] = {}
+
+    def incr(name: str, value: float = 1) -> None:
+        counts[name] = counts.get(name, 0) + value
+
+    monkeypatch.setattr(drive_quota, "incr", incr)
+    return counts
+
+
+def test_workers_share_one_bucket():
+    # Two schedulers stand in for two uvicorn workers: together they get the configured rate.
+    async def main() -> float:
+        workers = [DriveQuotaScheduler(rate_per_second=10, burst=2) for _ in range(2)]
+        started = time.monotonic()
+        await asyncio.gather(*(workers[i % 2].acquire() for i in range(8)))
+        return time.monotonic() - started
+
+    # 2 from the burst, then 6 at 10/s.
+    assert asyncio.run(main()) >= 0.5
+
+
+def test_interactive_waiters_go_first():
+    async def main() -> list[str]:
+        scheduler = DriveQuotaScheduler(rate_per_second=20, burst=1, shared=False)
+        await scheduler.acquire()  # empty the bucket
+        order: list[str] = []
+
+        async def call(name: str, priority: int) -> None:
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(call("bulk-1", BACKGROUND), call("bulk-2", BACKGROUND), call("upload", INTERACTIVE))
+        return order
+
+    assert asyncio.run(main()) == ["upload", "bulk-1", "bulk-2"]
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_cancelled_waiters_neither_count_nor_spend_tokens(counters, shared):
+    async def main() -> float:
+        scheduler = DriveQuotaScheduler(rate_per_second=10, burst=1, shared=shared)
+        await scheduler.acquire()
+        cancelled = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        started = time.monotonic()
+        await scheduler.acquire()
+        await scheduler.acquire()
+        return time.monotonic() - started
+
+    # The cancelled waiter's token goes to the next caller: two more tokens take ~0.2 s, not ~0.3 s.
+    assert asyncio.run(main()) < 0.28
+    assert counters["drive_quota.acquired.interactive"] == 3
+    assert counters["drive_quota.cancelled.interactive"] == 1
+    assert counters["drive_quota.waits.interactive"] == 2
+
+
+def test_pause_holds_every_worker():
+    async def main() -> float:
+        first, second = (DriveQuotaScheduler(rate_per_second=100, burst=10) for _ in range(2))
+        await first.pause(0.3)
+        started = time.monotonic()
+        await second.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.25
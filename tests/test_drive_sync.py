@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.app import drive_sync
+
+
+class FakeDrive:
+    # changes.list by page token: {token: {"changes": [...], "nextPageToken"/"newStartPageToken": ...}}
+    def __init__(self, pages: dict[str, dict], start_token: str = "1"):
+        self.pages = pages
+        self.start_token = start_token
+        self.requested: list[str] = []
+        self.fail_on: set[str] = set()
+
+    async def get_start_page_token(self, *, user_id: int) -> str:
+        return self.start_token
+
+    async def list_changes(self, *, user_id: int, page_token: str) -> dict:
+        self.requested.append(page_token)
+        if page_token in self.fail_on:
+            raise RuntimeError("Drive unavailable")
+        return self.pages[page_token]
+
+
+class FakeStore:
+    def __init__(self, rows: dict[str, dict], page_token: str | None = None):
+        self.rows = rows
+        self.page_token = page_token
+        self.saved_tokens: list[str] = []
+        self.writes: list[dict] = []
+
+    def get_documents_drive_info(self, file_ids: list[str]) -> dict[str, dict]:
+        return {f: dict(self.rows[f]) for f in file_ids if f in self.rows}
+
+    def set_document_drive_state(self, *, doc_id, drive_state, drive_md5, drive_modified_at, web_view_link=None):
+        self.writes.append({"id": doc_id, "drive_state": drive_state, "drive_md5": drive_md5})
+        for row in self.rows.values():
+            if row["id"] == doc_id:
+                row["drive_state"] = drive_state
+                row["drive_md5"] = drive_md5 or row["drive_md5"]
+                row["drive_modified_at"] = drive_modified_at or row["drive_modified_at"]
+
+    def get_drive_sync_page_token(self, user_id: int) -> str | None:
+        return self.page_token
+
+    def set_drive_sync_page_token(self, *, user_id: int, page_token: str) -> None:
+        self.page_token = page_token
+        self.saved_tokens.append(page_token)
+
+
+def _row(doc_id: int, *, md5: str | None = "aaa", modified: datetime | None = None, state: str = "ok") -> dict:
+    return {
+        "id": doc_id,
+        "drive_md5": md5,
+        "drive_modified_at": modified or datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "drive_state": state,
+    }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore({})
+    for name in (
+        "get_documents_drive_info",
+        "set_document_drive_state",
+        "get_drive_sync_page_token",
+        "set_drive_sync_page_token",
+    ):
+        monkeypatch.setattr(drive_sync, name, getattr(store, name))
+    return store
+
+
+def _sync(source) -> dict:
+    return asyncio.run(drive_sync.sync_drive_changes(user_id=1, source=source))
+
+
+def test_first_run_only_records_start_token(store):
+    drive = FakeDrive({}, start_token="42")
+
+    stats = _sync(drive)
+
+    assert stats["initialized"] is True
+    assert store.page_token == "42"
+    assert drive.requested == []
+
+
+def test_follows_pages_and_saves_token_after_each(store):
+    store.page_token = "10"
+    store.rows = {"f1": _row(1), "f2": _row(2)}
+    drive = FakeDrive(
+        {
+            "10": {"changes": [{"fileId": "f1", "removed": True}], "nextPageToken": "11"},
+            "11": {"changes": [{"fileId": "f2", "file": {"trashed": True}}], "newStartPageToken": "20"},
+        }
+    )
+
+    stats = _sync(drive)
+
+    assert drive.requested == ["10", "11"]
+    assert store.saved_tokens == ["11", "20"]
+    assert stats["changes"] == 2 and stats["flagged"] == 2
+    assert store.rows["f1"]["drive_state"] == "deleted"
+    assert store.rows["f2"]["drive_state"] == "trashed"
+
+
+def test_resumes_from_last_saved_page_after_failure(store):
+    store.page_token = "10"
+    store.rows = {"f1": _row(1), "f2": _row(2)}
+    drive = FakeDrive(
+        {
+            "10": {"changes": [{"fileId": "f1", "removed": True}], "nextPageToken": "11"},
+            "11": {"changes": [{"fileId": "f2", "removed": True}], "newStartPageToken": "12"},
+            "12": {"changes": [], "newStartPageToken": "12"},
+        }
+    )
+    drive.fail_on = {"11"}
+
+    with pytest.raises(RuntimeError):
+        _sync(drive)
+    assert store.page_token == "11"
+    assert store.rows["f1"]["drive_state"] == "deleted"
+
+    drive.fail_on.clear()
+    drive.requested.clear()
+    _sync(drive)
+
+    # Page 10 is not fetched again; the next pass starts where the feed now ends.
+    assert drive.requested == ["11"]
+    assert store.rows["f2"]["drive_state"] == "deleted"
+    assert store.page_token == "12"
+    _sync(drive)
+    assert drive.requested == ["11", "12"]
+
+
+def test_updates_are_classified_against_stored_checksum_and_mtime(store):
+    store.page_token = "1"
+    known = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    store.rows = {
+        "same": _row(1, md5="aaa", modified=known),
+        "edited": _row(2, md5="aaa", modified=known),
+        "touched": _row(3, md5=None, modified=known),
+        "legacy": _row(4, md5=None, modified=None),
+    }
+    store.rows["legacy"]["drive_modified_at"] = None
+    drive = FakeDrive(
+        {
+            "1": {
+                "changes": [
+                    {"fileId": "same", "file": {"md5Checksum": "aaa", "modifiedTime": "2026-01-01T00:00:00Z"}},
+                    {"fileId": "edited", "file": {"md5Checksum": "bbb", "modifiedTime": "2026-02-01T00:00:00Z"}},
+                    {"fileId": "touched", "file": {"modifiedTime": "2026-03-01T00:00:00.000Z"}},
+                    {"fileId": "legacy", "file": {"md5Checksum": "ccc", "modifiedTime": "2026-03-01T00:00:00Z"}},
+                    {"fileId": "not-ours", "removed": True},
+                ],
+                "newStartPageToken": "2",
+            }
+        }
+    )
+
+    stats = _sync(drive)
+
+    assert store.rows["same"]["drive_state"] == "ok"
+    assert store.rows["edited"]["drive_state"] == "checksum_changed"
+    assert store.rows["touched"]["drive_state"] == "modified"
+    # Rows never seen before adopt Drive's checksum instead of being flagged.
+    assert store.rows["legacy"]["drive_state"] == "ok"
+    assert store.rows["legacy"]["drive_md5"] == "ccc"
+    assert stats["matched"] == 4
+    # The unchanged row is not rewritten.
+    assert sorted(w["id"] for w in store.writes) == [2, 3, 4]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+
+import pytest
+
+from backend.app import drive_async, drive_credentials, drive_targets, storage
+from backend.app.drive_async import DriveHTTPError
+
+_TARGETS = [
+    {"folder_id": "a", "user_id": 1},
+    {"folder_id": "b", "user_id": 2, "categories": ["Rregullore"]},
+    {"folder_id": "c"},
+]
+
+
+@pytest.fixture(autouse=True)
+def targets(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_TARGETS", json.dumps(_TARGETS))
+    monkeypatch.setenv("DRIVE_THROTTLE_COOLDOWN_SECONDS", "60")
+    monkeypatch.setattr(drive_targets, "_round_robin", itertools.count())
+    drive_targets._throttled_at.clear()
+    drive_credentials._preferred.clear()
+    drive_credentials._failures.clear()
+    yield
+    drive_targets._throttled_at.clear()
+    drive_credentials._preferred.clear()
+    drive_credentials._failures.clear()
+
+
+def _folders(category: str | None = None) -> list[str]:
+    return [t["folder_id"] for t in drive_targets.choose_targets(category)]
+
+
+def test_round_robin_rotates_the_first_target(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "round_robin")
+    assert [_folders()[0] for _ in range(4)] == ["a", "b", "c", "a"]
+    # Every target stays in the list as failover.
+    assert sorted(_folders()) == ["a", "b", "c"]
+
+
+def test_category_policy_prefers_matching_targets(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "category")
+    for _ in range(3):
+        assert _folders("Rregullore")[0] == "b"
+    # Uncategorised uploads still rotate.
+    assert {_folders()[0] for _ in range(3)} == {"a", "b", "c"}
+
+
+def test_least_throttled_policy_and_cooldown(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "least_throttled")
+    assert _folders() == ["a", "b", "c"]
+    drive_targets.mark_throttled({"folder_id": "a", "user_id": 1})
+    assert _folders() == ["b", "c", "a"]
+
+    # Once the cooldown is over the target comes back, still behind the never-throttled ones.
+    monkeypatch.setenv("DRIVE_THROTTLE_COOLDOWN_SECONDS", "0")
+    assert _folders() == ["b", "c", "a"]
+    drive_targets.mark_throttled({"folder_id": "b", "user_id": 2})
+    assert _folders() == ["c", "a", "b"]
+
+
+def test_throttled_target_goes_last_under_round_robin(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "round_robin")
+    drive_targets.mark_throttled({"folder_id": "a", "user_id": 1})
+    for _ in range(3):
+        assert _folders()[-1] == "a"
+
+
+def test_put_fails_over_on_rate_limit(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "round_robin")
+    calls = []
+
+    async def upload(*, user_id, filename, content_type, content, folder_id):
+        calls.append((folder_id, user_id))
+        if folder_id == "a":
+            raise DriveHTTPError(status=429, reason="rateLimitExceeded", message="slow down")
+        return {"id": f"file-{folder_id}"}
+
+    monkeypatch.setattr(drive_async, "upload_file_to_drive", upload)
+    result = asyncio.run(
+        storage.DriveStorage().put(user_ids=(7,), filename="x.pdf", content_type="application/pdf", content=b"x")
+    )
+
+    # Target "c" has no user_id, so it uploads with the uploader's own credential.
+    assert calls == [("a", 1), ("b", 2)]
+    assert result["folder_id"] == "b" and result["owner_user_id"] == 2
+    assert ("a", 1) in drive_targets._throttled_at
+
+
+def test_put_does_not_fail_over_on_other_errors(monkeypatch):
+    monkeypatch.setenv("DRIVE_UPLOAD_POLICY", "round_robin")
+    calls = []
+
+    async def upload(*, user_id, filename, content_type, content, folder_id):
+        calls.append(folder_id)
+        raise DriveHTTPError(status=400, reason="badRequest", message="nope")
+
+    monkeypatch.setattr(drive_async, "upload_file_to_drive", upload)
+    with pytest.raises(DriveHTTPError):
+        asyncio.run(
+            storage.DriveStorage().put(user_ids=(7,), filename="x.pdf", content_type="application/pdf", content=b"x")
+        )
+    assert calls == ["a"]
+    assert not drive_targets._throttled_at
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app import drive_async, drive_credentials, drive_oauth, identity_cache
+
+
+@pytest.fixture
+def cached_user(monkeypatch):
+    # User 5 has a cached access token and a remembered credential preference.
+    drive_async._tokens[5] = ("old-account-token", time.time() + 3600)
+    drive_async._tokens[6] = ("other-user-token", time.time() + 3600)
+    drive_credentials._preferred.update({"file-a": 5, "file-b": 6})
+    drive_credentials._failures[("file-c", 5)] = (time.monotonic() + 60, RuntimeError("no access"))
+    yield 5
+    drive_async._tokens.clear()
+    drive_credentials._preferred.clear()
+    drive_credentials._failures.clear()
+
+
+def _assert_forgotten():
+    assert 5 not in drive_async._tokens
+    assert drive_async._tokens[6][0] == "other-user-token"
+    assert drive_credentials._preferred == {"file-b": 6}
+    assert drive_credentials._failures == {}
+
+
+def test_disconnect_forgets_cached_token(cached_user, monkeypatch):
+    monkeypatch.setattr(drive_oauth, "require_role", lambda request, roles: {"id": 5})
+    monkeypatch.setattr(drive_oauth, "delete_drive_oauth_token_for_user", lambda user_id: True)
+    client = TestClient(Starlette(routes=[Route("/d", drive_oauth.drive_disconnect, methods=["POST"])]))
+
+    assert client.post("/d").json() == {"connected": False, "disconnected": True}
+    _assert_forgotten()
+
+
+def test_notification_from_another_worker_forgets_cached_token(cached_user):
+    identity_cache.invalidate("drive:5")
+    _assert_forgotten()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+from starlette.testclient import TestClient
+
+from backend.app import db, documents, list_cache
+from backend.app.auth import create_access_token
+
+
+@pytest.fixture
+def client(pg, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    from backend.main import app
+
+    return TestClient(app, headers={"Authorization": f"Bearer {create_access_token(1, 'staf@example.com', 'staf')}"})
+
+
+def test_document_revalidation(client, make_document):
+    doc = make_document()
+    res = client.get(f"/api/documents/{doc['id']}")
+    etag = res.headers["ETag"]
+    assert res.status_code == 200
+    assert etag.startswith('W/"')
+    assert res.headers["Cache-Control"] == "private, no-cache"
+
+    res = client.get(f"/api/documents/{doc['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["ETag"] == etag
+
+    # Weak comparison, lists of tags and "*" all match.
+    strong = etag.removeprefix("W/")
+    for header in (strong, f'W/"other", {etag}', "*"):
+        assert client.get(f"/api/documents/{doc['id']}", headers={"If-None-Match": header}).status_code == 304
+
+    db.update_document_by_id(doc_id=doc["id"], title="Renamed", category=None, description=None, tags=None)
+    res = client.get(f"/api/documents/{doc['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["title"] == "Renamed"
+    assert res.headers["ETag"] != etag
+
+
+def test_missing_document_is_a_404_even_when_revalidating(client):
+    assert client.get("/api/documents/999", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_list_revalidation_skips_the_page_query(client, make_document, monkeypatch):
+    make_document()
+    res = client.get("/api/documents?category=request")
+    etag = res.headers["ETag"]
+    assert res.status_code == 200 and len(res.json()["items"]) == 1
+
+    def no_page_query(**kwargs):
+        raise AssertionError("page query ran on a matching If-None-Match")
+
+    with monkeypatch.context() as m:
+        m.setattr(documents, "list_documents_rows", no_page_query)
+        list_cache.clear()
+        res = client.get("/api/documents?category=request", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+
+    # Other pages and filters have their own tags.
+    assert client.get("/api/documents?category=request&page=2").headers["ETag"] != etag
+    assert client.get("/api/documents?category=thesis").headers["ETag"] != etag
+
+
+def test_list_tag_changes_when_the_filtered_set_changes(client, make_document):
+    make_document()
+    etag = client.get("/api/documents?category=request").headers["ETag"]
+
+    # A write outside the filter keeps the tag...
+    make_document(category="thesis")
+    assert client.get("/api/documents?category=request", headers={"If-None-Match": etag}).status_code == 304
+
+    # ...one inside it, or a delete, changes it.
+    second = make_document()
+    res = client.get("/api/documents?category=request", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and len(res.json()["items"]) == 2
+
+    etag = res.headers["ETag"]
+    db.delete_document_by_id(second["id"])
+    res = client.get("/api/documents?category=request", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and len(res.json()["items"]) == 1
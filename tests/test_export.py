@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+import anyio
+from starlette.requests import Request
+
+from backend.app import documents
+
+
+def _export_request() -> Request:
+    return Request(
+        {"type": "http", "method": "GET", "path": "/api/documents/export", "query_string": b"format=ndjson", "headers": []}
+    )
+
+
+def test_export_cursor_is_closed_when_the_client_goes_away(monkeypatch):
+    closed = []
+    made = []  # keeps the generator alive so only an explicit close() runs its finally
+
+    def generate():
+        try:
+            while True:
+                yield [{"id": 1}]
+                time.sleep(0.05)
+        finally:
+            closed.append(True)
+
+    def batches(**kwargs):
+        made.append(generate())
+        return made[-1]
+
+    monkeypatch.setattr(documents, "require_auth", lambda request: {"id": 1})
+    monkeypatch.setattr(documents, "iter_documents_export", batches)
+
+    async def main() -> list[bytes]:
+        response = await documents.export_documents(_export_request())
+        chunks: list[bytes] = []
+
+        async def consume() -> None:
+            async for chunk in response.body_iterator:
+                chunks.append(chunk)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consume)
+            while len(chunks) < 2:
+                await anyio.sleep(0.01)
+            # Starlette cancels the response task group when the client disconnects.
+            tg.cancel_scope.cancel()
+        return chunks
+
+    chunks = anyio.run(main)
+    assert chunks[0] == b'{"id":1}\n'
+    assert closed == [True]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from starlette.testclient import TestClient
+
+from backend.app import db
+from backend.app.auth import create_access_token
+
+
+def _from_scratch(status: str | None) -> dict:
+    # The same shape computed with GROUP BY over the documents table.
+    where = "WHERE status = %s" if status else ""
+    params = (status,) if status else ()
+    counts = {}
+    for facet, expr in (
+        ("category", "category"),
+        ("status", "status"),
+        ("file_type", "file_type"),
+        ("month", "to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM')"),
+    ):
+        with db._connect() as conn:
+            sql = f"SELECT {expr}, COUNT(*) FROM academic_documents {where} GROUP BY 1"
+            rows = conn.execute(sql, params).fetchall()
+        if facet == "month":
+            ordered = sorted(rows, key=lambda r: r[0], reverse=True)
+        else:
+            ordered = sorted(rows, key=lambda r: (-r[1], r[0]))
+        counts[facet] = [{"value": value, "count": count} for value, count in ordered]
+    return {"total": sum(item["count"] for item in counts["status"]), "facets": counts}
+
+
+def _assert_consistent() -> None:
+    for status in (None, "active", "archived"):
+        assert db.get_document_facets(status) == _from_scratch(status), status
+
+
+def test_counts_follow_every_write(make_document):
+    first = make_document(category="request")
+    second = make_document(category="thesis", file_type="image/png")
+    make_document(category="thesis")
+    _assert_consistent()
+    assert db.get_document_facets("active")["total"] == 3
+
+    db.update_document_by_id(doc_id=first["id"], title=None, category="thesis", description=None, tags=None)
+    _assert_consistent()
+
+    db.archive_document_by_id(second["id"])
+    _assert_consistent()
+    assert {f["value"]: f["count"] for f in db.get_document_facets(None)["facets"]["status"]} == {
+        "active": 2,
+        "archived": 1,
+    }
+
+    db.unarchive_document_by_id(second["id"])
+    db.delete_document_by_id(first["id"])
+    _assert_consistent()
+
+    with db._connect() as conn:
+        conn.execute(
+            "UPDATE academic_documents SET created_at = '2020-05-01T00:00:00Z' WHERE id = %s", (second["id"],)
+        )
+        conn.commit()
+    _assert_consistent()
+    assert db.get_document_facets(None)["facets"]["month"][-1] == {"value": "2020-05", "count": 1}
+
+
+def test_emptied_values_drop_out(make_document):
+    doc = make_document(category="request")
+    db.delete_document_by_id(doc["id"])
+    assert db.get_document_facets(None) == {
+        "total": 0,
+        "facets": {"category": [], "status": [], "file_type": [], "month": []},
+    }
+
+
+def test_facets_endpoint(make_document, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    from backend.main import app
+
+    client = TestClient(app, headers={"Authorization": f"Bearer {create_access_token(1, 'staf@example.com', 'staf')}"})
+    make_document(category="request")
+    db.archive_document_by_id(make_document(category="thesis")["id"])
+
+    body = client.get("/api/documents/facets").json()
+    assert body["total"] == 1
+    assert body["facets"]["category"] == [{"value": "request", "count": 1}]
+    assert client.get("/api/documents/facets?status=all").json()["total"] == 2
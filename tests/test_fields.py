@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+from starlette.testclient import TestClient
+
+from backend.app.auth import create_access_token
+from backend.app.db import DOCUMENT_FIELDS, LIST_DEFAULT_FIELDS
+
+
+@pytest.fixture
+def client(pg, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    from backend.main import app
+
+    return TestClient(app, headers={"Authorization": f"Bearer {create_access_token(1, 'staf@example.com', 'staf')}"})
+
+
+def test_list_default_shape_leaves_out_large_text(client, make_document):
+    make_document(description="Long text", tags="a, b")
+    (item,) = client.get("/api/documents").json()["items"]
+    assert tuple(item) == LIST_DEFAULT_FIELDS
+    assert "description" not in item and "ai_summary" not in item
+
+
+def test_projection_returns_only_requested_fields_plus_id(client, make_document):
+    doc = make_document(description="Long text")
+    (item,) = client.get("/api/documents?fields=title, description").json()["items"]
+    assert item == {"id": doc["id"], "title": doc["title"], "description": "Long text"}
+
+    (item,) = client.get("/api/documents?fields=all").json()["items"]
+    assert tuple(item) == DOCUMENT_FIELDS
+
+
+def test_projections_are_cached_separately(client, make_document):
+    make_document()
+    narrow = client.get("/api/documents?fields=title")
+    wide = client.get("/api/documents")
+    assert set(narrow.json()["items"][0]) == {"id", "title"}
+    assert tuple(wide.json()["items"][0]) == LIST_DEFAULT_FIELDS
+    assert narrow.headers["ETag"] != wide.headers["ETag"]
+
+
+@pytest.mark.parametrize("path", ["/api/documents", "/api/documents/export", "/api/documents/1/similar"])
+def test_unknown_fields_are_rejected(client, path):
+    res = client.get(f"{path}?fields=title,password_hash")
+    assert res.status_code == 400
+    assert res.json()["error"]["code"] == "bad_request"
+    assert "password_hash" in res.json()["error"]["message"]
+
+
+def test_export_honours_fields(client, make_document):
+    doc = make_document()
+    res = client.get("/api/documents/export?format=ndjson&fields=title")
+    assert res.json() == {"id": doc["id"], "title": doc["title"]}
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.app import db, identity_cache
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    monkeypatch.setenv("IDENTITY_CACHE_TTL_SECONDS", "60")
+    monkeypatch.setattr(identity_cache, "_listening", True)
+    identity_cache.clear()
+    calls = []
+
+    def get_login_identity(email):
+        calls.append(email)
+        return {"user": None, "allowed": email.endswith("@school.test")}
+
+    monkeypatch.setattr(db, "get_login_identity", get_login_identity)
+    yield calls
+    identity_cache.clear()
+
+
+def test_hits_until_invalidated(lookups):
+    identity_cache.get_login_identity("a@school.test")
+    identity_cache.get_login_identity("a@school.test")
+    identity_cache.get_login_identity("b@school.test")
+    assert lookups == ["a@school.test", "b@school.test"]
+
+    identity_cache.invalidate("user:a@school.test")
+    identity_cache.get_login_identity("a@school.test")
+    identity_cache.get_login_identity("b@school.test")
+    assert lookups == ["a@school.test", "b@school.test", "a@school.test"]
+
+    # An empty email drops everything.
+    identity_cache.invalidate("user:")
+    identity_cache.get_login_identity("b@school.test")
+    assert lookups[-1] == "b@school.test" and len(lookups) == 4
+
+
+def test_not_served_without_the_listener(lookups, monkeypatch):
+    monkeypatch.setattr(identity_cache, "_listening", False)
+    identity_cache.get_login_identity("a@school.test")
+    identity_cache.get_login_identity("a@school.test")
+    assert lookups == ["a@school.test", "a@school.test"]
+
+
+def test_invalidation_during_the_query_skips_the_store(lookups, monkeypatch):
+    def racing_lookup(email):
+        lookups.append(email)
+        identity_cache.invalidate(f"user:{email}")
+        return {"user": None, "allowed": False}
+
+    monkeypatch.setattr(db, "get_login_identity", racing_lookup)
+    identity_cache.get_login_identity("a@school.test")
+    identity_cache.get_login_identity("a@school.test")
+    assert lookups == ["a@school.test", "a@school.test"]
+
+
+def test_drive_payload_forgets_the_users_credentials(monkeypatch):
+    from backend.app import drive_async, drive_credentials
+
+    forgotten = []
+    monkeypatch.setattr(drive_async, "forget_token", lambda uid: forgotten.append(("token", uid)))
+    monkeypatch.setattr(drive_credentials, "forget_user", lambda uid: forgotten.append(("credentials", uid)))
+    identity_cache.invalidate("drive:7")
+    assert forgotten == [("token", 7), ("credentials", 7)]
+
+
+@pytest.fixture
+def listener(pg, monkeypatch):
+    monkeypatch.setenv("IDENTITY_CACHE_TTL_SECONDS", "60")
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(identity_cache.run_listener_forever(reconnect_seconds=0.1))
+
+    def run() -> None:
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not identity_cache._listening:
+        assert time.monotonic() < deadline, "listener did not connect"
+        time.sleep(0.01)
+    yield
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+    loop.close()
+    identity_cache.clear()
+
+
+def _wait_for(predicate) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_writes_notify_other_workers(listener):
+    email = "notify@school.test"
+    db.remove_allowed_email(email)
+    try:
+        assert identity_cache.get_login_identity(email)["allowed"] is False
+        assert email in identity_cache._identities
+        assert all(item["email"] != email for item in identity_cache.list_allowed_emails())
+
+        # Written straight through db.py, as another worker would: only the NOTIFY reaches this cache.
+        db.add_allowed_email(email)
+        _wait_for(lambda: email not in identity_cache._identities)
+        assert identity_cache.get_login_identity(email)["allowed"] is True
+        assert any(item["email"] == email for item in identity_cache.list_allowed_emails())
+
+        db.create_user(email, "hash", "staff")
+        _wait_for(lambda: email not in identity_cache._identities)
+        assert identity_cache.get_login_identity(email)["user"]["role"] == "staff"
+    finally:
+        db.remove_allowed_email(email)
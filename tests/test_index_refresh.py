@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+
+from backend.app import index_refresh
+from backend.app.index_refresh import Refresher
+
+
+def test_refreshes_only_when_dirty():
+    calls = []
+    refresher = Refresher("test", lambda **options: calls.append(options))
+
+    refresher.refresh_if_dirty()
+    refresher.mark_dirty()
+    assert refresher.is_dirty()
+    refresher.refresh_if_dirty()
+    refresher.refresh_if_dirty()
+    assert calls == [{}]
+    assert not refresher.is_dirty()
+
+    refresher.refresh(allow_reload=True)
+    assert calls == [{}, {"allow_reload": True}]
+
+
+def test_loop_survives_errors(monkeypatch):
+    counted = []
+    monkeypatch.setattr(index_refresh, "incr", counted.append)
+    calls = []
+
+    def flaky(**options):
+        calls.append(options)
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+
+    refresher = Refresher("test", flaky)
+
+    async def main():
+        task = asyncio.ensure_future(refresher.run_forever(interval_seconds=0.01, allow_rebuild=True))
+        while len(calls) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(main())
+    assert calls[:2] == [{"allow_rebuild": True}] * 2
+    assert counted == ["test.refresh_errors"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.app import list_cache
+
+_FILTERS = {"category": "request", "status": "active", "query": None, "from_dt": None, "to_dt": None, "tags": ()}
+_KEY = ("request", "active", 1, 20)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    monkeypatch.setenv("LIST_CACHE_TTL_SECONDS", "60")
+    list_cache.clear()
+    yield
+    list_cache.clear()
+
+
+def _image(doc_id: int, **fields) -> dict:
+    image = {
+        "id": doc_id,
+        "category": "request",
+        "status": "active",
+        "title": f"Dokument {doc_id}",
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "tags": "",
+    }
+    image.update(fields)
+    return image
+
+
+def _put(rows: list[dict], generation: int) -> None:
+    list_cache.put(_KEY, filters=_FILTERS, version=(1,), rows=rows, generation=generation)
+
+
+def test_matching_write_invalidates_and_unrelated_write_does_not():
+    _put([_image(1)], list_cache.generation())
+    assert list_cache.get(_KEY) == ((1,), [_image(1)])
+
+    list_cache.invalidate_document(9, [_image(9, category="thesis")])
+    assert list_cache.get(_KEY) is not None
+
+    list_cache.invalidate_document(2, [_image(2)])
+    assert list_cache.get(_KEY) is None
+
+
+def test_page_read_before_a_write_is_not_cached_after_it():
+    generation = list_cache.generation()
+    rows = [_image(1)]  # read from Postgres...
+    list_cache.invalidate_document(1, [_image(1, status="archived")])  # ...then a write commits
+    _put(rows, generation)
+
+    assert list_cache.get(_KEY) is None
+
+
+def test_put_survives_writes_that_cannot_touch_the_page():
+    generation = list_cache.generation()
+    list_cache.invalidate_document(9, [_image(9, category="thesis")])
+    _put([_image(1)], generation)
+
+    assert list_cache.get(_KEY) is not None
+
+
+def test_put_is_dropped_when_the_write_log_has_moved_past_it():
+    generation = list_cache.generation()
+    for i in range(list_cache._RECENT_WRITES + 1):
+        list_cache.invalidate_document(1000 + i, [_image(1000 + i, category="thesis")])
+    _put([_image(1)], generation)
+
+    assert list_cache.get(_KEY) is None
+
+
+def test_clear_drops_in_flight_puts():
+    generation = list_cache.generation()
+    list_cache.clear()
+    _put([_image(1)], generation)
+
+    assert list_cache.get(_KEY) is None
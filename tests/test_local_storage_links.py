@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import urlsplit
+
+import pytest
+from starlette.testclient import TestClient
+
+from backend.app import documents, storage
+from backend.app.auth import create_access_token
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    monkeypatch.setenv("PUBLIC_BASE_URL", "http://testserver")
+    engine = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(storage, "_engines", {"local": engine})
+    stored = asyncio.run(
+        engine.put(user_ids=(), filename="a.pdf", content_type="application/pdf", content=b"%PDF-1.4 test")
+    )
+    key = stored["drive_file_id"]
+    monkeypatch.setattr(
+        documents,
+        "get_document_by_drive_file_id",
+        lambda k: {"id": 1, "drive_file_id": k, "file_type": "application/pdf"} if k == key else None,
+    )
+
+    from backend.main import app
+
+    return TestClient(app), key, stored["web_view_link"], engine
+
+
+def _auth() -> dict:
+    return {"Authorization": f"Bearer {create_access_token(1, 'staf@example.com', 'staf')}"}
+
+
+def test_plain_navigation_needs_auth(client):
+    http, key, link, _ = client
+    assert http.get(urlsplit(link).path).status_code == 401
+    assert http.get(urlsplit(link).path, headers=_auth()).content == b"%PDF-1.4 test"
+
+
+def test_signed_link_opens_without_bearer_token(client):
+    http, key, _, _ = client
+    signed = http.get(f"/api/storage/local/{key}/link", headers=_auth()).json()
+
+    res = http.get(urlsplit(signed["url"]).path + "?" + urlsplit(signed["url"]).query)
+    assert res.status_code == 200
+    assert res.content == b"%PDF-1.4 test"
+
+
+def test_tampered_or_expired_links_are_rejected(client, monkeypatch):
+    http, key, _, _ = client
+    url = urlsplit(http.get(f"/api/storage/local/{key}/link", headers=_auth()).json()["url"])
+
+    assert http.get(url.path + "?" + url.query.replace("signature=", "signature=0")).status_code == 401
+
+    monkeypatch.setenv("STORAGE_LOCAL_LINK_TTL_SECONDS", "-1")
+    expired = urlsplit(http.get(f"/api/storage/local/{key}/link", headers=_auth()).json()["url"])
+    assert http.get(expired.path + "?" + expired.query).status_code == 401
+
+
+def test_link_endpoint_requires_auth(client):
+    http, key, _, _ = client
+    assert http.get(f"/api/storage/local/{key}/link").status_code == 401
+
+
+def test_missing_file_is_a_404_not_a_broken_200(client):
+    http, key, _, engine = client
+    engine.path_for(key).unlink()
+
+    res = http.get(f"/api/storage/local/{key}", headers=_auth())
+    assert res.status_code == 404
+    assert res.json()["error"]["code"] == "not_found"
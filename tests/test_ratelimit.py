@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app import ratelimit
+from backend.main import rate_limit_busy_handler, rate_limited_handler
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_STATE_PATH", str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(ratelimit, "_conn", None)
+    monkeypatch.setattr(
+        ratelimit,
+        "_policies",
+        {"ai_summary": {"per_user": {"rate_per_minute": 1, "burst": 2, "concurrency": 1}}},
+    )
+
+    async def endpoint(request):
+        return JSONResponse({"ok": True})
+
+    app = Starlette(
+        routes=[Route("/summary", ratelimit.rate_limited("ai_summary", endpoint))],
+        exception_handlers={
+            ratelimit.RateLimitedError: rate_limited_handler,
+            ratelimit.RateLimitStateBusyError: rate_limit_busy_handler,
+        },
+    )
+    yield TestClient(app)
+    if ratelimit._conn is not None:
+        ratelimit._conn.close()
+
+
+def test_burst_then_429_with_retry_after(client):
+    # Concurrency slots are released after each response, so only the bucket limits.
+    assert client.get("/summary").status_code == 200
+    assert client.get("/summary").status_code == 200
+
+    res = client.get("/summary")
+    assert res.status_code == 429
+    assert res.json()["error"]["code"] == "rate_limited"
+    assert 1 <= int(res.headers["Retry-After"]) <= 60
+
+
+def test_locked_state_file_is_a_503_not_a_500(client, tmp_path):
+    ratelimit._connection()
+    other = sqlite3.connect(str(tmp_path / "state.sqlite3"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        res = client.get("/summary")
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+    assert client.get("/summary").status_code == 200
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from backend.app.similarity import SimilarityIndex
+
+_T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_TEXTS = [
+    "Kërkesë për transferim studenti fakulteti ekonomik",
+    "Kërkesë për transferim studenti fakulteti juridik",
+    "Vendim senati për kalendarin akademik",
+    "Vendim senati për tarifat e studimit",
+    "Raport vjetor i bibliotekës universitare",
+    "Rregullore e bibliotekës dhe huazimit të librave",
+]
+
+
+def _row(doc_id: int, title: str, *, updated: datetime = _T0, status: str = "active") -> tuple:
+    # (id, updated_at, status, title, description, tags, ai_summary)
+    return (doc_id, updated, status, title, None, None, None)
+
+
+def _index() -> SimilarityIndex:
+    return SimilarityIndex([_row(i, title) for i, title in enumerate(_TEXTS, start=1)])
+
+
+def _assert_postings_consistent(index: SimilarityIndex) -> None:
+    # Every posting belongs to a live vector, and every slot points back at it.
+    postings = sum(len(ids) for ids in index.post_ids)
+    assert postings == sum(len(v[0]) for v in index.vectors.values())
+    for doc_id, (ids, weights) in index.vectors.items():
+        for t, w, slot in zip(ids, weights, index.slots[doc_id]):
+            assert index.post_ids[t][slot] == doc_id
+            assert index.post_weights[t][slot] == w
+
+
+def test_similar_ranks_the_closest_documents_first():
+    index = _index()
+    assert [d for d, _ in index.similar(1, limit=2, status=None)][0] == 2
+    assert [d for d, _ in index.similar(3, limit=1, status=None)] == [4]
+
+
+def test_overlap_window_repeats_are_not_churn():
+    index = _index()
+    before = index.similar(1, limit=5, status=None)
+
+    for _ in range(3):
+        for i, title in enumerate(_TEXTS, start=1):
+            assert index.apply(_row(i, title)) is False
+
+    assert index.changed == 0
+    assert index.similar(1, limit=5, status=None) == before
+    _assert_postings_consistent(index)
+
+
+def test_status_only_changes_update_filters_without_churn():
+    index = _index()
+    assert index.apply(_row(2, _TEXTS[1], updated=_T0 + timedelta(seconds=1), status="archived")) is False
+
+    assert index.changed == 0
+    assert 2 not in [d for d, _ in index.similar(1, limit=5, status="active")]
+
+
+def test_text_changes_and_removals_keep_postings_consistent():
+    index = _index()
+    later = _T0 + timedelta(seconds=1)
+
+    assert index.apply(_row(5, "Kërkesë për transferim studenti", updated=later)) is True
+    assert index.apply(_row(7, "Vendim senati për bursat", updated=later)) is True
+    index.remove(2)
+    index.remove(3)
+    _assert_postings_consistent(index)
+
+    assert index.changed == 4
+    assert [d for d, _ in index.similar(1, limit=1, status=None)] == [5]
+    assert [d for d, _ in index.similar(4, limit=1, status=None)] == [7]
+    assert index.similar(2, limit=1, status=None) is None
+
+
+def test_recall_against_exact_cosine():
+    from backend.benchmarks.similarity import _exact_top, _rows, _untruncated, _untruncated_top
+
+    rows, _ = _rows(1000, seed=3)
+    index = SimilarityIndex(rows)
+    vectors, postings = _untruncated(index, rows)
+    found = found_untruncated = 0
+    for doc_id in range(1, 51):
+        got = {d for d, _ in index.similar(doc_id, limit=10, status=None)}
+        found += len(got & set(_exact_top(index, doc_id, 10)))
+        found_untruncated += len(got & set(_untruncated_top(vectors, postings, doc_id, 10)))
+
+    # Exact over the stored vectors; the per-document truncation costs the rest.
+    assert found / 500 >= 0.99
+    assert found_untruncated / 500 >= 0.6
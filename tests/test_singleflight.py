@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.app import singleflight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return {"key": key}
+
+    async def main():
+        results = await asyncio.gather(
+            *(singleflight.coalesce("doc", 1, lambda: load(1)) for _ in range(5)),
+            singleflight.coalesce("doc", 2, lambda: load(2)),
+        )
+        # Nothing is cached once the flight lands.
+        again = await singleflight.coalesce("doc", 1, lambda: load(1))
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert calls == [1, 2, 1]
+    assert results[:5] == [{"key": 1}] * 5
+    assert results[0] is results[4]
+    assert again == {"key": 1}
+    assert not singleflight._inflight
+
+
+def test_waiters_all_receive_the_exception():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            *(singleflight.coalesce("doc", 1, fail) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert all(isinstance(r, ValueError) for r in results)
+    assert not singleflight._inflight
+
+
+def test_one_caller_cancelling_does_not_cancel_the_others():
+    async def load():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(singleflight.coalesce("doc", 1, load))
+        second = asyncio.ensure_future(singleflight.coalesce("doc", 1, load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from backend.app import suggest
+from backend.app.suggest import SuggestIndex, normalize
+
+_T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _row(doc_id: int, title: str, tags: str = "", *, days: int = 0, status: str = "active") -> tuple:
+    # (id, updated_at, created_at, status, title, tags)
+    created = _T0 + timedelta(days=days)
+    return (doc_id, created, created, status, title, tags)
+
+
+def test_kind_filter_is_not_starved_by_the_other_kind():
+    # Far more (and newer) titles than tags under "st": the mixed top-_KEEP is all titles.
+    rows = [_row(i, f"Studim {i}", days=100 + i) for i in range(1, suggest._KEEP * 2)]
+    rows += [
+        _row(1000, "Raport", "statistika", days=1),
+        _row(1001, "Plan", "strategji"),
+        _row(1002, "Lista", "studentë", days=2),
+    ]
+    index = SuggestIndex(rows)
+
+    assert {s["kind"] for s in index.suggest("st", limit=20)} == {"title"}
+    assert [s["text"] for s in index.suggest("st", limit=20, kind="tag")] == ["studentë", "statistika", "strategji"]
+
+    index.apply(_row(1003, "Vendim", "stafi", days=50))
+    assert index.suggest("st", limit=1, kind="tag")[0]["text"] == "stafi"
+    index.remove(1000)
+    assert [s["text"] for s in index.suggest("st", limit=20, kind="tag")] == ["stafi", "studentë", "strategji"]
+
+
+def _brute_force(index: SuggestIndex, prefix: str, kind: str | None, limit: int) -> list[float]:
+    matches = [
+        entry
+        for entry in index.entries
+        if (kind is None or entry[0] == kind) and any(key.startswith(prefix) for key in suggest._keys(entry))
+    ]
+    return sorted((index._score(entry) for entry in matches), reverse=True)[:limit]
+
+
+def test_cached_rankings_match_brute_force_through_writes(monkeypatch):
+    monkeypatch.setattr(suggest, "_KEEP", 8)
+    rng = random.Random(7)
+    words = ["studim", "statut", "stafi", "senat", "salla", "rektor", "raport", "regjistrim"]
+
+    def random_row(doc_id: int) -> tuple:
+        title = " ".join(rng.sample(words, 2)) + f" {doc_id}"
+        tags = ", ".join(rng.sample(words, rng.randint(0, 2)))
+        return _row(doc_id, title, tags, days=rng.randint(0, 400), status=rng.choice(["active", "active", "archived"]))
+
+    index = SuggestIndex([random_row(i) for i in range(200)])
+    for step in range(300):
+        if step % 5 == 0:
+            index.remove(rng.randrange(200))
+        else:
+            index.apply(random_row(rng.randrange(220)))
+        for prefix in ("s", "st", "r", "reg", "sta"):
+            for kind in (None, "title", "tag"):
+                got = [
+                    index._score((s["kind"], normalize(s["text"])))
+                    for s in index.suggest(prefix, limit=5, kind=kind)
+                ]
+                # Scores, not texts: equal scores may tie in either order.
+                want = _brute_force(index, prefix, kind, 5)
+                assert len(got) == len(want)
+                assert all(math.isclose(a, b) for a, b in zip(got, want))
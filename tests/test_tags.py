@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.app import catalog, list_cache, similarity, suggest
+from backend.app.db import (
+    _connect,
+    archive_document_by_id,
+    delete_document_by_id,
+    get_tag_counts,
+    list_documents_rows,
+    update_document_by_id,
+)
+from backend.app.documents import _list_filters
+from backend.app.tags import backfill, parse_tags
+
+_SAMPLES = ["Provime, Rregullore,provime", "  Studime   Master ,", " , ", "", "ÇËSHTJE, çështje"]
+# Non-ASCII letters and whitespace, and code-point order (ç sorts after d).
+_UNICODE_SAMPLES = ["Çështje\u00a0Studimi, ËSHTË\u2003e\tRe", "d, Ç, c, ë", "\u3000Bursa\u202f,\u2028"]
+
+
+def test_parse_tags_normalizes_and_deduplicates():
+    assert parse_tags("Provime, Rregullore,provime") == ["provime", "rregullore"]
+    assert parse_tags(["a, B", "b"]) == ["a", "b"]
+    assert parse_tags(" , ") == []
+
+
+def test_sql_parsing_matches_python(pg):
+    with _connect() as conn:
+        for text in _SAMPLES + _UNICODE_SAMPLES:
+            assert conn.execute("SELECT document_tag_array(%s)", (text,)).fetchone()[0] == parse_tags(text)
+
+
+def _ids(**filters) -> list[int]:
+    rows = list_documents_rows(
+        query=None, category=None, status="active", from_dt=None, to_dt=None, page=1, page_size=50, fields=("id",),
+        **filters,
+    )
+    return sorted(row["id"] for row in rows)
+
+
+def test_unicode_tags_round_trip_through_the_filter(make_document):
+    doc = make_document(tags="ÇËSHTJE\u00a0Studimi, Bursa")["id"]
+    make_document(tags="çështje")
+
+    # Filters are parsed in Python, stored lists in SQL.
+    for typed in ("çështje studimi", "Çështje  Studimi", "ÇËSHTJE\u2003studimi"):
+        filters = _list_filters({"tag": typed})
+        rows = list_documents_rows(**filters, page=1, page_size=50, fields=("id",))
+        assert [row["id"] for row in rows] == [doc], typed
+
+
+def _cloud(status: str | None = "active") -> dict[str, int]:
+    return {item["tag"]: item["count"] for item in get_tag_counts(status=status, prefix=None, limit=50)}
+
+
+def test_tag_filters_and_cloud_follow_inserts_updates_and_deletes(make_document):
+    a = make_document(tags="Provime, Rregullore")["id"]
+    b = make_document(tags="provime")["id"]
+    c = make_document(tags="Bursa")["id"]
+
+    assert _ids(tags=("provime",), tags_match="all") == [a, b]
+    assert _ids(tags=("provime", "rregullore"), tags_match="all") == [a]
+    assert _ids(tags=("rregullore", "bursa"), tags_match="any") == [a, c]
+    assert _cloud() == {"provime": 2, "rregullore": 1, "bursa": 1}
+
+    update_document_by_id(doc_id=b, title=None, category=None, description=None, tags="Bursa, Senat")
+    assert _ids(tags=("bursa",), tags_match="all") == [b, c]
+    assert _cloud() == {"provime": 1, "rregullore": 1, "bursa": 2, "senat": 1}
+
+    archive_document_by_id(c)
+    assert _ids(tags=("bursa",), tags_match="all") == [b]
+    assert _cloud() == {"provime": 1, "rregullore": 1, "bursa": 1, "senat": 1}
+    assert _cloud("archived") == {"bursa": 1}
+    assert _cloud(None)["bursa"] == 2
+
+    delete_document_by_id(a)
+    assert _ids(tags=("provime",), tags_match="any") == []
+    assert _cloud() == {"bursa": 1, "senat": 1}
+
+
+@pytest.mark.parametrize("batch_size", [1, 1000])
+def test_backfill_fills_legacy_rows_once(make_document, batch_size):
+    legacy = [make_document(tags=text)["id"] for text in _SAMPLES]
+    with _connect() as conn:
+        # Rows written before the tag_list column existed (counts follow tag_list).
+        conn.execute("ALTER TABLE academic_documents DISABLE TRIGGER USER")
+        conn.execute("UPDATE academic_documents SET tag_list = '{}'")
+        conn.execute("ALTER TABLE academic_documents ENABLE TRIGGER USER")
+        conn.execute("TRUNCATE document_tag_counts")
+        conn.commit()
+
+    assert backfill(batch_size=batch_size)["rows"] == 3
+    assert backfill(batch_size=batch_size)["rows"] == 0
+    with _connect() as conn:
+        lists = dict(conn.execute("SELECT id, tag_list FROM academic_documents").fetchall())
+    assert [lists[i] for i in legacy] == [parse_tags(text) for text in _SAMPLES]
+    assert _ids(tags=("provime",), tags_match="all") == [legacy[0]]
+    assert _cloud() == {"provime": 1, "rregullore": 1, "studime master": 1, "çështje": 1}
+
+
+def test_backfill_invalidates_cached_pages_and_indexes(make_document):
+    make_document(tags="Provime")
+    with _connect() as conn:
+        conn.execute("ALTER TABLE academic_documents DISABLE TRIGGER USER")
+        conn.execute("UPDATE academic_documents SET tag_list = '{}'")
+        conn.execute("ALTER TABLE academic_documents ENABLE TRIGGER USER")
+        conn.execute("TRUNCATE document_tag_counts")
+        conn.commit()
+
+    filters = _list_filters({"tag": "provime"})
+    list_cache.put(("provime",), filters=filters, version=(0,), rows=[], generation=list_cache.generation())
+    assert list_cache.get(("provime",)) is not None
+    for index in (catalog, similarity, suggest):
+        index._refresher._dirty.clear()
+
+    assert backfill()["rows"] == 1
+    assert list_cache.get(("provime",)) is None
+    assert all(index._refresher.is_dirty() for index in (catalog, similarity, suggest))
+
+
+def test_backfill_reparses_lists_from_older_rules(make_document):
+    doc = make_document(tags="Çështje\u00a0Studimi")["id"]
+    old = "çështje\u00a0studimi"  # what the locale-dependent \s left in place
+    with _connect() as conn:
+        conn.execute("ALTER TABLE academic_documents DISABLE TRIGGER USER")
+        conn.execute("UPDATE academic_documents SET tag_list = ARRAY[%s]", (old,))
+        conn.execute("ALTER TABLE academic_documents ENABLE TRIGGER USER")
+        conn.execute("TRUNCATE document_tag_counts")
+        conn.execute("INSERT INTO document_tag_counts VALUES ('active', %s, 1)", (old,))
+        conn.commit()
+
+    assert backfill()["rows"] == 1
+    assert backfill()["rows"] == 0
+    assert _ids(tags=("çështje studimi",), tags_match="all") == [doc]
+    assert _cloud() == {"çështje studimi": 1}